@@ -6,6 +6,8 @@ Requirements:
 - Python 3.7+
 - requests library (install with: pip install requests)
 - pygame library (install with: pip install pygame)
+- websocket-client library, optional (install with: pip install websocket-client)
+- numpy library, optional - calculations without building the C++ calculators (install with: pip install numpy)
 - X-Plane 12.1.1+ running with Web API enabled
 
 To run:
@@ -14,11 +16,37 @@ To run:
 Or simply:
     ./run_mfd.sh
 
+Options:
+    --url URL                 Web API base URL (default http://localhost:8086/api/v2)
+    --transport websocket     Subscribe to datarefs over the Web API WebSocket
+                              instead of polling every value over REST
+    --calculators MODE        library (in-process libmfd_calc), process (warm
+                              calculator processes), numpy (calc_engine, no
+                              build needed) or auto (the first one available)
+    --record DIR              Record every tick (datarefs and calculator
+                              results) to rotating .mfdrec files in DIR
+    --record-max-mb MB        Size of each recording file (default 64)
+    --metrics-file PATH       Write timing and counter metrics to PATH every
+                              --metrics-interval seconds (Prometheus text)
+    --replay PATH             Play a recording (file or --record directory)
+                              in place of X-Plane
+    --replay-session NAME     Session of the --replay directory to play
+                              (default the newest)
+    --replay-speed N          Playback speed (default 1, 0 = as fast as possible)
+    --replay-start TIMESTAMP  Start the replay at a recorded timestamp
+    --renderer canvas         Draw the panels on one Canvas instead of
+                              Label widgets (default labels)
+    --frame-rate HZ           Display refresh rate, 5-60 (default 10)
+    --ias-window N            IAS samples behind the gust factor, read at
+                              25 Hz, 1-512 (default 50 = 2 s)
+
 USB Device Support:
     Supports ThrustMaster F16 MFD 2 (VID: 0x044f, PID: 0xb352)
     - Automatically detected when connected
     - Falls back to keyboard input if not connected
     - Buttons 0-9 on device map to panel selection
+    - Button 10 shows the hidden DIAGNOSTICS panel (instrumentation timings
+      and counters, see instrumentation.py; Ctrl+D on the keyboard)
 
 Keyboard Shortcuts (fallback when USB device not connected):
     0 - Show all panels (default view)
@@ -33,17 +61,35 @@ Keyboard Shortcuts (fallback when USB device not connected):
     9 - Show DENSITY ALT panel only (full screen)
 """
 
+import argparse
+import array
+import bisect
 import tkinter as tk
 from tkinter import font as tkfont
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import TimeoutError as Urllib3TimeoutError
+from urllib3.util.retry import Retry
 import json
-from typing import Dict, Optional, Any
+import math
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Any, Tuple
 import time
 import os
+import sys
+import tempfile
+import collections
 from pathlib import Path
 import subprocess
+import select
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import queue
 import ctypes
 import ctypes.util
+import flight_recorder
+import instrumentation
 
 try:
     import pygame.joystick
@@ -52,50 +98,546 @@ except ImportError:
     PYGAME_AVAILABLE = False
     print("Warning: pygame not available. Install with: pip install pygame")
 
+try:
+    import websocket
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
+
+try:
+    import calc_engine
+    CALC_ENGINE_AVAILABLE = True
+except ImportError:
+    CALC_ENGINE_AVAILABLE = False
+
+
+# Datarefs read every tick, by display field: (name, array index or None)
+FIELD_DATAREFS = {
+    # Position
+    "lat": ("sim/flightmodel/position/latitude", None),
+    "lon": ("sim/flightmodel/position/longitude", None),
+    "alt": ("sim/flightmodel/position/elevation", None),
+    "agl": ("sim/flightmodel/position/y_agl", None),
+    # Navigation
+    "heading": ("sim/flightmodel/position/psi", None),
+    "pitch": ("sim/flightmodel/position/theta", None),
+    "roll": ("sim/flightmodel/position/phi", None),
+    "track": ("sim/flightmodel/position/hpath", None),
+    # Flight data
+    # Use cockpit gauge IAS (what pilot sees) instead of raw indicated_airspeed
+    # The raw dataref can be miscalibrated or in wrong units for some aircraft
+    "ias": ("sim/cockpit2/gauges/indicators/airspeed_kts_pilot", None),
+    "gs": ("sim/flightmodel/position/groundspeed", None),
+    "vs": ("sim/cockpit2/gauges/indicators/vvi_fpm_pilot", None),
+    "mach": ("sim/flightmodel/misc/machno", None),
+    "tas": ("sim/flightmodel/position/true_airspeed", None),
+    # Engine - N1/N2 first (jets)
+    "n1": ("sim/cockpit2/engine/indicators/N1_percent", 0),
+    "n2": ("sim/cockpit2/engine/indicators/N2_percent", 0),
+    "throttle": ("sim/cockpit2/engine/actuators/throttle_ratio", 0),
+    # Weight and limits
+    "fuel_total": ("sim/flightmodel/weight/m_fuel_total", None),
+    "weight": ("sim/flightmodel/weight/m_total", None),
+    "vso": ("sim/aircraft/view/acf_Vso", None),
+    "vne": ("sim/aircraft/view/acf_Vne", None),
+    "mmo": ("sim/aircraft/view/acf_Mmo", None),
+    # Atmosphere
+    "oat": ("sim/cockpit2/temperature/outside_air_temp_degc", None),
+    # Aircraft identity (base64 .acf path, changes when another aircraft is loaded)
+    "aircraft": ("sim/aircraft/view/acf_relative_path", None),
+}
+
+# Aircraft constants, read once per aircraft load
+AIRCRAFT_LIMIT_FIELDS = ("vso", "vne", "mmo")
+
+# Sampling rate in Hz of each group of FIELD_DATAREFS fields (None = once per aircraft)
+DATAREF_RATES = (
+    (None, AIRCRAFT_LIMIT_FIELDS),
+    (1.0, ("fuel_total", "weight", "oat", "aircraft")),
+    (5.0, ("lat", "lon", "mach", "n1", "n2", "throttle")),
+    (10.0, ("alt", "agl", "heading", "track", "gs", "vs", "tas")),
+    # Faster than FRAME_RATE: feeds the gust factor (IasHistory) and recordings
+    (25.0, ("pitch", "roll", "ias")),
+)
+
+# Rate in Hz at which the C++ calculators are run on the latest values
+CALCULATOR_RATE = 10.0
+
+# IAS samples behind the gust factor (see IasHistory). Every IAS reading is
+# a sample, and IAS is read at its DATAREF_RATES rate whatever panel is
+# shown, so the window is a fixed time span: 50 samples at 25 Hz = 2 s.
+# IAS_WINDOW and MAX_IAS_WINDOW are mfd_default_ias_window and
+# mfd_max_ias_window in calculators/mfd_calc.h, which the calculator tools
+# and calc_engine use as well.
+IAS_RATE = next(rate for rate, fields in DATAREF_RATES if "ias" in fields)
+IAS_WINDOW = 50
+MAX_IAS_WINDOW = 512
+
+# Rate in Hz at which fields and calculators the visible panel does not show
+# are still refreshed (see PANEL_DEMANDS), so other panels are current when shown
+BACKGROUND_RATE = 0.2
+
+# Fields read whatever is shown: aircraft changes must always be noticed,
+# and the gust factor needs IAS at a fixed rate
+ALWAYS_READ_FIELDS = ("aircraft", "ias") + AIRCRAFT_LIMIT_FIELDS
+
+# Reference turn and VNAV constraint shown on the MFD
+TURN_COURSE_CHANGE_DEG = 90
+VNAV_TARGET_ALT_FT = 10000.0
+VNAV_DISTANCE_NM = 100.0
+
+# Display mode of the hidden diagnostics panel, on F16 MFD button 10 (otherwise unmapped)
+DIAGNOSTICS_MODE = 10
+DIAGNOSTICS_REFRESH = 1.0  # Seconds between diagnostics panel updates
+
+# Display refresh rate (update_display frames per second) and the range --frame-rate accepts
+FRAME_RATE = 10.0
+FRAME_RATE_RANGE = (5.0, 60.0)
+
+# Pixels between the canvas renderer's sections, and from their border to the text
+CANVAS_PAD = 5
+
+# Parts of a compute_all_calculator result, one per single-purpose calculator
+COMPUTE_ALL_PARTS = ("flight", "turn", "vnav", "density_altitude")
+
+# Binary calculator records (--binary, calculators/calc_binary.h)
+BINARY_FORMAT_VERSION = 1
+BINARY_HEADER = struct.Struct("<HHi")  # Format version, calculator id, status
+
+# Datarefs only read when the primary source of a field is unavailable
+FALLBACK_DATAREFS = {
+    "ias": ("sim/flightmodel/position/indicated_airspeed", None),  # Raw IAS if no cockpit gauge
+    "rpm": ("sim/cockpit2/engine/indicators/engine_speed_rpm", 0),  # Props have no N1
+    "prop_rpm": ("sim/cockpit2/engine/indicators/prop_speed_rpm", 0),  # Props have no N2
+}
+
+# Every dataref read by the MFD as (name, array index or None)
+MFD_DATAREFS = tuple(FIELD_DATAREFS.values()) + tuple(FALLBACK_DATAREFS.values())
+
+# Directory holding the built C++ calculators
+CALCULATOR_DIR = Path(__file__).parent
+
+# Shared library with every calculator (make libmfd_calc)
+CALCULATOR_LIBRARY = CALCULATOR_DIR / ("libmfd_calc.dylib" if sys.platform == "darwin" else "libmfd_calc.so")
+
+# On-disk name -> ID index, reused across restarts of the same X-Plane session
+DATAREF_INDEX_PATH = Path.home() / ".cache" / "xplane_mfd" / "dataref_index.json"
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Tracks Web API health from the outcome of real requests
+    
+    closed:    requests flow normally; `failure_threshold` consecutive
+               connection failures open the circuit
+    open:      requests fail immediately (no timeout pile-up) until the
+               backoff delay has passed
+    half_open: a single probe request is let through; success closes the
+               circuit, failure re-opens it with the backoff doubled
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 0.5, max_backoff: float = 8.0):
+        """Initialize the breaker
+        
+        Starts half-open: X-Plane counts as connected once a request succeeds.
+        
+        Args:
+            failure_threshold: Consecutive failures that open a closed circuit
+            base_backoff: Seconds the circuit stays open after first opening
+            max_backoff: Upper limit for the exponentially growing backoff
+        """
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = self.HALF_OPEN
+        self.failures = 0
+        self.backoff = base_backoff
+        self.retry_at = 0.0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """Check whether a request may be sent now (reserves the probe when half-open)"""
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() >= self.retry_at:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        """A request reached X-Plane - close the circuit"""
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.backoff = self.base_backoff
+            self.probe_in_flight = False
+    
+    def record_failure(self):
+        """A request could not reach X-Plane"""
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                # Failed probe - back off for longer before the next one
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+                self.open()
+            elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self.open()
+            self.probe_in_flight = False
+    
+    def open(self):
+        """Open the circuit for the current backoff delay (lock must be held)"""
+        self.state = self.OPEN
+        self.retry_at = time.monotonic() + self.backoff
+    
+    def is_closed(self) -> bool:
+        """Check whether X-Plane is currently considered reachable"""
+        return self.state == self.CLOSED
+
 
 class XPlaneAPI:
-    """Interface to X-Plane Web API"""
+    """Interface to X-Plane Web API
+    
+    All requests go through a single pooled keep-alive session so the ~30
+    dataref reads per tick reuse TCP connections instead of paying a new
+    handshake to the Web API every time.
+    """
     
-    def __init__(self, base_url: str = "http://localhost:8086/api/v2"):
+    def __init__(self, base_url: str = "http://localhost:8086/api/v2",
+                 pool_size: int = 8, retries: int = 1, timeout: float = 1.0,
+                 index_path: Optional[Path] = DATAREF_INDEX_PATH,
+                 breaker: Optional[CircuitBreaker] = None, negative_ttl: float = 30.0):
+        """Initialize the API client
+        
+        Args:
+            base_url: Base URL of the X-Plane Web API
+            pool_size: Maximum number of keep-alive connections held in the pool
+            retries: Number of times a failed connection attempt is retried
+            timeout: Per-request timeout in seconds
+            index_path: File used to persist the dataref name -> ID index (None disables it)
+            breaker: Circuit breaker deciding when X-Plane is reachable (default settings if None)
+            negative_ttl: Seconds a dataref name that did not resolve is remembered as missing
+        """
         self.base_url = base_url
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.timeout = timeout
+        self.index_path = index_path
+        self.index_key: Optional[str] = None  # X-Plane version/session the index belongs to
         self.dataref_cache: Dict[str, int] = {}
+        self.index_lock = threading.Lock()  # Guards dataref_cache changes and index_dirty
+        self.index_dirty = False  # IDs were resolved again since the index was saved
+        
+        # Names the loaded aircraft does not publish (name -> monotonic expiry),
+        # so fallbacks such as N1 on a piston aircraft are not looked up every tick
+        self.negative_ttl = negative_ttl
+        self.missing_datarefs: Dict[str, float] = {}
+        self.aircraft: Optional[Any] = None  # Identity of the loaded aircraft (see set_aircraft)
+        
+        # Persistent pooled session (keep-alive transport)
+        self.session = requests.Session()
+        self.session.headers.update({"Accept": "application/json"})
+        adapter = HTTPAdapter(
+            pool_connections=1,  # Only one host (the sim) is ever contacted
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, connect=retries, read=0, status=0, backoff_factor=0)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Bounded worker pool for concurrent reads (see get_many)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="xplane-api")
+    
+    def get(self, path: str, params: Optional[dict] = None) -> requests.Response:
+        """Issue a GET request to the Web API through the pooled session"""
+        return self.get_url(f"{self.base_url}{path}", params)
+    
+    def get_url(self, url: str, params: Optional[dict] = None) -> requests.Response:
+        """Issue a GET request through the circuit breaker
+        
+        Raises:
+            CircuitOpenError: X-Plane is known to be unreachable, nothing was sent
+            requests.RequestException: The request failed
+        """
+        if not self.breaker.allow_request():
+            instrumentation.count("api.short_circuited")
+            raise CircuitOpenError("X-Plane unreachable, waiting before retrying")
+        instrumentation.count("api.requests")
+        try:
+            with instrumentation.span("api.request"):
+                response = self.session.get(url, params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            # Every failed request releases the half-open probe, including a
+            # connection dropped mid-body (ChunkedEncodingError). A read
+            # timeout with no read retries left arrives as a ConnectionError.
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            if isinstance(e, requests.Timeout) or isinstance(reason, Urllib3TimeoutError):
+                instrumentation.count("api.timeouts")
+            else:
+                instrumentation.count("api.connection_errors")
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            instrumentation.count("api.server_errors")
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+    
+    def is_connected(self) -> bool:
+        """Check whether the last requests reached X-Plane"""
+        return self.breaker.is_closed()
+    
+    def now(self) -> float:
+        """Clock the MFD schedules reads and calculations against (monotonic seconds)"""
+        return time.monotonic()
+    
+    def get_dataref_count(self) -> Optional[int]:
+        """Get the number of datarefs published by X-Plane (None if unavailable)"""
+        response = self.get("/datarefs/count")
+        if response.status_code == 200:
+            return response.json().get("data")
+        return None
+    
+    def connection_stats(self) -> Dict[str, int]:
+        """Report connection pool usage
+        
+        Returns:
+            Dict with the number of requests sent, new connections opened and
+            requests that were served over an already open (reused) connection
+        """
+        requests_sent = 0
+        connections_opened = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_sent += pool.num_requests
+                connections_opened += pool.num_connections
+        return {
+            "requests": requests_sent,
+            "connections": connections_opened,
+            "reused": max(requests_sent - connections_opened, 0)
+        }
+    
+    def subscribe(self, datarefs: Iterable[Tuple[str, Optional[int]]]) -> bool:
+        """Subscribe to value updates - the REST transport polls, so nothing to do
+        
+        Returns:
+            True if the datarefs are now pushed by X-Plane
+        """
+        return False
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.executor.shutdown(wait=False)
+        self.session.close()
+    
+    def get_session_key(self) -> Optional[str]:
+        """Identify the running X-Plane session
+        
+        Dataref IDs are only stable for one X-Plane session, but the Web API
+        does not expose a session identifier. The simulator version together
+        with the number of registered datarefs (which changes whenever plugins
+        or aircraft register new ones) is used instead.
+        """
+        root_url = self.base_url.rsplit("/", 1)[0]
+        response = self.get_url(f"{root_url}/capabilities")
+        if response.status_code != 200:
+            return None
+        version = response.json().get("x-plane", {}).get("version", "unknown")
+        count = self.get_dataref_count()
+        if count is None:
+            return None
+        return f"{version}/{count}"
+    
+    def load_dataref_index(self, names: Iterable[str]) -> bool:
+        """Resolve all dataref IDs the MFD needs in one go
+        
+        The index is taken from disk when it was saved for the same X-Plane
+        session, otherwise it is built with a single catalog request and saved.
+        
+        Args:
+            names: Dataref names to resolve
+            
+        Returns:
+            True if the index was loaded, False if X-Plane could not be reached
+        """
+        names = sorted(set(names))
+        try:
+            self.index_key = self.get_session_key()
+            if self.index_key is None:
+                return False
+            
+            cached = self._read_index_file()
+            if cached is not None:
+                self.dataref_cache.update(cached)
+            else:
+                # One catalog request for every name (filter[name] may be repeated)
+                response = self.get("/datarefs", params={"filter[name]": names})
+                if response.status_code != 200:
+                    return False
+                for entry in response.json().get("data", []):
+                    self.dataref_cache[entry["name"]] = entry["id"]
+                self._write_index_file()
+            
+            # Whatever the catalog did not return does not exist on this aircraft
+            for name in names:
+                if name not in self.dataref_cache:
+                    self.mark_missing(name)
+            return True
+        except CircuitOpenError:
+            return False
+        except Exception as e:
+            print(f"Error loading dataref index: {e}")
+            return False
+    
+    def _read_index_file(self) -> Optional[Dict[str, int]]:
+        """Read the saved index if it belongs to the current session"""
+        if self.index_path is None:
+            return None
+        try:
+            with open(self.index_path, "r") as f:
+                saved = json.load(f)
+            if saved.get("key") == self.index_key:
+                return {name: int(dataref_id) for name, dataref_id in saved["datarefs"].items()}
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return None
+    
+    def _write_index_file(self):
+        """Save the current index for the current session
+        
+        Each write goes through its own temporary file, so concurrent writers
+        never interleave and readers only ever see a complete index.
+        """
+        with self.index_lock:
+            datarefs = dict(self.dataref_cache)
+            self.index_dirty = False
+        if self.index_path is None or self.index_key is None:
+            return
+        tmp_path = None
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=self.index_path.name + ".", suffix=".tmp",
+                                            dir=self.index_path.parent)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"key": self.index_key, "datarefs": datarefs}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Error saving dataref index: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
         
     def get_dataref_id_by_name(self, name: str) -> Optional[int]:
-        """Get dataref ID by name, with caching"""
-        if name in self.dataref_cache:
-            return self.dataref_cache[name]
+        """Get dataref ID by name, with caching of both hits and misses"""
+        dataref_id = self.dataref_cache.get(name)  # Other readers may drop a stale ID meanwhile
+        if dataref_id is not None:
+            instrumentation.count("api.id_cache_hits")
+            return dataref_id
+        if self.is_known_missing(name):
+            instrumentation.count("api.missing_cache_hits")
+            return None
+        instrumentation.count("api.id_cache_misses")
         
         try:
-            response = requests.get(
-                f"{self.base_url}/datarefs",
-                headers={"Accept": "application/json"},
-                params={"filter[name]": name},
-                timeout=1
-            )
+            response = self.get("/datarefs", params={"filter[name]": name})
             if response.status_code == 200:
                 data = response.json()
                 if data.get("data") and len(data["data"]) > 0:
                     dataref_id = data["data"][0]["id"]
-                    self.dataref_cache[name] = dataref_id
+                    with self.index_lock:
+                        self.dataref_cache[name] = dataref_id
                     return dataref_id
+                self.mark_missing(name)
+        except CircuitOpenError:
+            pass
         except Exception as e:
             print(f"Error getting dataref {name}: {e}")
         return None
     
+    def mark_missing(self, name: str):
+        """Remember that a dataref name does not resolve, for negative_ttl seconds"""
+        self.missing_datarefs[name] = time.monotonic() + self.negative_ttl
+    
+    def is_known_missing(self, name: str) -> bool:
+        """Check whether a dataref name recently failed to resolve"""
+        expiry = self.missing_datarefs.get(name)
+        if expiry is None:
+            return False
+        if time.monotonic() >= expiry:
+            self.missing_datarefs.pop(name, None)  # Expired - look it up again
+            return False
+        return True
+    
+    def set_aircraft(self, identity: Optional[Any]) -> bool:
+        """Record the identity of the loaded aircraft
+        
+        A different aircraft publishes a different set of datarefs, so names
+        remembered as missing are forgotten when the aircraft changes.
+        
+        Args:
+            identity: Value identifying the aircraft (e.g. its .acf path), None if unknown
+            
+        Returns:
+            True if a different aircraft than the previously seen one is loaded
+        """
+        if identity is None or identity == self.aircraft:
+            return False
+        changed = self.aircraft is not None
+        self.aircraft = identity
+        if changed:
+            self.missing_datarefs.clear()
+        return changed
+    
     def get_dataref_value(self, name: str, index: Optional[int] = None) -> Optional[Any]:
-        """Get current value of a dataref by name"""
+        """Get current value of a dataref by name
+        
+        A 404 for a cached ID means the index is stale (X-Plane was restarted
+        or the aircraft reloaded its datarefs): the name is resolved again,
+        the read retried once and the index saved with the new ID.
+        """
+        value = self._read_dataref_value(name, index)
+        self._save_index_if_dirty()
+        return value
+    
+    def _save_index_if_dirty(self):
+        """Save the index if IDs were resolved again since it was last saved"""
+        if self.index_dirty:
+            self._write_index_file()
+    
+    def _read_dataref_value(self, name: str, index: Optional[int]) -> Optional[Any]:
+        """Read a dataref value, marking the index dirty instead of saving it
+        
+        Concurrent readers share one save: see get_many().
+        """
         dataref_id = self.get_dataref_id_by_name(name)
         if dataref_id is None:
             return None
         
         try:
             params = {"index": index} if index is not None else {}
-            response = requests.get(
-                f"{self.base_url}/datarefs/{dataref_id}/value",
-                headers={"Accept": "application/json"},
-                params=params,
-                timeout=1
-            )
+            response = self.get(f"/datarefs/{dataref_id}/value", params=params)
+            if response.status_code == 404:
+                with self.index_lock:
+                    self.dataref_cache.pop(name, None)
+                dataref_id = self.get_dataref_id_by_name(name)
+                if dataref_id is None:
+                    return None
+                with self.index_lock:
+                    self.index_dirty = True
+                response = self.get(f"/datarefs/{dataref_id}/value", params=params)
             if response.status_code == 200:
                 data = response.json()
                 value = data.get("data")
@@ -105,9 +647,1145 @@ class XPlaneAPI:
                     return value[0]
                 
                 return value
+        except CircuitOpenError:
+            pass
         except Exception as e:
             print(f"Error getting value for {name}: {e}")
         return None
+    
+    def get_many(self, datarefs: Iterable[Tuple[str, Optional[int]]]) -> Dict[Tuple[str, Optional[int]], Any]:
+        """Get the current values of several datarefs at once
+        
+        The reads are issued concurrently on the bounded worker pool, so the
+        call takes as long as the slowest single read rather than the sum.
+        
+        Args:
+            datarefs: (name, array index or None) pairs
+            
+        Returns:
+            Dict mapping each (name, index) pair to its value (None if unavailable)
+        """
+        values = {}
+        specs = []
+        for spec in dict.fromkeys(datarefs):
+            if self.is_known_missing(spec[0]):
+                instrumentation.count("api.missing_cache_hits")
+                values[spec] = None  # Not published by this aircraft - no request at all
+            else:
+                specs.append(spec)
+        if len(specs) <= 1:
+            values.update((spec, self._read_dataref_value(*spec)) for spec in specs)
+        else:
+            futures = [self.executor.submit(self._read_dataref_value, name, index) for name, index in specs]
+            values.update((spec, future.result()) for spec, future in zip(specs, futures))
+        
+        # IDs resolved again after a 404 are saved once, after every reader is done
+        self._save_index_if_dirty()
+        return values
+
+
+class XPlaneWebSocketAPI(XPlaneAPI):
+    """Push-based interface to X-Plane Web API
+    
+    Subscribes once to a set of datarefs over the Web API WebSocket and keeps
+    the latest pushed value of each in a local table. Reads of subscribed
+    datarefs are served from that table with no network I/O; anything else
+    (or anything not received yet) falls back to the REST transport.
+    """
+    
+    # Seconds between reconnection attempts after the WebSocket drops
+    RECONNECT_DELAY = 2
+    
+    def __init__(self, base_url: str = "http://localhost:8086/api/v2", **kwargs):
+        """Initialize the API client
+        
+        Args:
+            base_url: Base URL of the X-Plane Web API (the WebSocket lives at the same path)
+            **kwargs: Passed to XPlaneAPI (pool size, retries, timeout, index path)
+        """
+        super().__init__(base_url, **kwargs)
+        self.ws_url = "ws" + base_url[len("http"):] if base_url.startswith("http") else base_url
+        self.ws_app = None
+        self.ws_thread = None
+        self.ws_connected = False
+        self.next_req_id = 1
+        self.lock = threading.Lock()
+        self.subscriptions: Dict[int, Optional[int]] = {}  # dataref ID -> array index (None = whole value)
+        self.latest_values: Dict[int, Any] = {}  # dataref ID -> last pushed value
+    
+    def subscribe(self, datarefs: Iterable[Tuple[str, Optional[int]]]) -> bool:
+        """Subscribe to value updates for (name, index) pairs
+        
+        Names are resolved through the dataref index, so call
+        load_dataref_index() first to avoid one lookup per name.
+        
+        Returns:
+            True if the subscription was sent or will be sent on connect
+        """
+        if not WEBSOCKET_AVAILABLE:
+            print("websocket-client not available - using REST polling")
+            return False
+        
+        resolved = {}
+        for name, index in datarefs:
+            dataref_id = self.get_dataref_id_by_name(name)
+            if dataref_id is not None:
+                resolved[dataref_id] = index
+        with self.lock:
+            self.subscriptions.update(resolved)
+        
+        if self.ws_thread is None:
+            self.ws_app = websocket.WebSocketApp(
+                self.ws_url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=self._on_error
+            )
+            self.ws_thread = threading.Thread(
+                target=self.ws_app.run_forever,
+                kwargs={"reconnect": self.RECONNECT_DELAY},
+                daemon=True
+            )
+            self.ws_thread.start()
+        elif self.ws_connected:
+            self._send_subscriptions()
+        return True
+    
+    def _send_subscriptions(self):
+        """Send the full subscription set to X-Plane"""
+        with self.lock:
+            datarefs = [
+                {"id": dataref_id} if index is None else {"id": dataref_id, "index": index}
+                for dataref_id, index in self.subscriptions.items()
+            ]
+            req_id = self.next_req_id
+            self.next_req_id += 1
+        self.ws_app.send(json.dumps({
+            "req_id": req_id,
+            "type": "dataref_subscribe_values",
+            "params": {"datarefs": datarefs}
+        }))
+    
+    def _on_open(self, ws):
+        """(Re)connected - subscribe to everything again"""
+        self.ws_connected = True
+        self._send_subscriptions()
+    
+    def _on_message(self, ws, message: str):
+        """Store pushed values in the latest-value table"""
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        
+        if data.get("type") == "dataref_update_values":
+            with self.lock:
+                for raw_id, value in data.get("data", {}).items():
+                    dataref_id = int(raw_id)
+                    # Indexed subscriptions are pushed as [value], extract it
+                    if self.subscriptions.get(dataref_id) is not None and isinstance(value, list) and len(value) > 0:
+                        value = value[0]
+                    self.latest_values[dataref_id] = value
+        elif data.get("type") == "result" and not data.get("success", True):
+            print(f"WebSocket request {data.get('req_id')} failed: {data.get('error_message', 'unknown error')}")
+    
+    def _on_close(self, ws, status_code, message):
+        """Connection dropped - the table is stale, fall back to REST until reconnected"""
+        self.ws_connected = False
+        with self.lock:
+            self.latest_values.clear()
+    
+    def _on_error(self, ws, error):
+        """Log WebSocket errors (reconnection is handled by run_forever)"""
+        if self.ws_connected:
+            print(f"WebSocket error: {error}")
+    
+    def get_pushed_value(self, name: str, index: Optional[int] = None) -> Tuple[bool, Any]:
+        """Look a dataref up in the pushed table
+        
+        Returns:
+            (found, value) - found is False if the value must be read over REST
+        """
+        dataref_id = self.dataref_cache.get(name)
+        if dataref_id is not None:
+            with self.lock:
+                if (dataref_id in self.latest_values
+                        and dataref_id in self.subscriptions
+                        and self.subscriptions[dataref_id] == index):
+                    return True, self.latest_values[dataref_id]
+        return False, None
+    
+    def get_dataref_value(self, name: str, index: Optional[int] = None) -> Optional[Any]:
+        """Get current value of a dataref, from the pushed table when subscribed"""
+        found, value = self.get_pushed_value(name, index)
+        if found:
+            return value
+        return super().get_dataref_value(name, index)
+    
+    def get_many(self, datarefs: Iterable[Tuple[str, Optional[int]]]) -> Dict[Tuple[str, Optional[int]], Any]:
+        """Get several datarefs, only going to REST for values not in the pushed table"""
+        values = {}
+        missing = []
+        for spec in dict.fromkeys(datarefs):
+            found, value = self.get_pushed_value(*spec)
+            if found:
+                values[spec] = value
+            else:
+                missing.append(spec)
+        instrumentation.count("websocket.table_hits", len(values))
+        if missing:
+            instrumentation.count("websocket.rest_fallbacks", len(missing))
+            values.update(super().get_many(missing))
+        return values
+    
+    def close(self):
+        """Close the WebSocket and all pooled connections"""
+        if self.ws_app is not None:
+            self.ws_app.keep_running = False
+            self.ws_app.close()
+        super().close()
+
+
+class ReplayAPI:
+    """Plays a flight recording back in place of XPlaneAPI
+    
+    The MFD reads the recorded fields (see flight_recorder.py and
+    RECORDER_COLUMNS) as if they were datarefs and runs the calculators on
+    them again, so a recorded session drives it without X-Plane. Playback
+    follows the recorded timestamps at any speed, or steps one recorded row
+    per tick as fast as the MFD asks for them. The end of the recording looks
+    like a lost connection.
+    """
+    
+    def __init__(self, paths: Iterable[Path], speed: Optional[float] = 1.0):
+        """Open a recording
+        
+        Args:
+            paths: Files of one recording, in order (see flight_recorder.recording_files)
+            speed: Playback speed relative to the recording (1.0 = as recorded),
+                None to play one row per tick as fast as ticks come
+        """
+        self.readers = [flight_recorder.RecordingReader(path) for path in paths]
+        self.first_rows: List[int] = []  # Recording row of each file's first row
+        self.timestamps = array.array("d")
+        for reader in self.readers:
+            self.first_rows.append(len(self.timestamps))
+            self.timestamps.extend(reader.column("timestamp"))
+        if not self.timestamps:
+            raise ValueError("Recording holds no rows")
+        
+        # Recorded field of every dataref the MFD reads
+        self.fields = {dataref: field for field, dataref in FIELD_DATAREFS.items()}
+        self.fields.update((dataref, field) for field, dataref in FALLBACK_DATAREFS.items())
+        
+        self.speed = speed
+        self.position = 0  # Row being played, len(timestamps) once the recording has ended
+        self.clock = 0.0  # Seconds of recording played, never goes back (see now())
+        self.requests = 0
+        self.row_cache: Tuple[int, Dict[str, float]] = (-1, {})
+        self.seek(self.timestamps[0])
+    
+    def seek(self, timestamp: float):
+        """Continue playback from the first row recorded at or after timestamp (epoch seconds)"""
+        self.seek_row = bisect.bisect_left(self.timestamps, timestamp)
+        self.seek_clock = self.clock
+        self.seek_started = time.monotonic()
+        self.stepped = False  # Step mode: the seek row is played on the next tick
+        self.position = self.seek_row
+    
+    def now(self) -> float:
+        """Advance playback to the current tick and return the MFD clock
+        
+        Called once per tick. The clock advances by the recorded time played,
+        so dataref rates and the calculator rate keep their recorded meaning
+        at any speed, and it does not jump back after a seek.
+        """
+        rows = len(self.timestamps)
+        if self.position >= rows:
+            return self.clock
+        if self.speed is None:
+            if self.stepped:
+                self.position += 1
+                if self.position < rows:
+                    self.clock += max(self.timestamps[self.position] - self.timestamps[self.position - 1], 0.0)
+            self.stepped = True
+        else:
+            self.clock = self.seek_clock + (time.monotonic() - self.seek_started) * self.speed
+            played_to = self.timestamps[self.seek_row] + (self.clock - self.seek_clock)
+            if played_to > self.timestamps[-1]:
+                self.position = rows
+            else:
+                self.position = max(bisect.bisect_right(self.timestamps, played_to) - 1, self.seek_row)
+        return self.clock
+    
+    def current_row(self) -> Dict[str, float]:
+        """Recorded values of the row being played"""
+        if self.row_cache[0] != self.position:
+            file_index = bisect.bisect_right(self.first_rows, self.position) - 1
+            reader = self.readers[file_index]
+            self.row_cache = (self.position, reader.row(self.position - self.first_rows[file_index]))
+        return self.row_cache[1]
+    
+    def get_many(self, datarefs: Iterable[Tuple[str, Optional[int]]]) -> Dict[Tuple[str, Optional[int]], Any]:
+        """Recorded values of the current row (None if not recorded)"""
+        values = {}
+        row = self.current_row() if self.is_connected() else {}
+        for spec in datarefs:
+            self.requests += 1
+            value = row.get(self.fields.get(spec))
+            values[spec] = None if value is None or math.isnan(value) else value
+        return values
+    
+    def is_connected(self) -> bool:
+        """True until the end of the recording"""
+        return self.position < len(self.timestamps)
+    
+    def load_dataref_index(self, names: Iterable[str]) -> bool:
+        """Nothing to resolve - fields are looked up by dataref"""
+        return True
+    
+    def subscribe(self, datarefs: Iterable[Tuple[str, Optional[int]]]) -> bool:
+        """Nothing to subscribe to"""
+        return False
+    
+    def set_aircraft(self, identity: Optional[Any]) -> bool:
+        """The aircraft identity is not recorded"""
+        return False
+    
+    def connection_stats(self) -> Dict[str, int]:
+        """Values read, in the form of XPlaneAPI.connection_stats()"""
+        return {"requests": self.requests, "connections": 0, "reused": 0}
+    
+    def close(self):
+        """Close the recording files"""
+        for reader in self.readers:
+            reader.close()
+
+
+class DatarefScheduler:
+    """Decides which fields are read on each acquisition tick
+    
+    Every group of fields declares its own sampling rate and a tick only
+    reads the fields that are due, so slowly changing values cost fewer
+    requests while fast ones are sampled more often. Fields outside the
+    current demand (see set_demand) drop to background_rate. Values read
+    are merged into a latest-value store.
+    """
+    
+    def __init__(self, groups: Iterable[Tuple[Optional[float], Iterable[str]]],
+                 background_rate: float = BACKGROUND_RATE):
+        """Initialize the scheduler
+        
+        Args:
+            groups: (rate in Hz, field names) pairs - fields with a rate of None
+                are read until they have a value and then kept until invalidated
+            background_rate: Rate in Hz of fields outside the demand
+        """
+        self.groups = [(rate, tuple(fields)) for rate, fields in groups]
+        self.rates = {field: rate for rate, fields in self.groups for field in fields}
+        self.background_rate = background_rate
+        self.demand: Optional[frozenset] = None  # Fields read at their own rate (None = all)
+        self.next_due = dict.fromkeys(self.rates, 0.0)  # Monotonic time each field is next due
+        self.values: Dict[str, Any] = {}  # Latest value of each field
+        
+        # Tick as often as the fastest group needs
+        self.period = 1.0 / max(rate for rate, _ in self.groups if rate is not None)
+    
+    def set_demand(self, fields: Optional[Iterable[str]]):
+        """Read only these fields at their own rate, the rest at background_rate (None = all)
+        
+        Fields that join the demand are read on the next tick.
+        """
+        demand = frozenset(fields) if fields is not None else None
+        if demand == self.demand:
+            return
+        if self.demand is not None:
+            joining = (frozenset(self.rates) if demand is None else demand) - self.demand
+            for field in joining & self.next_due.keys():
+                self.next_due[field] = 0.0
+        self.demand = demand
+    
+    def due_fields(self, now: float) -> List[str]:
+        """Fields to read on a tick at time now (monotonic seconds)"""
+        fields = []
+        for field, rate in self.rates.items():
+            if rate is None:
+                if self.values.get(field) is None:
+                    fields.append(field)
+            elif now + self.period / 2 >= self.next_due[field]:  # Ticks are never exactly on time
+                fields.append(field)
+                if self.demand is not None and field not in self.demand:
+                    rate = min(rate, self.background_rate)
+                # Keep the cadence, but don't try to catch up after a stall
+                self.next_due[field] = max(self.next_due[field] + 1.0 / rate, now)
+        return fields
+    
+    def update(self, values: Mapping[str, Any]):
+        """Merge freshly read values into the store"""
+        self.values.update(values)
+    
+    def invalidate(self, fields: Iterable[str]):
+        """Forget fields so they are read again (e.g. limits after an aircraft change)"""
+        for field in fields:
+            self.values.pop(field, None)
+    
+    def reset(self):
+        """Make every field due on the next tick (e.g. after reconnecting)"""
+        self.next_due = dict.fromkeys(self.rates, 0.0)
+
+
+class TickSnapshot(NamedTuple):
+    """Immutable result of one acquisition tick"""
+    timestamp: float  # Wall-clock time the snapshot was taken (seconds since epoch)
+    connected: bool  # Whether X-Plane answered during this tick
+    status: Optional[str]  # New connection status text, None if unchanged
+    data: Mapping[str, Any]  # Read-only raw values and calculator results (see read_flight_data)
+
+
+class AcquisitionWorker(threading.Thread):
+    """Background thread that produces a TickSnapshot every period
+    
+    The UI thread picks up `latest` whenever it renders; slow responses from
+    X-Plane only delay the next snapshot, never the display.
+    """
+    
+    def __init__(self, acquire, period: float = 0.1):
+        """Initialize the worker
+        
+        Args:
+            acquire: Callable returning a TickSnapshot
+            period: Target seconds between acquisitions
+        """
+        super().__init__(name="mfd-acquisition", daemon=True)
+        self.acquire = acquire
+        self.period = period
+        self.latest: Optional[TickSnapshot] = None  # Replaced atomically, never mutated
+        self.stop_event = threading.Event()
+    
+    def run(self):
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            try:
+                with instrumentation.span("acquire.tick"):
+                    self.latest = self.acquire()
+            except Exception as e:
+                print(f"Acquisition error: {e}")
+            elapsed = time.monotonic() - started
+            self.stop_event.wait(max(self.period - elapsed, 0.0))
+    
+    def stop(self, timeout: float = 2.0):
+        """Stop the worker and wait for the current acquisition to finish"""
+        self.stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class FrameClock:
+    """Absolute frame deadlines for the UI loop (update_display)
+    
+    Frame n is due at the first frame's start + n periods whatever the
+    frames before it took: the delay to the next frame is measured from
+    the end of the work to its deadline, so work time never adds to the
+    period and the rate does not drift. A frame whose work runs past one or
+    more deadlines skips those frames instead of running them back to back.
+    """
+    
+    def __init__(self, rate: float = FRAME_RATE, window: int = 100):
+        """Initialize the clock
+        
+        Args:
+            rate: Target frames per second
+            window: Recent frames the achieved rate is measured over
+        """
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.deadline: Optional[float] = None  # When the current frame was due
+        self.frames = 0
+        self.skipped = 0
+        self.starts = collections.deque(maxlen=window)  # Start times of the recent frames
+    
+    def start_frame(self, now: float) -> float:
+        """Note a frame starting at now
+        
+        Returns:
+            Seconds the frame started after its deadline (its jitter)
+        """
+        if self.deadline is None:
+            self.deadline = now
+        self.frames += 1
+        self.starts.append(now)
+        return max(now - self.deadline, 0.0)
+    
+    def next_delay(self, now: float) -> Tuple[float, int]:
+        """Advance to the next deadline after the frame's work ended at now
+        
+        Returns:
+            (seconds until the next frame is due, frames skipped to reach it)
+        """
+        self.deadline += self.period
+        missed = 0
+        if self.deadline <= now:
+            missed = math.floor((now - self.deadline) / self.period) + 1
+            self.deadline += missed * self.period
+            self.skipped += missed
+        return self.deadline - now, missed
+    
+    def achieved_rate(self) -> Optional[float]:
+        """Frames per second over the recent frames (None before two frames)"""
+        if len(self.starts) < 2 or self.starts[-1] == self.starts[0]:
+            return None
+        return (len(self.starts) - 1) / (self.starts[-1] - self.starts[0])
+
+
+class CalculatorProcess:
+    """Long-lived C++ calculator answering requests over a pipe
+    
+    Starts the calculator once in --serve mode and writes one request line
+    per calculation instead of spawning a new process every tick. A
+    calculator that crashed or stopped answering is restarted on the next
+    request.
+    """
+    
+    def __init__(self, path: Path, timeout: float = 0.1, record_layout: Optional["BinaryRecordLayout"] = None,
+                 options: Iterable[str] = ()):
+        """Initialize the calculator process manager
+        
+        Args:
+            path: Calculator executable
+            timeout: Seconds to wait for a response before giving up on the process
+            record_layout: Read binary records of this layout (--binary)
+                instead of JSON lines
+            options: Command line options placed before --serve
+        """
+        self.path = path
+        self.options = list(options)
+        self.timeout = timeout
+        self.record_layout = record_layout
+        self.process: Optional[subprocess.Popen] = None
+        self.lock = threading.Lock()
+        self.restarts = 0
+        self.last_error: Optional[str] = None  # Why the last request got no response
+    
+    def start(self) -> bool:
+        """Start the calculator unless it is already running
+        
+        Returns:
+            True if the calculator is running
+        """
+        if self.process is not None and self.process.poll() is None:
+            return True
+        if not self.path.exists():
+            return False
+        if self.process is not None:
+            self.restarts += 1
+        binary = self.record_layout is not None
+        self.process = subprocess.Popen(
+            [str(self.path)] + self.options + ["--serve"] + (["--binary"] if binary else []),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,  # Errors are reported in the response
+            text=not binary,
+            bufsize=-1 if binary else 1
+        )
+        return True
+    
+    def request(self, *args) -> Tuple[Optional[int], Optional[dict]]:
+        """Run one calculation
+        
+        Args:
+            *args: Command line arguments of the calculator
+            
+        Returns:
+            (exit code, result) - the code the one-shot calculator would have
+            exited with (0 with the parsed JSON result on success), or
+            (None, None) if the calculator is not built or did not answer
+        """
+        with self.lock:
+            self.last_error = None
+            try:
+                if not self.start():
+                    return None, None
+                line = " ".join(str(arg) for arg in args) + "\n"
+                self.process.stdin.write(line.encode() if self.record_layout is not None else line)
+                self.process.stdin.flush()
+                ready, _, _ = select.select([self.process.stdout], [], [], self.timeout)
+                if not ready:
+                    raise TimeoutError(f"no response within {self.timeout * 1000:.0f}ms")
+                if self.record_layout is not None:
+                    return self.read_record()
+                line = self.process.stdout.readline()
+                if not line:
+                    raise EOFError(f"exited with code {self.process.poll()}")
+                response = json.loads(line)
+            except (OSError, ValueError, EOFError) as e:
+                self.last_error = f"{self.path.name} {e}"
+                self.stop()  # Restarted on the next request
+                return None, None
+        
+        if isinstance(response, dict) and set(response) == {"error"}:
+            return response["error"], None
+        return 0, response
+    
+    def read_record(self) -> Tuple[int, Optional[dict]]:
+        """Read one binary response (see request())
+        
+        Raises:
+            ValueError: The record is not of the expected version or calculator
+            EOFError: The calculator exited before writing a whole record
+        """
+        version, calculator_id, status = BINARY_HEADER.unpack(self.read_exactly(BINARY_HEADER.size))
+        if version != BINARY_FORMAT_VERSION or calculator_id != self.record_layout.calculator_id:
+            raise ValueError(f"sent record version {version} for calculator {calculator_id}")
+        if status != 0:
+            return status, None
+        return 0, self.record_layout.decode(self.read_exactly(self.record_layout.payload.size))
+    
+    def read_exactly(self, size: int) -> bytes:
+        """Read size bytes of calculator output"""
+        data = self.process.stdout.read(size)
+        if len(data) < size:
+            raise EOFError(f"exited with code {self.process.poll()}")
+        return data
+    
+    def stop(self):
+        """Stop the calculator process"""
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.wait()
+            for stream in (self.process.stdin, self.process.stdout):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+    
+    def close(self):
+        """Ask the calculator to exit (end of input), killing it if it does not"""
+        with self.lock:
+            if self.process is not None and self.process.poll() is None:
+                try:
+                    self.process.stdin.close()
+                    self.process.wait(timeout=self.timeout)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+            self.stop()
+            self.process = None
+
+
+def split_compute_all(returncode: Optional[int], result: Optional[dict]) -> Dict[str, Tuple[Optional[int], Optional[dict]]]:
+    """Split a compute_all_calculator response into per-calculator results
+    
+    Args:
+        returncode: Exit code of the combined request
+        result: Parsed JSON response (parts that failed are {"error": <code>})
+        
+    Returns:
+        (exit code, result) of each COMPUTE_ALL_PARTS calculator, as its
+        own request would have returned it
+    """
+    if returncode != 0:
+        return {name: (returncode, None) for name in COMPUTE_ALL_PARTS}
+    parts = {}
+    for name in COMPUTE_ALL_PARTS:
+        part = result.get(name)
+        if isinstance(part, dict) and set(part) == {"error"}:
+            parts[name] = (part["error"], None)
+        else:
+            parts[name] = (0, part)
+    return parts
+
+
+class ProcessCalculators:
+    """C++ calculators kept running as --serve processes
+    
+    The processes only see the IAS of the requests they answer, so they run
+    with a one-sample window (no gust) and the gust factor of flight results
+    comes from the IasHistory passed in, as with the other backends.
+    """
+    
+    NAMES = ("flight", "turn", "vnav", "density_altitude", "compute_all")
+    
+    # Calculators with a gust factor (taking --ias-window)
+    IAS_HISTORY_NAMES = ("flight", "compute_all")
+    
+    def __init__(self, directory: Path = CALCULATOR_DIR, binary: bool = True):
+        """Initialize the calculators (processes start on first use)
+        
+        Args:
+            directory: Directory holding the built calculators
+            binary: Read full-precision binary records instead of JSON
+        """
+        self.processes = {
+            name: CalculatorProcess(
+                directory / f"{name}_calculator",
+                record_layout=BINARY_RECORDS[name] if binary else None,
+                options=["--ias-window", "1"] if name in self.IAS_HISTORY_NAMES else ()
+            )
+            for name in self.NAMES
+        }
+        self.last_error: Optional[str] = None  # Why the last calculation got no result
+    
+    def calculate(self, name: str, *args, ias_history: Optional["IasHistory"] = None
+                  ) -> Tuple[Optional[int], Optional[dict]]:
+        """Run one calculation
+        
+        Args:
+            name: Calculator name ("flight", "turn", "vnav", "density_altitude"
+                or "compute_all")
+            *args: Command line arguments of the calculator
+            ias_history: IAS samples behind the gust factor of a flight result
+                (0 if None)
+            
+        Returns:
+            (exit code, result) as returned by CalculatorProcess.request()
+        """
+        process = self.processes[name]
+        returncode, result = process.request(*args)
+        self.last_error = process.last_error
+        if name == "flight" and result is not None:
+            result["wind"]["gust_factor"] = ias_history.gust_factor() if ias_history is not None else 0.0
+        return returncode, result
+    
+    def calculate_all(self, *args, ias_history: Optional["IasHistory"] = None
+                      ) -> Dict[str, Tuple[Optional[int], Optional[dict]]]:
+        """Run every MFD calculation in one compute_all_calculator request
+        
+        Args:
+            *args: Command line arguments of compute_all_calculator
+            ias_history: IAS samples behind the gust factor (0 if None)
+            
+        Returns:
+            (exit code, result) of each COMPUTE_ALL_PARTS calculator
+        """
+        parts = split_compute_all(*self.calculate("compute_all", *args))
+        flight = parts["flight"][1]
+        if flight is not None:
+            flight["wind"]["gust_factor"] = ias_history.gust_factor() if ias_history is not None else 0.0
+        return parts
+    
+    def close(self):
+        """Stop all calculator processes"""
+        for process in self.processes.values():
+            process.close()
+
+
+# C structs of the libmfd_calc interface (calculators/mfd_calc.h)
+class MfdIasHistory(ctypes.Structure):
+    _fields_ = [("samples", ctypes.c_double * MAX_IAS_WINDOW), ("mean", ctypes.c_double), ("m2", ctypes.c_double),
+                ("window", ctypes.c_int32), ("count", ctypes.c_int32), ("next", ctypes.c_int32)]
+
+
+class MfdWindVector(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_double) for name in (
+        "speed_kts", "direction_from", "headwind", "crosswind", "gust_factor")]
+
+
+class MfdEnvelope(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_double) for name in (
+        "stall_margin_pct", "vmo_margin_pct", "mmo_margin_pct", "min_margin_pct",
+        "load_factor", "corner_speed_kts")]
+
+
+class MfdEnergy(ctypes.Structure):
+    _fields_ = [("specific_energy_ft", ctypes.c_double), ("energy_rate_kts", ctypes.c_double),
+                ("trend", ctypes.c_int32)]
+
+
+class MfdGlide(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_double) for name in (
+        "still_air_range_nm", "wind_adjusted_range_nm", "glide_ratio", "best_glide_speed_kts")]
+
+
+class MfdTurn(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_double) for name in (
+        "radius_nm", "radius_ft", "turn_rate_dps", "lead_distance_nm", "lead_distance_ft",
+        "time_to_turn_sec", "load_factor", "standard_rate_bank")]
+
+
+class MfdVnav(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_double) for name in (
+        "altitude_to_lose_ft", "flight_path_angle_deg", "required_vs_fpm", "tod_distance_nm",
+        "time_to_constraint_min", "distance_per_1000ft", "vs_for_3deg")] + [("is_descent", ctypes.c_int32)]
+
+
+class MfdDensityAltitude(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_double) for name in (
+        "density_altitude_ft", "pressure_altitude_ft", "air_density_ratio", "temperature_deviation_c",
+        "performance_loss_pct", "eas_kts", "tas_to_ias_ratio", "pressure_ratio")]
+
+
+class MfdWindComponents(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_double) for name in ("headwind", "crosswind", "total_wind", "wca", "drift")]
+
+
+class MfdAllInputs(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_double) for name in (
+        "tas_kts", "gs_kts", "heading_deg", "track_deg", "ias_kts", "mach", "altitude_ft", "agl_ft",
+        "vs_fpm", "weight_kg", "bank_deg", "vso_kts", "vne_kts", "mmo", "oat_celsius",
+        "course_change_deg", "target_alt_ft", "distance_nm")] + [("force_error", ctypes.c_int32)]
+
+
+class MfdAllResults(ctypes.Structure):
+    _fields_ = [
+        ("wind", MfdWindVector),
+        ("envelope", MfdEnvelope),
+        ("energy", MfdEnergy),
+        ("glide", MfdGlide),
+        ("turn", MfdTurn),
+        ("vnav", MfdVnav),
+        ("density_altitude", MfdDensityAltitude),
+    ] + [(f"{name}_status", ctypes.c_int32) for name in COMPUTE_ALL_PARTS]
+
+
+def struct_to_dict(struct: ctypes.Structure) -> Dict[str, Any]:
+    """Convert a libmfd_calc result struct to the dict its calculator prints as JSON"""
+    return {name: getattr(struct, name) for name, _ in struct._fields_}
+
+
+# libmfd_calc loaded by IasHistory, by path (None if it could not be loaded)
+IAS_HISTORY_LIBRARIES: Dict[Path, Optional[ctypes.CDLL]] = {}
+
+
+def load_ias_history_library(path: Path = CALCULATOR_LIBRARY) -> Optional[ctypes.CDLL]:
+    """libmfd_calc for IasHistory, loaded once per path (None if it is not built)"""
+    if path not in IAS_HISTORY_LIBRARIES:
+        try:
+            lib = ctypes.CDLL(str(path))
+        except OSError:
+            lib = None
+        else:
+            history = ctypes.POINTER(MfdIasHistory)
+            lib.mfd_ias_history_init.argtypes = [history, ctypes.c_int32]
+            lib.mfd_ias_history_add.argtypes = [history, ctypes.c_double]
+            for function in (lib.mfd_ias_history_init, lib.mfd_ias_history_add):
+                function.restype = ctypes.c_int32
+        IAS_HISTORY_LIBRARIES[path] = lib
+    return IAS_HISTORY_LIBRARIES[path]
+
+
+class IasHistory:
+    """Sliding window of IAS samples behind the gust factor
+    
+    The MFD adds every IAS reading (see read_flight_data) and hands the
+    history to the calculator backends, so the gust factor covers the same
+    time span whichever panel is shown and however often the calculators
+    run. The samples live in an MfdIasHistory struct that CalculatorLibrary
+    passes to libmfd_calc as it is, and that only mfd_ias_history_init()
+    and mfd_ias_history_add() change. Without libmfd_calc (e.g. with the
+    NumPy engine and nothing built), add() falls back to the same sliding
+    Welford update in Python.
+    """
+    
+    def __init__(self, window: int = IAS_WINDOW, library_path: Optional[Path] = CALCULATOR_LIBRARY):
+        """Initialize an empty history
+        
+        Args:
+            window: Samples kept (1 to MAX_IAS_WINDOW)
+            library_path: libmfd_calc to update the history with (None = Python fallback)
+            
+        Raises:
+            ValueError: window is out of range
+        """
+        if not 1 <= window <= MAX_IAS_WINDOW:
+            raise ValueError(f"IAS window must be 1 to {MAX_IAS_WINDOW} samples, not {window}")
+        self.state = MfdIasHistory()
+        self.lib = load_ias_history_library(library_path) if library_path is not None else None
+        if self.lib is not None:
+            self.lib.mfd_ias_history_init(ctypes.byref(self.state), window)
+        else:
+            self.state.window = window
+    
+    def add(self, ias: float):
+        """Add a sample, replacing the oldest once the window is full"""
+        if self.lib is not None:
+            self.lib.mfd_ias_history_add(ctypes.byref(self.state), ias)
+            return
+        # add_ias_sample() in calculators/flight_calculator.cpp
+        state = self.state
+        ias = float(ias)
+        if state.count < state.window:
+            state.count += 1
+            delta = ias - state.mean
+            state.mean += delta / state.count
+            state.m2 += delta * (ias - state.mean)
+        else:
+            oldest = state.samples[state.next]
+            previous_mean = state.mean
+            state.mean += (ias - oldest) / state.count
+            state.m2 += (ias - oldest) * (ias - state.mean + oldest - previous_mean)
+        # Rounding can leave a tiny negative sum for a steady IAS
+        state.m2 = max(state.m2, 0.0)
+        state.samples[state.next] = ias
+        state.next = (state.next + 1) % state.window
+    
+    def gust_factor(self) -> float:
+        """Standard deviation over mean of the samples (0 if empty or parked)"""
+        state = self.state
+        if state.count == 0 or state.mean <= 0.0:
+            return 0.0
+        return math.sqrt(state.m2 / state.count) / state.mean
+
+
+class BinaryRecordLayout:
+    """Payload of a calculator's binary records (calculators/calc_binary.h)
+    
+    The payload holds the fields of mfd_calc.h result structs in order,
+    little-endian and without padding, so the layout is derived from the
+    ctypes structs above.
+    """
+    
+    TYPE_CODES = {ctypes.c_double: "d", ctypes.c_int32: "i"}
+    
+    # Int32 fields the calculators print as JSON booleans
+    BOOL_FIELDS = ("is_descent",)
+    
+    def __init__(self, calculator_id: int, sections: Iterable[Tuple[Tuple[str, ...], list]]):
+        """Initialize the layout
+        
+        Args:
+            calculator_id: Id in the record header
+            sections: (key path in the decoded result, ctypes _fields_) in
+                payload order
+        """
+        sections = list(sections)
+        self.calculator_id = calculator_id
+        self.sections = [(path, [name for name, _ in fields]) for path, fields in sections]
+        self.payload = struct.Struct("<" + "".join(
+            self.TYPE_CODES[field_type]
+            for _, fields in sections
+            for _, field_type in fields
+        ))
+    
+    def decode(self, payload: bytes) -> dict:
+        """Decode a payload into the dict the calculator prints as JSON"""
+        values = iter(self.payload.unpack(payload))
+        result: Dict[str, Any] = {}
+        for path, names in self.sections:
+            target = result
+            for key in path:
+                target = target.setdefault(key, {})
+            for name in names:
+                value = next(values)
+                target[name] = bool(value) if name in self.BOOL_FIELDS else value
+        
+        # compute_all: parts that failed are reported as in the JSON output
+        for name in COMPUTE_ALL_PARTS:
+            status = result.pop(f"{name}_status", 0)
+            if status != 0:
+                result[name] = {"error": status}
+        return result
+
+
+def flight_sections(*path: str) -> List[Tuple[Tuple[str, ...], list]]:
+    """Record sections of the flight_calculator results, under path"""
+    return [
+        (path + ("wind",), MfdWindVector._fields_),
+        (path + ("envelope",), MfdEnvelope._fields_),
+        (path + ("energy",), MfdEnergy._fields_),
+        (path + ("glide",), MfdGlide._fields_),
+    ]
+
+
+# Binary record layout of each calculator (calculator ids from calc_binary.h)
+BINARY_RECORDS = {
+    "wind": BinaryRecordLayout(1, [((), MfdWindComponents._fields_)]),
+    "flight": BinaryRecordLayout(2, flight_sections()),
+    "turn": BinaryRecordLayout(3, [((), MfdTurn._fields_)]),
+    "vnav": BinaryRecordLayout(4, [((), MfdVnav._fields_)]),
+    "density_altitude": BinaryRecordLayout(5, [((), MfdDensityAltitude._fields_)]),
+    "compute_all": BinaryRecordLayout(6, flight_sections("flight") + [
+        (("turn",), MfdTurn._fields_),
+        (("vnav",), MfdVnav._fields_),
+        (("density_altitude",), MfdDensityAltitude._fields_),
+        ((), [(f"{name}_status", ctypes.c_int32) for name in COMPUTE_ALL_PARTS]),
+    ]),
+}
+
+# Calculator behind each result in the tick data (see run_calculators)
+RESULT_CALCULATORS = {"flight": "flight", "turn": "turn", "vnav": "vnav", "density": "density_altitude"}
+
+# Fields each result is calculated from (see run_calculators)
+CALCULATOR_INPUTS = {
+    "flight": ("tas", "gs", "heading", "track", "ias", "mach", "alt", "agl", "vs",
+               "weight", "roll", "vso", "vne", "mmo"),
+    "turn": ("tas", "roll"),
+    "vnav": ("alt", "gs", "vs"),
+    "density": ("oat", "alt", "ias", "tas"),
+}
+
+# Flight recorder columns: every numeric field, then every calculator result value
+RECORDER_COLUMNS = tuple(field for field in FIELD_DATAREFS if field != "aircraft") + ("rpm", "prop_rpm") + tuple(
+    ".".join((key,) + path + (name,))
+    for key, calculator in RESULT_CALCULATORS.items()
+    for path, names in BINARY_RECORDS[calculator].sections
+    for name in names
+)
+
+
+def ias_history_pointer(ias_history: Optional[IasHistory]):
+    """MfdIasHistory* argument of libmfd_calc for an IAS history (NULL if None: no gust)"""
+    return ctypes.byref(ias_history.state) if ias_history is not None else None
+
+
+class CalculatorLibrary:
+    """C++ calculators called in-process through libmfd_calc (ctypes)
+    
+    Drop-in replacement for ProcessCalculators: the same arguments give the
+    same exit codes and result dicts, but with no process or JSON round trip
+    and at full double precision instead of 2 decimals.
+    """
+    
+    def __init__(self, path: Path = CALCULATOR_LIBRARY):
+        """Load the library
+        
+        Args:
+            path: Built libmfd_calc shared library
+            
+        Raises:
+            OSError: The library is missing or cannot be loaded
+        """
+        self.lib = ctypes.CDLL(str(path))
+        self.last_error: Optional[str] = None  # Never set, the library cannot fail to answer
+        
+        double = ctypes.c_double
+        history = ctypes.POINTER(MfdIasHistory)
+        signatures = {
+            "mfd_calc_wind_vector": [double] * 4 + [history, ctypes.POINTER(MfdWindVector)],
+            "mfd_calc_envelope": [double] * 6 + [ctypes.POINTER(MfdEnvelope)],
+            "mfd_calc_energy": [double] * 3 + [ctypes.POINTER(MfdEnergy)],
+            "mfd_calc_glide_reach": [double] * 3 + [ctypes.POINTER(MfdGlide)],
+            "mfd_calc_turn_performance": [double] * 3 + [ctypes.POINTER(MfdTurn)],
+            "mfd_calc_vnav": [double] * 5 + [ctypes.POINTER(MfdVnav)],
+            "mfd_calc_density_altitude": [double] * 4 + [ctypes.c_int32, ctypes.POINTER(MfdDensityAltitude)],
+            "mfd_calc_all": [ctypes.POINTER(MfdAllInputs), history, ctypes.POINTER(MfdAllResults)],
+        }
+        for function_name, argtypes in signatures.items():
+            function = getattr(self.lib, function_name)
+            function.argtypes = argtypes
+            function.restype = ctypes.c_int32
+    
+    def calculate(self, name: str, *args, ias_history: Optional[IasHistory] = None
+                  ) -> Tuple[Optional[int], Optional[dict]]:
+        """Run one calculation (see ProcessCalculators.calculate)"""
+        if name == "flight":
+            return self.flight(*(float(arg) for arg in args), ias_history=ias_history)
+        handlers = {
+            "turn": self.turn,
+            "vnav": self.vnav,
+            "density_altitude": self.density_altitude,
+        }
+        return handlers[name](*(float(arg) for arg in args))
+    
+    def flight(self, tas, gs, heading, track, ias, mach, altitude, agl, vs,
+               weight, bank, vso, vne, mmo, ias_history: Optional[IasHistory] = None) -> Tuple[int, Optional[dict]]:
+        """Wind, envelope, energy and glide results (flight_calculator)
+        
+        The gust factor comes from ias_history (0 if None).
+        """
+        wind, envelope, energy, glide = MfdWindVector(), MfdEnvelope(), MfdEnergy(), MfdGlide()
+        returncode = self.lib.mfd_calc_wind_vector(
+            tas, gs, heading, track, ias_history_pointer(ias_history), ctypes.byref(wind))
+        if returncode == 0:
+            returncode = self.lib.mfd_calc_envelope(bank, ias, mach, vso, vne, mmo, ctypes.byref(envelope))
+        if returncode == 0:
+            returncode = self.lib.mfd_calc_energy(tas, altitude, vs, ctypes.byref(energy))
+        if returncode == 0:
+            returncode = self.lib.mfd_calc_glide_reach(agl, tas, wind.headwind, ctypes.byref(glide))
+        if returncode != 0:
+            return returncode, None
+        return 0, {
+            "wind": struct_to_dict(wind),
+            "envelope": struct_to_dict(envelope),
+            "energy": struct_to_dict(energy),
+            "glide": struct_to_dict(glide),
+        }
+    
+    def turn(self, tas_kts, bank_deg, course_change_deg) -> Tuple[int, Optional[dict]]:
+        """Turn performance (turn_calculator)"""
+        result = MfdTurn()
+        returncode = self.lib.mfd_calc_turn_performance(tas_kts, bank_deg, course_change_deg, ctypes.byref(result))
+        return returncode, struct_to_dict(result) if returncode == 0 else None
+    
+    def vnav(self, current_alt_ft, target_alt_ft, distance_nm, gs_kts, vs_fpm) -> Tuple[int, Optional[dict]]:
+        """VNAV helpers (vnav_calculator)"""
+        result = MfdVnav()
+        returncode = self.lib.mfd_calc_vnav(current_alt_ft, target_alt_ft, distance_nm, gs_kts, vs_fpm, ctypes.byref(result))
+        if returncode != 0:
+            return returncode, None
+        vnav = struct_to_dict(result)
+        vnav["is_descent"] = bool(vnav["is_descent"])
+        return 0, vnav
+    
+    def density_altitude(self, pressure_alt_ft, oat_celsius, ias_kts, tas_kts,
+                         force_error=0.0) -> Tuple[int, Optional[dict]]:
+        """Density altitude and performance (density_altitude_calculator)"""
+        result = MfdDensityAltitude()
+        returncode = self.lib.mfd_calc_density_altitude(
+            pressure_alt_ft, oat_celsius, ias_kts, tas_kts, int(force_error), ctypes.byref(result))
+        return returncode, struct_to_dict(result) if returncode == 0 else None
+    
+    def calculate_all(self, *args, ias_history: Optional[IasHistory] = None
+                      ) -> Dict[str, Tuple[Optional[int], Optional[dict]]]:
+        """Run every MFD calculation in one call (see ProcessCalculators.calculate_all)
+        
+        The gust factor comes from ias_history (0 if None), as in flight().
+        """
+        *values, force_error = args
+        inputs = MfdAllInputs(*(float(value) for value in values), int(force_error))
+        
+        results = MfdAllResults()
+        returncode = self.lib.mfd_calc_all(ctypes.byref(inputs), ias_history_pointer(ias_history),
+                                           ctypes.byref(results))
+        if returncode != 0:
+            return split_compute_all(returncode, None)
+        
+        vnav = struct_to_dict(results.vnav)
+        vnav["is_descent"] = bool(vnav["is_descent"])
+        parts = {
+            "flight": {
+                "wind": struct_to_dict(results.wind),
+                "envelope": struct_to_dict(results.envelope),
+                "energy": struct_to_dict(results.energy),
+                "glide": struct_to_dict(results.glide),
+            },
+            "turn": struct_to_dict(results.turn),
+            "vnav": vnav,
+            "density_altitude": struct_to_dict(results.density_altitude),
+        }
+        statuses = {name: getattr(results, f"{name}_status") for name in COMPUTE_ALL_PARTS}
+        return {
+            name: (status, parts[name] if status == 0 else None)
+            for name, status in statuses.items()
+        }
+    
+    def close(self):
+        """Nothing to release - the library stays loaded for the life of the process"""
+
+
+def make_calculators(mode: str = "auto"):
+    """Create the calculator backend
+    
+    Args:
+        mode: "library" (in-process libmfd_calc), "process" (warm calculator
+            processes), "numpy" (calc_engine, nothing to build) or "auto"
+            (the library if it is built, else the calculator processes if
+            they are built, else the NumPy engine)
+            
+    Returns:
+        CalculatorLibrary, ProcessCalculators or calc_engine.EngineCalculators
+    """
+    if mode in ("auto", "library"):
+        try:
+            return CalculatorLibrary()
+        except OSError as e:
+            if mode == "library":
+                print(f"Calculator library not available ({e}) - using calculator processes")
+    if mode == "numpy" or (mode == "auto" and not (CALCULATOR_DIR / "compute_all_calculator").exists()):
+        if CALC_ENGINE_AVAILABLE:
+            return calc_engine.EngineCalculators()
+        print("numpy not available - using calculator processes")
+    return ProcessCalculators()
 
 
 class USBDeviceManager:
@@ -210,8 +1888,8 @@ class USBDeviceManager:
                 
                 # Detect button press (transition from not pressed to pressed)
                 if button_pressed and not self.last_button_states[btn_idx]:
-                    # Map button index to panel number (0-9)
-                    if btn_idx <= 9:
+                    # Map button index to panel number (0-9, or the diagnostics panel)
+                    if btn_idx <= 9 or btn_idx == DIAGNOSTICS_MODE:
                         print(f"✓ F16 MFD button {btn_idx} pressed → switching to panel {btn_idx}")
                         self.button_callback(btn_idx)
                     else:
@@ -246,6 +1924,312 @@ class USBDeviceManager:
             pass
 
 
+def format_lat_lon(degrees: Optional[float], is_latitude: bool) -> str:
+    """Format latitude/longitude for display"""
+    if degrees is None:
+        return "---"
+    
+    direction = ""
+    if is_latitude:
+        direction = "N" if degrees >= 0 else "S"
+    else:
+        direction = "E" if degrees >= 0 else "W"
+    
+    degrees = abs(degrees)
+    deg = int(degrees)
+    minutes = (degrees - deg) * 60
+    
+    return f"{deg:03d}°{minutes:06.3f}'{direction}"
+
+
+def scaled(template: str, scale: float = 1.0) -> Callable[[Optional[float]], Optional[str]]:
+    """Formatter showing one number (times scale) with template, keeping the text while missing"""
+    def format_value(value: Optional[float]) -> Optional[str]:
+        return None if value is None else template.format(value * scale)
+    return format_value
+
+
+def format_position(is_latitude: bool) -> Callable[[Optional[float]], Optional[str]]:
+    """Formatter of a latitude or longitude"""
+    def format_value(degrees: Optional[float]) -> Optional[str]:
+        return None if degrees is None else format_lat_lon(degrees, is_latitude)
+    return format_value
+
+
+def format_engine(percent: Optional[float], rpm: Optional[float]) -> str:
+    """N1/N2 for jets, RPM for props"""
+    if percent is not None and percent > 0:
+        return f"{percent:.1f}%"
+    if rpm is not None and rpm > 0:
+        return f"{rpm:.0f} RPM"
+    return "---"
+
+
+def format_headwind(headwind: Optional[float]) -> Optional[str]:
+    """Headwind, or tailwind when negative"""
+    if headwind is None:
+        return None
+    if headwind >= 0:
+        return f"{headwind:.1f} KT"
+    return f"{abs(headwind):.1f} TAIL"
+
+
+def format_crosswind(crosswind: Optional[float]) -> Optional[str]:
+    """Crosswind from the right (positive) or left"""
+    if crosswind is None:
+        return None
+    if abs(crosswind) < 0.5:
+        return "CALM"
+    if crosswind > 0:
+        return f"{crosswind:.1f} R"
+    return f"{abs(crosswind):.1f} L"
+
+
+def format_stall_margin(margin: Optional[float]) -> Optional[str]:
+    """Stall margin, flagged below 20% and 10%"""
+    if margin is None:
+        return None
+    # Color code stall margin
+    if margin < 10:
+        return f"{margin:.0f}% CRIT"
+    if margin < 20:
+        return f"{margin:.0f}% WARN"
+    return f"{margin:.0f}%"
+
+
+def format_energy(specific_energy: Optional[float], trend: Optional[float]) -> Optional[str]:
+    """Specific energy with its trend"""
+    if specific_energy is None or trend is None:
+        return None
+    trend_arrow = "↑" if trend > 0 else "↓" if trend < 0 else "→"
+    return f"{specific_energy:.0f} {trend_arrow}"
+
+
+def format_turn_radius(radius_nm: Optional[float]) -> Optional[str]:
+    """Turn radius, with more precision in tight turns"""
+    if radius_nm is None:
+        return None
+    if radius_nm < 10:
+        return f"{radius_nm:.2f} NM"
+    return f"{radius_nm:.1f} NM"
+
+
+def format_isa_deviation(deviation: Optional[float]) -> Optional[str]:
+    """ISA deviation, flagged from 5°C"""
+    if deviation is None:
+        return None
+    # Color code ISA deviation
+    if abs(deviation) < 5:
+        return f"{deviation:+.0f}°C"
+    return f"{deviation:+.0f}°C !"
+
+
+class DisplayField(NamedTuple):
+    """One value shown on the MFD"""
+    panel: Optional[int]  # Display mode of the panel showing it (None = display variable only)
+    label: str  # Row label on the panel
+    name: str  # Display variable (AircraftMFD.<name>_var)
+    inputs: Tuple[Tuple[str, ...], ...]  # Paths of its inputs into the tick data (see read_flight_data)
+    format: Callable[..., Optional[str]]  # Input values -> text, None to keep the current text
+
+
+# Every displayed value, panel by panel in row order
+DISPLAY_FIELDS = (
+    DisplayField(1, "LATITUDE:", "lat", (("lat",),), format_position(True)),
+    DisplayField(1, "LONGITUDE:", "lon", (("lon",),), format_position(False)),
+    DisplayField(1, "ALTITUDE:", "alt", (("alt",),), scaled("{:.0f} FT", 3.28084)),
+    DisplayField(1, "AGL:", "agl", (("agl",),), scaled("{:.0f} FT", 3.28084)),
+    DisplayField(2, "HEADWIND:", "headwind", (("flight", "wind", "headwind"),), format_headwind),
+    DisplayField(2, "CROSSWIND:", "crosswind", (("flight", "wind", "crosswind"),), format_crosswind),
+    DisplayField(2, "WIND SPD:", "wind_spd", (("flight", "wind", "speed_kts"),), scaled("{:.1f} KT")),
+    DisplayField(2, "WIND DIR:", "wind_dir", (("flight", "wind", "direction_from"),), scaled("{:03.0f}°")),
+    DisplayField(3, "STALL MRG:", "stall_margin", (("flight", "envelope", "stall_margin_pct"),),
+                 format_stall_margin),
+    DisplayField(3, "SPD MRG:", "speed_margin", (("flight", "envelope", "min_margin_pct"),), scaled("{:.0f}%")),
+    DisplayField(3, "LOAD G:", "load_factor", (("flight", "envelope", "load_factor"),), scaled("{:.2f} G")),
+    DisplayField(3, "CORNER V:", "corner_spd", (("flight", "envelope", "corner_speed_kts"),), scaled("{:.0f} KT")),
+    DisplayField(4, "HEADING:", "heading", (("heading",),), scaled("{:06.2f}°")),
+    DisplayField(4, "TRACK:", "track", (("track",),), scaled("{:06.2f}°")),
+    DisplayField(4, "PITCH:", "pitch", (("pitch",),), scaled("{:+06.2f}°")),
+    DisplayField(4, "ROLL:", "roll", (("roll",),), scaled("{:+06.2f}°")),
+    DisplayField(5, "IAS:", "ias", (("ias",),), scaled("{:.1f} KTS")),
+    DisplayField(5, "GND SPD:", "gs", (("gs",),), scaled("{:.1f} KTS", 1.94384)),  # m/s to knots
+    DisplayField(5, "VERT SPD:", "vs", (("vs",),), scaled("{:+.0f} FPM")),
+    DisplayField(5, "ENERGY:", "spec_energy",
+                 (("flight", "energy", "specific_energy_ft"), ("flight", "energy", "trend")), format_energy),
+    DisplayField(None, "MACH:", "mach", (("mach",),), scaled("M {:.3f}")),
+    DisplayField(6, "N1:", "n1", (("n1",), ("rpm",)), format_engine),
+    DisplayField(6, "N2:", "n2", (("n2",), ("prop_rpm",)), format_engine),
+    DisplayField(6, "THROTTLE:", "throttle", (("throttle",),), scaled("{:.1f}%", 100.0)),
+    DisplayField(6, "FUEL:", "fuel", (("fuel_total",),), scaled("{:.0f} LBS", 2.20462)),  # kg to lbs
+    DisplayField(7, "RADIUS:", "turn_radius", (("turn", "radius_nm"),), format_turn_radius),
+    DisplayField(7, "TURN RATE:", "turn_rate", (("turn", "turn_rate_dps"),), scaled("{:.1f} °/s")),
+    DisplayField(7, "TIME 90°:", "turn_time", (("turn", "time_to_turn_sec"),), scaled("{:.0f} SEC")),
+    DisplayField(7, "STD BANK:", "std_rate_bank", (("turn", "standard_rate_bank"),), scaled("{:.1f}°")),
+    DisplayField(8, "TOD DIST:", "tod_dist", (("vnav", "tod_distance_nm"),), scaled("{:.1f} NM")),
+    DisplayField(8, "REQ VS:", "req_vs", (("vnav", "required_vs_fpm"),), scaled("{:+.0f} FPM")),
+    DisplayField(8, "FPA:", "fpa", (("vnav", "flight_path_angle_deg"),), scaled("{:+.1f}°")),
+    DisplayField(8, "VS 3°:", "vs_3deg", (("vnav", "vs_for_3deg"),), scaled("{:.0f} FPM")),
+    DisplayField(9, "DENS ALT:", "density_alt", (("density", "density_altitude_ft"),), scaled("{:.0f} FT")),
+    DisplayField(9, "PERF LOSS:", "perf_loss", (("density", "performance_loss_pct"),), scaled("{:.0f}%")),
+    DisplayField(9, "ISA DEV:", "isa_dev", (("density", "temperature_deviation_c"),), format_isa_deviation),
+    DisplayField(9, "EAS:", "eas", (("density", "eas_kts"),), scaled("{:.0f} KT")),
+)
+
+
+class PanelDemand(NamedTuple):
+    """What a full-screen display mode needs read and calculated"""
+    fields: frozenset  # FIELD_DATAREFS fields
+    results: frozenset  # Calculator results (RESULT_CALCULATORS keys)
+
+
+def panel_demand(panel: int) -> PanelDemand:
+    """Fields and results the DISPLAY_FIELDS of a panel depend on"""
+    inputs = {path[0] for field in DISPLAY_FIELDS if field.panel == panel for path in field.inputs}
+    results = inputs & CALCULATOR_INPUTS.keys()
+    fields = (inputs & FIELD_DATAREFS.keys()).union(ALWAYS_READ_FIELDS)
+    fields.update(field for result in results for field in CALCULATOR_INPUTS[result])
+    return PanelDemand(frozenset(fields), frozenset(results))
+
+
+# Demand of each full-screen display mode. The all-panels view needs
+# everything, and so does the diagnostics panel: it must measure the
+# pipeline under its full load, not throttled to the background rate.
+PANEL_DEMANDS = {mode: panel_demand(mode) for mode in range(1, 10)}
+
+
+def lookup(data: Mapping[str, Any], path: Tuple[str, ...]) -> Any:
+    """Value at a path into the tick data (None if any part is missing)"""
+    value = data.get(path[0])
+    for key in path[1:]:
+        if not value:
+            return None
+        value = value.get(key)
+    return value
+
+
+def section_boxes(width: float, height: float, mode: int) -> Dict[int, Tuple[float, float, float, float]]:
+    """Border (x0, y0, x1, y1) of each panel shown in a display mode (canvas renderer)
+
+    Mode 0 stacks panels 1-3, 4-6 and 7-9 in three columns like the label
+    renderer; modes 1-9 give their panel the whole canvas and other modes
+    show no panel.
+    """
+    if mode == 0:
+        column_width, row_height = width / 3, height / 3
+        boxes = {}
+        for panel in range(1, 10):
+            x0, y0 = (panel - 1) // 3 * column_width, (panel - 1) % 3 * row_height
+            boxes[panel] = (x0 + CANVAS_PAD, y0 + CANVAS_PAD,
+                            x0 + column_width - CANVAS_PAD, y0 + row_height - CANVAS_PAD)
+        return boxes
+    if 1 <= mode <= 9:
+        return {mode: (CANVAS_PAD, CANVAS_PAD, width - CANVAS_PAD, height - CANVAS_PAD)}
+    return {}
+
+
+def row_centers(box: Tuple[float, float, float, float], title_height: float, rows: int) -> List[float]:
+    """y of each data row of a section, spread evenly below its title"""
+    top = box[1] + 2 * CANVAS_PAD + title_height
+    row_height = (box[3] - CANVAS_PAD - top) / rows
+    return [top + (row + 0.5) * row_height for row in range(rows)]
+
+
+class CanvasPanel(NamedTuple):
+    """Canvas items of one panel"""
+    tag: str  # Tag shared by every item of the panel
+    border: int
+    title: int
+    rows: List[Tuple[int, int]]  # (label, value) text items in DISPLAY_FIELDS order
+
+
+class CanvasDisplay:
+    """The nine data panels drawn on a single tk.Canvas (--renderer canvas)
+    
+    The label renderer packs a frame per panel and two Labels per row, and
+    every text change goes through a StringVar and the label's geometry
+    management. Here every border, title, row label and value is a canvas
+    item created once: a value update is one itemconfigure() of its text
+    item, and Tk redraws only the area that changed. Switching display mode
+    resizes the two named fonts all items share, moves the items of the
+    panels shown and hides the others by tag.
+    """
+    
+    # (label, value) font sizes, as the label renderer's fonts
+    REGULAR_SIZES = (10, 12)
+    LARGE_SIZES = (22, 28)
+    
+    def __init__(self, parent, titles: Mapping[int, str], font_family: str,
+                 background: str, primary: str, secondary: str, dim: str):
+        """Create the canvas and every item (laid out when the canvas is sized)
+        
+        Args:
+            parent: Widget the canvas is created in (placed by the caller)
+            titles: Panel title of each display mode 1-9
+            font_family: Font of every text item
+            background, primary, secondary, dim: Colors (see AircraftMFD)
+        """
+        self.canvas = tk.Canvas(parent, bg=background, highlightthickness=0, bd=0)
+        self.label_font = tkfont.Font(family=font_family, size=self.REGULAR_SIZES[0])
+        self.value_font = tkfont.Font(family=font_family, size=self.REGULAR_SIZES[1], weight="bold")
+        self.mode = 0
+        self.panels: Dict[int, CanvasPanel] = {}
+        self.values: Dict[str, int] = {}  # Value text item of each displayed field
+        
+        for panel in range(1, 10):
+            tag = f"panel{panel}"
+            rows = []
+            for field in DISPLAY_FIELDS:
+                if field.panel != panel:
+                    continue
+                label = self.canvas.create_text(0, 0, text=field.label, font=self.label_font, fill=dim,
+                                                anchor=tk.W, tags=tag)
+                value = self.canvas.create_text(0, 0, text="---", font=self.value_font, fill=primary,
+                                                anchor=tk.E, tags=tag)
+                rows.append((label, value))
+                self.values[field.name] = value
+            self.panels[panel] = CanvasPanel(
+                tag=tag,
+                border=self.canvas.create_rectangle(0, 0, 0, 0, outline=dim, width=2, tags=tag),
+                title=self.canvas.create_text(0, 0, text=f"▬▬ {titles[panel]} ▬▬", font=self.label_font,
+                                              fill=secondary, anchor=tk.N, tags=tag),
+                rows=rows
+            )
+        
+        self.canvas.bind("<Configure>", lambda event: self.layout())
+    
+    def show(self, mode: int):
+        """Show the panels of a display mode (0 = all, 1-9 = one full screen)"""
+        self.mode = mode
+        label_size, value_size = self.REGULAR_SIZES if mode == 0 else self.LARGE_SIZES
+        self.label_font.configure(size=label_size)
+        self.value_font.configure(size=value_size)
+        self.layout()
+    
+    def layout(self):
+        """Place the items of the panels shown in the current mode, hide the others"""
+        boxes = section_boxes(self.canvas.winfo_width(), self.canvas.winfo_height(), self.mode)
+        title_height = self.label_font.metrics("linespace")
+        for panel, items in self.panels.items():
+            box = boxes.get(panel)
+            if box is None:
+                self.canvas.itemconfigure(items.tag, state=tk.HIDDEN)
+                continue
+            x0, y0, x1, _ = box
+            self.canvas.coords(items.border, *box)
+            self.canvas.coords(items.title, (x0 + x1) / 2, y0 + CANVAS_PAD)
+            for (label, value), y in zip(items.rows, row_centers(box, title_height, len(items.rows))):
+                self.canvas.coords(label, x0 + 2 * CANVAS_PAD, y)
+                self.canvas.coords(value, x1 - 2 * CANVAS_PAD, y)
+            self.canvas.itemconfigure(items.tag, state=tk.NORMAL)
+    
+    def set_text(self, name: str, text: str):
+        """Show new text for a displayed field (fields on no panel are ignored)"""
+        item = self.values.get(name)
+        if item is not None:
+            self.canvas.itemconfigure(item, text=text)
+
+
 class AircraftMFD:
     """Multi-Function Display for X-Plane aircraft data"""
     
@@ -257,19 +2241,31 @@ class AircraftMFD:
     ALERT_COLOR = "#FFAA00"
     WARNING_COLOR = "#FF0000"
     
-    def __init__(self, root):
+    def __init__(self, root, api: Optional[XPlaneAPI] = None, calculators=None,
+                 recorder: Optional[flight_recorder.FlightRecorder] = None, renderer: str = "labels",
+                 frame_rate: float = FRAME_RATE, ias_window: int = IAS_WINDOW):
+        """Initialize the MFD
+        
+        Args:
+            root: Tk root window
+            api: Web API client (defaults to REST polling via XPlaneAPI)
+            calculators: Calculator backend (defaults to make_calculators())
+            recorder: Flight recorder every connected tick is appended to
+                (columns RECORDER_COLUMNS), None to record nothing
+            renderer: "labels" (a Label widget per value) or "canvas"
+                (every panel on one Canvas, see CanvasDisplay)
+            frame_rate: Display refresh rate in Hz (see FrameClock)
+            ias_window: IAS samples behind the gust factor (see IasHistory)
+        """
         self.root = root
+        self.renderer = renderer
         self.root.title("X-PLANE MFD")
         self.root.geometry("900x900")  # Wider for 3-column layout
         self.root.configure(bg=self.BG_COLOR)
         self.root.resizable(False, False)
         
-        self.api = XPlaneAPI()
-        self.is_connected = False
+        self.init_state(api, calculators, recorder, ias_window)
         self.fields_created = False  # Track if data fields have been created
-        
-        # Display mode: 0 = all panels, 1-9 = individual panel full screen
-        self.display_mode = 0
         self.panel_map = {
             1: "POSITION",
             2: "WIND", 
@@ -279,13 +2275,10 @@ class AircraftMFD:
             6: "ENGINE",
             7: "TURN PERF",
             8: "VNAV",
-            9: "DENSITY ALT"
+            9: "DENSITY ALT",
+            DIAGNOSTICS_MODE: "DIAGNOSTICS"
         }
         
-        # Error handling
-        self.has_cpp_error = False
-        self.cpp_error_message = ""
-        
         # Initialize USB device manager for F16 MFD 2
         self.usb_device = USBDeviceManager(self.on_usb_button_press)
         
@@ -318,9 +2311,44 @@ class AircraftMFD:
         # Bind cleanup on window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
+        # Start background acquisition (all network I/O and calculator calls)
+        self.last_snapshot: Optional[TickSnapshot] = None
+        self.next_diagnostics_render = 0.0
+        self.frame_clock = FrameClock(frame_rate)
+        self.acquisition = AcquisitionWorker(self.acquire_snapshot, period=self.scheduler.period)
+        self.acquisition.start()
+        
         # Start main update loop (includes USB polling)
         self.update_display()
     
+    def init_state(self, api: Optional[XPlaneAPI] = None, calculators=None,
+                   recorder: Optional[flight_recorder.FlightRecorder] = None, ias_window: int = IAS_WINDOW):
+        """Initialize the acquisition and calculation state (no widgets)
+        
+        Together with init_data_variables() this is all acquire_snapshot() and
+        render_data() need, which lets benchmark_mfd.py run them without a window.
+        """
+        self.api = api if api is not None else XPlaneAPI()
+        
+        # C++ calculators, in-process if libmfd_calc is built
+        self.calculators = calculators if calculators is not None else make_calculators()
+        self.recorder = recorder
+        self.is_connected = False
+        self.connection_status: Optional[str] = None  # Last status shown in the status bar
+        self.scheduler = DatarefScheduler(DATAREF_RATES)  # Latest field values (acquisition thread)
+        self.next_calculation = 0.0  # api.now() the calculators are next due
+        self.next_background_calculation = 0.0  # api.now() every calculator is next due (see PANEL_DEMANDS)
+        self.calculated: Dict[str, Any] = {}  # Latest calculator results
+        self.ias_history = IasHistory(ias_window)  # Every IAS reading, for the gust factor
+        
+        # Display mode: 0 = all panels, 1-9 = individual panel full screen
+        self.display_mode = 0
+        
+        # Error handling
+        self.has_cpp_error = False
+        self.cpp_error_message = ""
+        self.cpp_errors = queue.Queue()  # (message, shutdown) reported by the acquisition thread
+    
     def load_custom_fonts(self):
         """Load B612 Mono font (Airbus cockpit font)"""
         try:
@@ -405,6 +2433,12 @@ class AircraftMFD:
         self.perf_loss_var = tk.StringVar(value="---")
         self.isa_dev_var = tk.StringVar(value="---")
         self.eas_var = tk.StringVar(value="---")
+        
+        # Display variable of each DISPLAY_FIELDS entry, with what it last showed
+        self.display_vars = {field.name: getattr(self, f"{field.name}_var") for field in DISPLAY_FIELDS}
+        self.rendered_inputs: Dict[str, Tuple[Any, ...]] = {}  # Input values last formatted
+        self.rendered_text: Dict[str, str] = {}  # Text last set
+        self.canvas_display: Optional[CanvasDisplay] = None  # Set by setup_ui() for the canvas renderer
     
     def setup_ui(self):
         """Setup the MFD user interface"""
@@ -426,50 +2460,32 @@ class AircraftMFD:
         self.main_frame = tk.Frame(self.root, bg=self.BG_COLOR)
         self.main_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Left column - Position & Navigation
-        self.left_frame = tk.Frame(self.main_frame, bg=self.BG_COLOR)
-        self.left_frame.grid(row=0, column=0, sticky="nsew", padx=3)
-        
-        self.position_section, self.position_frame = self.create_section(self.left_frame, "POSITION")
-        self.wind_section, self.wind_frame = self.create_section(self.left_frame, "WIND")
-        self.envelope_section, self.envelope_frame = self.create_section(self.left_frame, "ENVELOPE")
-        
-        # Middle column - Flight Data & Engine
-        self.middle_frame = tk.Frame(self.main_frame, bg=self.BG_COLOR)
-        self.middle_frame.grid(row=0, column=1, sticky="nsew", padx=3)
-        
-        self.nav_section, self.nav_frame = self.create_section(self.middle_frame, "NAVIGATION")
-        self.flight_section, self.flight_frame = self.create_section(self.middle_frame, "FLIGHT DATA")
-        self.engine_section, self.engine_frame = self.create_section(self.middle_frame, "ENGINE")
-        
-        # Right column - Performance calculations
-        self.right_frame = tk.Frame(self.main_frame, bg=self.BG_COLOR)
-        self.right_frame.grid(row=0, column=2, sticky="nsew", padx=3)
-        
-        self.turn_section, self.turn_frame = self.create_section(self.right_frame, "TURN PERF")
-        self.vnav_section, self.vnav_frame = self.create_section(self.right_frame, "VNAV")
-        self.density_section, self.density_frame = self.create_section(self.right_frame, "DENSITY ALT")
+        if self.renderer == "canvas":
+            self.canvas_display = CanvasDisplay(self.main_frame, self.panel_map, self.font_family, self.BG_COLOR,
+                                                self.PRIMARY_COLOR, self.SECONDARY_COLOR, self.DIM_COLOR)
+            self.canvas_display.canvas.grid(row=0, column=0, sticky="nsew", columnspan=3)
+            self.main_frame.grid_rowconfigure(0, weight=1)
+        else:
+            self.create_label_panels()
         
-        # Map sections for easy access by panel number
-        self.sections = {
-            1: self.position_section,
-            2: self.wind_section,
-            3: self.envelope_section,
-            4: self.nav_section,
-            5: self.flight_section,
-            6: self.engine_section,
-            7: self.turn_section,
-            8: self.vnav_section,
-            9: self.density_section
-        }
+        # Diagnostics panel (hidden until DIAGNOSTICS_MODE) - instrumentation statistics
+        self.diagnostics_frame = tk.Frame(self.main_frame, bg=self.BG_COLOR)
+        self.diagnostics_section, diagnostics_content = self.create_section(self.diagnostics_frame, "DIAGNOSTICS")
+        self.diagnostics_label = tk.Label(
+            diagnostics_content,
+            text="",
+            font=self.small_font,
+            bg=self.BG_COLOR,
+            fg=self.PRIMARY_COLOR,
+            justify=tk.LEFT,
+            anchor="nw"
+        )
+        self.diagnostics_label.pack(fill=tk.BOTH, expand=True)
         
         self.main_frame.grid_columnconfigure(0, weight=1)
         self.main_frame.grid_columnconfigure(1, weight=1)
         self.main_frame.grid_columnconfigure(2, weight=1)
         
-        # Create data field rows (only once!)
-        self.create_data_fields()
-        
         # Error overlay (hidden by default)
         self.create_error_overlay()
         
@@ -507,6 +2523,48 @@ class AircraftMFD:
         )
         self.time_label.pack(side=tk.RIGHT, padx=10, pady=5)
     
+    def create_label_panels(self):
+        """Create the panel sections and their data rows as Label widgets (label renderer)"""
+        # Left column - Position & Navigation
+        self.left_frame = tk.Frame(self.main_frame, bg=self.BG_COLOR)
+        self.left_frame.grid(row=0, column=0, sticky="nsew", padx=3)
+        
+        self.position_section, self.position_frame = self.create_section(self.left_frame, "POSITION")
+        self.wind_section, self.wind_frame = self.create_section(self.left_frame, "WIND")
+        self.envelope_section, self.envelope_frame = self.create_section(self.left_frame, "ENVELOPE")
+        
+        # Middle column - Flight Data & Engine
+        self.middle_frame = tk.Frame(self.main_frame, bg=self.BG_COLOR)
+        self.middle_frame.grid(row=0, column=1, sticky="nsew", padx=3)
+        
+        self.nav_section, self.nav_frame = self.create_section(self.middle_frame, "NAVIGATION")
+        self.flight_section, self.flight_frame = self.create_section(self.middle_frame, "FLIGHT DATA")
+        self.engine_section, self.engine_frame = self.create_section(self.middle_frame, "ENGINE")
+        
+        # Right column - Performance calculations
+        self.right_frame = tk.Frame(self.main_frame, bg=self.BG_COLOR)
+        self.right_frame.grid(row=0, column=2, sticky="nsew", padx=3)
+        
+        self.turn_section, self.turn_frame = self.create_section(self.right_frame, "TURN PERF")
+        self.vnav_section, self.vnav_frame = self.create_section(self.right_frame, "VNAV")
+        self.density_section, self.density_frame = self.create_section(self.right_frame, "DENSITY ALT")
+        
+        # Map sections for easy access by panel number
+        self.sections = {
+            1: self.position_section,
+            2: self.wind_section,
+            3: self.envelope_section,
+            4: self.nav_section,
+            5: self.flight_section,
+            6: self.engine_section,
+            7: self.turn_section,
+            8: self.vnav_section,
+            9: self.density_section
+        }
+        
+        # Create data field rows (only once!)
+        self.create_data_fields()
+    
     def create_error_overlay(self):
         """Create error overlay with big red X (hidden by default)"""
         self.error_overlay = tk.Frame(
@@ -633,12 +2691,15 @@ class AircraftMFD:
         # Bind number keys 0-9
         for i in range(10):
             self.root.bind(str(i), lambda event, num=i: self.switch_display_mode(num))
+        
+        # Hidden: diagnostics panel without the F16 MFD
+        self.root.bind("<Control-d>", lambda event: self.switch_display_mode(DIAGNOSTICS_MODE))
     
     def on_usb_button_press(self, button_number: int):
         """Callback for USB device button presses
         
         Args:
-            button_number: Button index from USB device (0-9)
+            button_number: Button index from USB device (0-9, DIAGNOSTICS_MODE)
         """
         # We're already on the main thread (called from update_display),
         # so we can update the display directly without queuing
@@ -652,6 +2713,16 @@ class AircraftMFD:
         print("Shutting down...")
         if hasattr(self, 'usb_device'):
             self.usb_device.cleanup()
+        self.acquisition.stop()
+        self.calculators.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Flight recorder: {self.recorder.rows_recorded} rows in {len(self.recorder.files)} files "
+                  f"({self.recorder.rows_dropped} dropped)")
+        stats = self.api.connection_stats()
+        print(f"Web API: {stats['requests']} requests over {stats['connections']} connections "
+              f"({stats['reused']} reused)")
+        self.api.close()
         self.root.destroy()
     
     def update_font_sizes(self, use_large_fonts: bool):
@@ -679,7 +2750,7 @@ class AircraftMFD:
     
     def switch_display_mode(self, mode: int):
         """Switch between multi-panel and single-panel views"""
-        if mode < 0 or mode > 9:
+        if (mode < 0 or mode > 9) and mode != DIAGNOSTICS_MODE:
             return
         
         # Clear error overlay when switching away from mode 9
@@ -693,6 +2764,9 @@ class AircraftMFD:
             self.show_all_panels()
             # Use regular font sizes
             self.update_font_sizes(use_large_fonts=False)
+        elif mode == DIAGNOSTICS_MODE:
+            self.show_diagnostics_panel()
+            self.update_font_sizes(use_large_fonts=False)
         else:
             # Show single panel in full screen
             self.show_single_panel(mode)
@@ -711,6 +2785,12 @@ class AircraftMFD:
     
     def show_all_panels(self):
         """Show all panels in 3-column layout"""
+        self.diagnostics_frame.grid_remove()
+        if self.canvas_display is not None:
+            self.canvas_display.canvas.grid()
+            self.canvas_display.show(0)
+            return
+        
         # Restore original grid configuration for all column frames
         # Important: reset columnspan to 1 (default) to restore 3-column layout
         self.left_frame.grid(row=0, column=0, sticky="nsew", padx=3, columnspan=1)
@@ -723,6 +2803,12 @@ class AircraftMFD:
     
     def show_single_panel(self, panel_num: int):
         """Show single panel in full screen"""
+        self.diagnostics_frame.grid_remove()
+        if self.canvas_display is not None:
+            self.canvas_display.canvas.grid()
+            self.canvas_display.show(panel_num)
+            return
+        
         # Hide all column frames first
         self.left_frame.grid_remove()
         self.middle_frame.grid_remove()
@@ -762,103 +2848,62 @@ class AircraftMFD:
                 else:
                     self.sections[i].pack_forget()
     
+    def show_diagnostics_panel(self):
+        """Show the diagnostics panel in full screen"""
+        if self.canvas_display is not None:
+            self.canvas_display.canvas.grid_remove()
+        else:
+            self.left_frame.grid_remove()
+            self.middle_frame.grid_remove()
+            self.right_frame.grid_remove()
+        self.diagnostics_frame.grid(row=0, column=0, sticky="nsew", padx=3, columnspan=3)
+        self.next_diagnostics_render = 0.0  # Render on the next tick
+    
+    def render_diagnostics(self):
+        """Show the instrumentation statistics (UI thread, every DIAGNOSTICS_REFRESH seconds)"""
+        now = time.monotonic()
+        if now < self.next_diagnostics_render:
+            return
+        self.next_diagnostics_render = now + DIAGNOSTICS_REFRESH
+        rate = self.frame_clock.achieved_rate()
+        rate_text = f"{rate:.1f}" if rate is not None else "---"
+        frames = f"FRAMES {rate_text} HZ OF {self.frame_clock.rate:.0f}, {self.frame_clock.skipped} SKIPPED"
+        lines = [frames, ""] + instrumentation.REGISTRY.summary_lines()
+        self.diagnostics_label.config(text="\n".join(lines))
+    
     def format_lat_lon(self, degrees: float, is_latitude: bool) -> str:
         """Format latitude/longitude for display"""
-        if degrees is None:
-            return "---"
-        
-        direction = ""
-        if is_latitude:
-            direction = "N" if degrees >= 0 else "S"
-        else:
-            direction = "E" if degrees >= 0 else "W"
-        
-        degrees = abs(degrees)
-        deg = int(degrees)
-        minutes = (degrees - deg) * 60
-        
-        return f"{deg:03d}°{minutes:06.3f}'{direction}"
+        return format_lat_lon(degrees, is_latitude)
     
     def calculate_flight_data(self, tas, gs, heading, track, ias, mach, altitude, agl, vs, 
                               weight, bank, vso, vne, mmo) -> Optional[dict]:
         """Call C++ flight calculator for comprehensive calculations"""
-        try:
-            script_dir = Path(__file__).parent
-            calculator_path = script_dir / "flight_calculator"
-            
-            if not calculator_path.exists():
-                return None
-            
-            # Call the C++ program with all parameters
-            result = subprocess.run(
-                [str(calculator_path),
-                 str(tas), str(gs), str(heading), str(track),
-                 str(ias), str(mach), str(altitude), str(agl), str(vs),
-                 str(weight), str(bank), str(vso), str(vne), str(mmo)],
-                capture_output=True,
-                text=True,
-                timeout=0.1  # 100ms timeout
+        # Call the C++ program with all parameters
+        with instrumentation.span("calculate.flight"):
+            returncode, result = self.calculators.calculate(
+                "flight",
+                tas, gs, heading, track,
+                ias, mach, altitude, agl, vs,
+                weight, bank, vso, vne, mmo,
+                ias_history=self.ias_history
             )
-            
-            if result.returncode == 0:
-                return json.loads(result.stdout)
-            else:
-                return None
-                
-        except Exception as e:
-            # Silently fail - don't spam console
-            return None
+        return result if returncode == 0 else None
     
     def calculate_turn_performance(self, tas_kts, bank_deg) -> Optional[dict]:
         """Call C++ turn calculator"""
-        try:
-            script_dir = Path(__file__).parent
-            calculator_path = script_dir / "turn_calculator"
-            
-            if not calculator_path.exists():
-                return None
-            
-            # Calculate for a 90-degree turn (common reference)
-            result = subprocess.run(
-                [str(calculator_path), str(tas_kts), str(bank_deg), "90"],
-                capture_output=True,
-                text=True,
-                timeout=0.1
-            )
-            
-            if result.returncode == 0:
-                return json.loads(result.stdout)
-            return None
-        except:
-            return None
+        # Calculate for a 90-degree turn (common reference)
+        with instrumentation.span("calculate.turn"):
+            returncode, result = self.calculators.calculate("turn", tas_kts, bank_deg, TURN_COURSE_CHANGE_DEG)
+        return result if returncode == 0 else None
     
     def calculate_vnav_data(self, current_alt_ft, gs_kts, vs_fpm) -> Optional[dict]:
         """Call C++ VNAV calculator - assumes descent to 10000 ft at 100nm"""
-        try:
-            script_dir = Path(__file__).parent
-            calculator_path = script_dir / "vnav_calculator"
-            
-            if not calculator_path.exists():
-                return None
-            
-            # Simplified: show TOD for descent to 10000 ft
-            target_alt = 10000.0
-            distance_nm = 100.0  # Reference distance
-            
-            result = subprocess.run(
-                [str(calculator_path), 
-                 str(current_alt_ft), str(target_alt), str(distance_nm), 
-                 str(gs_kts), str(vs_fpm)],
-                capture_output=True,
-                text=True,
-                timeout=0.1
+        # Simplified: show TOD for descent to 10000 ft
+        with instrumentation.span("calculate.vnav"):
+            returncode, result = self.calculators.calculate(
+                "vnav", current_alt_ft, VNAV_TARGET_ALT_FT, VNAV_DISTANCE_NM, gs_kts, vs_fpm
             )
-            
-            if result.returncode == 0:
-                return json.loads(result.stdout)
-            return None
-        except:
-            return None
+        return result if returncode == 0 else None
     
     def calculate_density_altitude(self, pressure_alt_ft, oat_celsius, ias_kts, tas_kts) -> Optional[dict]:
         """Call C++ density altitude calculator
@@ -866,366 +2911,435 @@ class AircraftMFD:
         When display_mode == 9 (viewing DENSITY ALT panel in full screen),
         this will force the C++ code to throw an exception, demonstrating
         error handling. A big red X will appear on screen.
+        
+        Runs on the acquisition thread, so errors are queued with
+        report_cpp_error() and shown by the UI thread.
         """
-        try:
-            script_dir = Path(__file__).parent
-            calculator_path = script_dir / "density_altitude_calculator"
-            
-            if not calculator_path.exists():
-                return None
-            
-            # Force exception when viewing density alt panel in full screen (mode 9)
-            # This demonstrates C++ exception handling and error display
-            force_exception = "1" if self.display_mode == 9 else "0"
-            
-            result = subprocess.run(
-                [str(calculator_path), 
-                 str(pressure_alt_ft), str(oat_celsius), str(ias_kts), str(tas_kts),
-                 force_exception],
-                capture_output=True,
-                text=True,
-                timeout=0.1
+        with instrumentation.span("calculate.density"):
+            returncode, result = self.calculators.calculate(
+                "density_altitude", pressure_alt_ft, oat_celsius, ias_kts, tas_kts, self.density_force_error()
             )
-            
-            if result.returncode == 0:
-                return json.loads(result.stdout)
-            else:
-                # Check if this is an actual exception (return code 1) vs graceful error handling (return code 3)
-                # Return code 1 = uncaught exception (non-compliant version)
-                # Return code 3 = gracefully handled error (compliant version)
-                if self.display_mode == 9 and result.returncode == 1 and not self.has_cpp_error:
-                    # Extract error message from stderr
-                    error_lines = result.stderr.strip().split('\n')
-                    error_msg = "Unknown C++ error"
-                    for line in error_lines:
-                        if line.startswith("Error:"):
-                            error_msg = line.replace("Error:", "").strip()
-                            break
-
-                    # Show error overlay with shutdown notice
-                    self.show_error_overlay(f"{error_msg}\n\nSYSTEM SHUTTING DOWN...")
-
-                    # Quit application after 5 seconds (non-blocking so UI can render)
-                    self.root.after(5000, self.root.quit)
-                    
-                elif self.display_mode == 9 and result.returncode == 3 and not self.has_cpp_error:
-                    error_msg = "Error: Handled error occurred in CDA calculator. Program will no longer crash"
-                    self.show_error_overlay(error_msg)
-                
-                return None
-        except Exception as e:
-            if self.display_mode == 9 and not self.has_cpp_error:
-                self.show_error_overlay(f"Failed to execute calculator: {str(e)}")
-            return None
+        return self.check_density_result(returncode, result)
+    
+    def density_force_error(self) -> int:
+        """force_error argument of the density altitude calculator"""
+        # Force exception when viewing density alt panel in full screen (mode 9)
+        # This demonstrates C++ exception handling and error display
+        return 1 if self.display_mode == 9 else 0
+    
+    def check_density_result(self, returncode: Optional[int], result: Optional[dict]) -> Optional[dict]:
+        """Report a failed density altitude calculation (see calculate_density_altitude)
+        
+        Returns:
+            The result, or None if the calculation failed
+        """
+        if returncode == 0:
+            return result
+        
+        if self.display_mode == 9 and not self.has_cpp_error:
+            # Check if this is an actual exception (return code 1) vs graceful error handling (return code 3)
+            # Return code 1 = uncaught exception (non-compliant version)
+            # Return code 3 = gracefully handled error (compliant version)
+            if returncode == 1:
+                # Show error overlay with shutdown notice
+                self.report_cpp_error("Unknown C++ error\n\nSYSTEM SHUTTING DOWN...", shutdown=True)
+            elif returncode == 3:
+                error_msg = "Error: Handled error occurred in CDA calculator. Program will no longer crash"
+                self.report_cpp_error(error_msg)
+            elif returncode is None and self.calculators.last_error is not None:
+                self.report_cpp_error(f"Failed to execute calculator: {self.calculators.last_error}")
+        return None
+    
+    def report_cpp_error(self, error_message: str, shutdown: bool = False):
+        """Queue a C++ calculator error for display on the UI thread
+        
+        Args:
+            error_message: Message shown in the error overlay
+            shutdown: Quit the application 5 seconds after showing the error
+        """
+        self.cpp_errors.put((error_message, shutdown))
+    
+    def show_queued_cpp_errors(self):
+        """Show C++ errors queued by the acquisition thread (UI thread only)"""
+        while True:
+            try:
+                error_message, shutdown = self.cpp_errors.get_nowait()
+            except queue.Empty:
+                return
+            if self.has_cpp_error:
+                continue
+            self.show_error_overlay(error_message)
+            if shutdown:
+                # Quit application after 5 seconds (non-blocking so UI can render)
+                self.root.after(5000, self.root.quit)
+    
+    def acquire_snapshot(self) -> TickSnapshot:
+        """Read everything needed for one tick (acquisition thread only)
+        
+        Performs all network I/O and calculator calls. Never touches Tk.
+        """
+        status = None
+        data = {}
+        
+        # Connection state comes from the outcome of the real requests (circuit
+        # breaker) - no separate health probe. While disconnected, reconnecting
+        # is the breaker's half-open probe.
+        if not self.is_connected:
+            self.scheduler.reset()  # Refresh every value on the first tick after connecting
+            # Resolve every dataref ID up front instead of one lookup per name
+            if self.api.load_dataref_index(name for name, _ in MFD_DATAREFS):
+                # Push-based transports only need to subscribe once
+                self.api.subscribe(MFD_DATAREFS)
+        if self.api.is_connected():
+            data = self.read_flight_data()
+        
+        connected = self.api.is_connected()
+        if connected:
+            status = "CONNECTED"
+        elif self.is_connected or self.connection_status == "CONNECTION LOST":
+            status = "CONNECTION LOST"
+        else:
+            status = "DISCONNECTED"
+        
+        if status == self.connection_status:
+            status = None  # Unchanged - nothing to re-render
+        else:
+            print(f"X-Plane Web API: {status}")
+            self.connection_status = status
+        self.is_connected = connected
+        
+        snapshot = TickSnapshot(
+            timestamp=time.time(),
+            connected=self.is_connected,
+            status=status,
+            data=MappingProxyType(data)
+        )
+        if self.recorder is not None and connected and data:
+            with instrumentation.span("acquire.record"):
+                self.recorder.record(snapshot.timestamp, data)
+        return snapshot
     
     def update_display(self):
-        """Main update loop for the MFD"""
+        """Main update loop for the MFD (UI thread)
+        
+        Only renders the newest snapshot produced by the acquisition worker,
+        so a slow or unreachable simulator never blocks the Tk main loop.
+        Frames are paced by self.frame_clock: each is scheduled for its
+        deadline, and frames the work overran are skipped.
+        """
+        started = time.perf_counter()
+        instrumentation.REGISTRY.observe("display.lateness", self.frame_clock.start_frame(time.monotonic()))
+        instrumentation.count("display.frames")
+        
         # Poll USB device buttons (if connected) - MUST be on main thread for macOS
         if self.usb_device.is_connected():
-            self.usb_device.poll_buttons_once()
+            with instrumentation.span("display.usb"):
+                self.usb_device.poll_buttons_once()
         
-        try:
-            # Test connection
-            response = requests.get(f"{self.api.base_url}/datarefs/count", timeout=1)
-            if response.status_code == 200:
-                if not self.is_connected:
-                    self.is_connected = True
-                    self.status_label.config(text="● CONNECTED", fg=self.PRIMARY_COLOR)
-                
-                self.update_data()
-            else:
-                if self.is_connected:
-                    self.is_connected = False
-                    self.status_label.config(text="● CONNECTION LOST", fg=self.WARNING_COLOR)
-        except Exception as e:
-            if self.is_connected or not hasattr(self, '_first_error_shown'):
-                print(f"Connection error: {e}")
-                self._first_error_shown = True
-            if self.is_connected:
-                self.is_connected = False
-            self.status_label.config(text="● DISCONNECTED", fg=self.WARNING_COLOR)
+        self.show_queued_cpp_errors()
+        
+        snapshot = self.acquisition.latest
+        if snapshot is not None and snapshot is not self.last_snapshot:
+            self.last_snapshot = snapshot
+            with instrumentation.span("display.render"):
+                self.render_snapshot(snapshot)
         
         # Update time display
         self.time_label.config(text=time.strftime("%H:%M:%S UTC", time.gmtime()))
         
-        # Schedule next update (10 Hz)
-        self.root.after(100, self.update_display)
+        if self.display_mode == DIAGNOSTICS_MODE:
+            self.render_diagnostics()
+        instrumentation.REGISTRY.observe("display.tick", time.perf_counter() - started)
+        
+        # Schedule the next frame for its deadline, not a period after this one's work
+        delay, skipped = self.frame_clock.next_delay(time.monotonic())
+        if skipped:
+            instrumentation.count("display.frames_skipped", skipped)
+        self.root.after(math.ceil(delay * 1000.0), self.update_display)
+    
+    def render_snapshot(self, snapshot: TickSnapshot):
+        """Render one acquisition snapshot (UI thread only)"""
+        if snapshot.status == "CONNECTED":
+            self.status_label.config(text="● CONNECTED", fg=self.PRIMARY_COLOR)
+        elif snapshot.status is not None:
+            self.status_label.config(text=f"● {snapshot.status}", fg=self.WARNING_COLOR)
+        
+        if snapshot.connected:
+            self.render_data(snapshot.data)
     
     def create_data_fields(self):
         """Create all data field labels (called only once during UI setup)"""
-        # Position data rows
-        self.add_data_row(self.position_frame, "LATITUDE:", self.lat_var)
-        self.add_data_row(self.position_frame, "LONGITUDE:", self.lon_var)
-        self.add_data_row(self.position_frame, "ALTITUDE:", self.alt_var)
-        self.add_data_row(self.position_frame, "AGL:", self.agl_var)
-        
-        # Navigation data rows
-        self.add_data_row(self.nav_frame, "HEADING:", self.heading_var)
-        self.add_data_row(self.nav_frame, "TRACK:", self.track_var)
-        self.add_data_row(self.nav_frame, "PITCH:", self.pitch_var)
-        self.add_data_row(self.nav_frame, "ROLL:", self.roll_var)
-        
-        # Wind data rows (calculated by C++)
-        self.add_data_row(self.wind_frame, "HEADWIND:", self.headwind_var)
-        self.add_data_row(self.wind_frame, "CROSSWIND:", self.crosswind_var)
-        self.add_data_row(self.wind_frame, "WIND SPD:", self.wind_spd_var)
-        self.add_data_row(self.wind_frame, "WIND DIR:", self.wind_dir_var)
-        
-        # Envelope margin rows
-        self.add_data_row(self.envelope_frame, "STALL MRG:", self.stall_margin_var)
-        self.add_data_row(self.envelope_frame, "SPD MRG:", self.speed_margin_var)
-        self.add_data_row(self.envelope_frame, "LOAD G:", self.load_factor_var)
-        self.add_data_row(self.envelope_frame, "CORNER V:", self.corner_spd_var)
-        
-        # Flight data rows  
-        self.add_data_row(self.flight_frame, "IAS:", self.ias_var)
-        self.add_data_row(self.flight_frame, "GND SPD:", self.gs_var)
-        self.add_data_row(self.flight_frame, "VERT SPD:", self.vs_var)
-        self.add_data_row(self.flight_frame, "ENERGY:", self.spec_energy_var)
-        
-        # Engine data rows
-        self.add_data_row(self.engine_frame, "N1:", self.n1_var)
-        self.add_data_row(self.engine_frame, "N2:", self.n2_var)
-        self.add_data_row(self.engine_frame, "THROTTLE:", self.throttle_var)
-        self.add_data_row(self.engine_frame, "FUEL:", self.fuel_var)
-        
-        # Turn performance rows
-        self.add_data_row(self.turn_frame, "RADIUS:", self.turn_radius_var)
-        self.add_data_row(self.turn_frame, "TURN RATE:", self.turn_rate_var)
-        self.add_data_row(self.turn_frame, "TIME 90°:", self.turn_time_var)
-        self.add_data_row(self.turn_frame, "STD BANK:", self.std_rate_bank_var)
-        
-        # VNAV rows
-        self.add_data_row(self.vnav_frame, "TOD DIST:", self.tod_dist_var)
-        self.add_data_row(self.vnav_frame, "REQ VS:", self.req_vs_var)
-        self.add_data_row(self.vnav_frame, "FPA:", self.fpa_var)
-        self.add_data_row(self.vnav_frame, "VS 3°:", self.vs_3deg_var)
-        
-        # Density altitude rows
-        self.add_data_row(self.density_frame, "DENS ALT:", self.density_alt_var)
-        self.add_data_row(self.density_frame, "PERF LOSS:", self.perf_loss_var)
-        self.add_data_row(self.density_frame, "ISA DEV:", self.isa_dev_var)
-        self.add_data_row(self.density_frame, "EAS:", self.eas_var)
+        panel_frames = {
+            1: self.position_frame,
+            2: self.wind_frame,
+            3: self.envelope_frame,
+            4: self.nav_frame,
+            5: self.flight_frame,
+            6: self.engine_frame,
+            7: self.turn_frame,
+            8: self.vnav_frame,
+            9: self.density_frame
+        }
+        for field in DISPLAY_FIELDS:
+            if field.panel is not None:
+                self.add_data_row(panel_frames[field.panel], field.label, self.display_vars[field.name])
     
     def update_data(self):
-        """Update all data fields from X-Plane"""
+        """Update all data fields from X-Plane (synchronously, on the calling thread)"""
+        with instrumentation.span("update_data.read"):
+            data = self.read_flight_data()
+        with instrumentation.span("update_data.render"):
+            self.render_data(data)
+    
+    def read_flight_data(self) -> Dict[str, Any]:
+        """Read the datarefs that are due and run the calculators when due
+        
+        Returns:
+            Latest raw dataref values and calculator results keyed by field name
+            (missing values are None)
+        """
+        data: Dict[str, Any] = {}
         try:
-            # Position
-            lat = self.api.get_dataref_value("sim/flightmodel/position/latitude")
-            lon = self.api.get_dataref_value("sim/flightmodel/position/longitude")
-            alt = self.api.get_dataref_value("sim/flightmodel/position/elevation")
-            agl = self.api.get_dataref_value("sim/flightmodel/position/y_agl")
-            
-            if lat is not None:
-                self.lat_var.set(self.format_lat_lon(lat, True))
-            if lon is not None:
-                self.lon_var.set(self.format_lat_lon(lon, False))
-            if alt is not None:
-                self.alt_var.set(f"{alt * 3.28084:.0f} FT")
-            if agl is not None:
-                self.agl_var.set(f"{agl * 3.28084:.0f} FT")
-            
-            # Navigation
-            heading = self.api.get_dataref_value("sim/flightmodel/position/psi")
-            pitch = self.api.get_dataref_value("sim/flightmodel/position/theta")
-            roll = self.api.get_dataref_value("sim/flightmodel/position/phi")
-            track = self.api.get_dataref_value("sim/flightmodel/position/hpath")
-            
-            if heading is not None:
-                self.heading_var.set(f"{heading:06.2f}°")
-            if pitch is not None:
-                self.pitch_var.set(f"{pitch:+06.2f}°")
-            if roll is not None:
-                self.roll_var.set(f"{roll:+06.2f}°")
-            if track is not None:
-                self.track_var.set(f"{track:06.2f}°")
-            
-            # Flight data
-            # Use cockpit gauge IAS (what pilot sees) instead of raw indicated_airspeed
-            # The raw dataref can be miscalibrated or in wrong units for some aircraft
-            ias = self.api.get_dataref_value("sim/cockpit2/gauges/indicators/airspeed_kts_pilot")
-            if ias is None:  # Fallback to raw if cockpit gauge not available
-                ias = self.api.get_dataref_value("sim/flightmodel/position/indicated_airspeed")
-            gs = self.api.get_dataref_value("sim/flightmodel/position/groundspeed")
-            vs = self.api.get_dataref_value("sim/cockpit2/gauges/indicators/vvi_fpm_pilot")
-            mach = self.api.get_dataref_value("sim/flightmodel/misc/machno")
-            
-            if ias is not None:
-                self.ias_var.set(f"{ias:.1f} KTS")
-            if gs is not None:
-                # Convert m/s to knots
-                self.gs_var.set(f"{gs * 1.94384:.1f} KTS")
-            if vs is not None:
-                self.vs_var.set(f"{vs:+.0f} FPM")
-            if mach is not None:
-                self.mach_var.set(f"M {mach:.3f}")
-            
-            # Engine data - try multiple sources for compatibility
-            # Try N1/N2 first (jets)
-            n1 = self.api.get_dataref_value("sim/cockpit2/engine/indicators/N1_percent", 0)
-            n2 = self.api.get_dataref_value("sim/cockpit2/engine/indicators/N2_percent", 0)
-            
-            # If N1/N2 not available, try RPM (props)
-            if n1 is None or n1 == 0:
-                rpm = self.api.get_dataref_value("sim/cockpit2/engine/indicators/engine_speed_rpm", 0)
-                if rpm is not None and rpm > 0:
-                    self.n1_var.set(f"{rpm:.0f} RPM")
-                else:
-                    self.n1_var.set("---")
-            else:
-                self.n1_var.set(f"{n1:.1f}%")
-            
-            if n2 is not None and n2 > 0:
-                self.n2_var.set(f"{n2:.1f}%")
-            else:
-                # Try prop RPM as alternative
-                prop_rpm = self.api.get_dataref_value("sim/cockpit2/engine/indicators/prop_speed_rpm", 0)
-                if prop_rpm is not None and prop_rpm > 0:
-                    self.n2_var.set(f"{prop_rpm:.0f} RPM")
-                else:
-                    self.n2_var.set("---")
+            # Only what the visible panel shows at full rate, the rest in the background
+            demand = PANEL_DEMANDS.get(self.display_mode)
+            self.scheduler.set_demand(demand.fields if demand is not None else None)
             
-            throttle = self.api.get_dataref_value("sim/cockpit2/engine/actuators/throttle_ratio", 0)
-            if throttle is not None:
-                self.throttle_var.set(f"{throttle * 100:.1f}%")
+            # Every field due this tick in one concurrent batch
+            now = self.api.now()
+            fields = self.scheduler.due_fields(now)
+            instrumentation.count("scheduler.fields_read", len(fields))
+            instrumentation.count("scheduler.fields_cached", len(FIELD_DATAREFS) - len(fields))
+            with instrumentation.span("acquire.read"):
+                values = self.api.get_many(FIELD_DATAREFS[field] for field in fields)
+            read = {field: values[FIELD_DATAREFS[field]] for field in fields}
             
-            fuel_total = self.api.get_dataref_value("sim/flightmodel/weight/m_fuel_total")
-            if fuel_total is not None:
-                # Convert kg to lbs
-                self.fuel_var.set(f"{fuel_total * 2.20462:.0f} LBS")
+            # A new aircraft has other limits and may publish datarefs the previous one lacked
+            if "aircraft" in read and self.api.set_aircraft(read["aircraft"]):
+                print("Aircraft changed - reloading aircraft limits")
+                self.scheduler.invalidate(AIRCRAFT_LIMIT_FIELDS)
+                self.api.subscribe(MFD_DATAREFS)
             
-            # Get additional data for comprehensive calculations
-            tas = self.api.get_dataref_value("sim/flightmodel/position/true_airspeed")
-            weight = self.api.get_dataref_value("sim/flightmodel/weight/m_total")
-            vso = self.api.get_dataref_value("sim/aircraft/view/acf_Vso")
-            vne = self.api.get_dataref_value("sim/aircraft/view/acf_Vne")
-            mmo_val = self.api.get_dataref_value("sim/aircraft/view/acf_Mmo")
+            # Second batch only for fields whose primary source was just read as unavailable
+            fallbacks = []
+            if "ias" in read and read["ias"] is None:  # Fallback to raw if cockpit gauge not available
+                fallbacks.append("ias")
+            if "n1" in read:  # If N1/N2 not available, try RPM (props)
+                read["rpm"] = None
+                if read["n1"] is None or read["n1"] == 0:
+                    fallbacks.append("rpm")
+            if "n2" in read:
+                read["prop_rpm"] = None
+                if read["n2"] is None or read["n2"] <= 0:
+                    fallbacks.append("prop_rpm")
+            if fallbacks:
+                with instrumentation.span("acquire.read_fallbacks"):
+                    values = self.api.get_many(FALLBACK_DATAREFS[field] for field in fallbacks)
+                read.update((field, values[FALLBACK_DATAREFS[field]]) for field in fallbacks)
             
-            # Convert units for calculator
-            gs_kts = gs * 1.94384 if gs is not None else 0
-            alt_ft = alt * 3.28084 if alt is not None else 0
-            agl_ft = agl * 3.28084 if agl is not None else 0
+            self.scheduler.update(read)
+            # Every IAS reading feeds the gust factor, at IAS_RATE whatever the calculators run at
+            if read.get("ias") is not None:
+                self.ias_history.add(read["ias"])
+            for field in list(FIELD_DATAREFS) + ["rpm", "prop_rpm"]:
+                data[field] = self.scheduler.values.get(field)
             
-            # Call comprehensive C++ flight calculator
-            if all(v is not None for v in [tas, gs, heading, track, ias, mach, alt, agl, vs, weight, roll, vso, vne, mmo_val]):
-                flight_data = self.calculate_flight_data(
+            # The calculators run at their own rate on the latest values
+            if now + self.scheduler.period / 2 >= self.next_calculation:
+                self.next_calculation = max(self.next_calculation + 1.0 / CALCULATOR_RATE, now)
+                results = demand.results if demand is not None else None
+                if results is not None and now + self.scheduler.period / 2 >= self.next_background_calculation:
+                    results = None  # Every result, at BACKGROUND_RATE
+                    self.next_background_calculation = max(
+                        self.next_background_calculation + 1.0 / BACKGROUND_RATE, now)
+                if results is None or results:
+                    with instrumentation.span("acquire.calculate"):
+                        self.calculated = dict(self.calculated, **self.run_calculators(data, results))
+            data.update(self.calculated)
+        
+        except Exception as e:
+            print(f"Error reading data: {e}")
+        return data
+    
+    def run_calculators(self, data: Mapping[str, Any], wanted: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Run the C++ calculators on raw dataref values
+        
+        Args:
+            data: Latest field values
+            wanted: Results to calculate (RESULT_CALCULATORS keys, None = all)
+        
+        Returns:
+            Dict with the wanted "flight", "turn", "vnav" and "density" results
+            (None if an input was missing or the calculator failed)
+        """
+        wanted = set(RESULT_CALCULATORS) if wanted is None else set(wanted)
+        alt, agl, heading, roll, track = data["alt"], data["agl"], data["heading"], data["roll"], data["track"]
+        ias, gs, vs, mach, tas = data["ias"], data["gs"], data["vs"], data["mach"], data["tas"]
+        weight, vso, vne, mmo_val, oat = data["weight"], data["vso"], data["vne"], data["mmo"], data["oat"]
+        
+        # Convert units for calculator
+        gs_kts = gs * 1.94384 if gs is not None else 0
+        alt_ft = alt * 3.28084 if alt is not None else 0
+        agl_ft = agl * 3.28084 if agl is not None else 0
+        
+        results: Dict[str, Any] = dict.fromkeys(wanted)
+        
+        # With every input available, one combined request replaces the four below
+        inputs = [tas, gs, heading, track, ias, mach, alt, agl, vs, weight, roll, vso, vne, mmo_val, oat]
+        if len(wanted) > 1 and all(v is not None for v in inputs):
+            with instrumentation.span("calculate.all"):
+                parts = self.calculators.calculate_all(
                     tas, gs_kts, heading, track, ias, mach, alt_ft, agl_ft, vs,
-                    weight, roll, vso, vne, mmo_val
+                    weight, roll, vso, vne, mmo_val, oat,
+                    TURN_COURSE_CHANGE_DEG, VNAV_TARGET_ALT_FT, VNAV_DISTANCE_NM, self.density_force_error(),
+                    ias_history=self.ias_history
                 )
-                
-                if flight_data:
-                    # Extract and display wind data
-                    wind = flight_data.get('wind', {})
-                    hw = wind.get('headwind', 0)
-                    cw = wind.get('crosswind', 0)
-                    wind_spd = wind.get('speed_kts', 0)
-                    wind_dir = wind.get('direction_from', 0)
-                    
-                    if hw >= 0:
-                        self.headwind_var.set(f"{hw:.1f} KT")
-                    else:
-                        self.headwind_var.set(f"{abs(hw):.1f} TAIL")
-                    
-                    if abs(cw) < 0.5:
-                        self.crosswind_var.set("CALM")
-                    elif cw > 0:
-                        self.crosswind_var.set(f"{cw:.1f} R")
-                    else:
-                        self.crosswind_var.set(f"{abs(cw):.1f} L")
-                    
-                    self.wind_spd_var.set(f"{wind_spd:.1f} KT")
-                    self.wind_dir_var.set(f"{wind_dir:03.0f}°")
-                    
-                    # Extract and display envelope margins
-                    envelope = flight_data.get('envelope', {})
-                    stall_mrg = envelope.get('stall_margin_pct', 0)
-                    speed_mrg = envelope.get('min_margin_pct', 0)
-                    load_g = envelope.get('load_factor', 1.0)
-                    corner = envelope.get('corner_speed_kts', 0)
-                    
-                    # Color code stall margin
-                    if stall_mrg < 10:
-                        stall_color = "CRIT"
-                    elif stall_mrg < 20:
-                        stall_color = "WARN"
-                    else:
-                        stall_color = ""
-                    
-                    self.stall_margin_var.set(f"{stall_mrg:.0f}% {stall_color}".strip())
-                    self.speed_margin_var.set(f"{speed_mrg:.0f}%")
-                    self.load_factor_var.set(f"{load_g:.2f} G")
-                    self.corner_spd_var.set(f"{corner:.0f} KT")
-                    
-                    # Extract and display energy data
-                    energy = flight_data.get('energy', {})
-                    spec_energy = energy.get('specific_energy_ft', 0)
-                    trend = energy.get('trend', 0)
-                    
-                    trend_arrow = "↑" if trend > 0 else "↓" if trend < 0 else "→"
-                    self.spec_energy_var.set(f"{spec_energy:.0f} {trend_arrow}")
-            
-            # Call turn performance calculator
-            if tas is not None and roll is not None:
-                turn_data = self.calculate_turn_performance(tas, abs(roll))
-                if turn_data:
-                    radius_nm = turn_data.get('radius_nm', 0)
-                    turn_rate = turn_data.get('turn_rate_dps', 0)
-                    turn_time = turn_data.get('time_to_turn_sec', 0)
-                    std_bank = turn_data.get('standard_rate_bank', 0)
-                    
-                    if radius_nm < 10:
-                        self.turn_radius_var.set(f"{radius_nm:.2f} NM")
-                    else:
-                        self.turn_radius_var.set(f"{radius_nm:.1f} NM")
-                    
-                    self.turn_rate_var.set(f"{turn_rate:.1f} °/s")
-                    self.turn_time_var.set(f"{turn_time:.0f} SEC")
-                    self.std_rate_bank_var.set(f"{std_bank:.1f}°")
-            
-            # Call VNAV calculator
-            if alt_ft is not None and gs_kts is not None and vs is not None:
-                vnav_data = self.calculate_vnav_data(alt_ft, gs_kts, vs)
-                if vnav_data:
-                    tod_dist = vnav_data.get('tod_distance_nm', 0)
-                    req_vs = vnav_data.get('required_vs_fpm', 0)
-                    fpa = vnav_data.get('flight_path_angle_deg', 0)
-                    vs_3deg = vnav_data.get('vs_for_3deg', 0)
-                    
-                    self.tod_dist_var.set(f"{tod_dist:.1f} NM")
-                    self.req_vs_var.set(f"{req_vs:+.0f} FPM")
-                    self.fpa_var.set(f"{fpa:+.1f}°")
-                    self.vs_3deg_var.set(f"{vs_3deg:.0f} FPM")
-            
-            # Call density altitude calculator
-            # Get OAT (outside air temperature)
-            oat = self.api.get_dataref_value("sim/cockpit2/temperature/outside_air_temp_degc")
-            if oat is not None and alt_ft is not None and ias is not None and tas is not None:
-                da_data = self.calculate_density_altitude(alt_ft, oat, ias, tas)
-                if da_data:
-                    dens_alt = da_data.get('density_altitude_ft', 0)
-                    perf_loss = da_data.get('performance_loss_pct', 0)
-                    isa_dev = da_data.get('temperature_deviation_c', 0)
-                    eas = da_data.get('eas_kts', 0)
-                    
-                    self.density_alt_var.set(f"{dens_alt:.0f} FT")
-                    self.perf_loss_var.set(f"{perf_loss:.0f}%")
-                    
-                    # Color code ISA deviation
-                    if abs(isa_dev) < 5:
-                        self.isa_dev_var.set(f"{isa_dev:+.0f}°C")
-                    else:
-                        self.isa_dev_var.set(f"{isa_dev:+.0f}°C !")
-                    
-                    self.eas_var.set(f"{eas:.0f} KT")
+            for name in ("flight", "turn", "vnav"):
+                returncode, result = parts[name]
+                results[name] = result if returncode == 0 else None
+            results["density"] = self.check_density_result(*parts["density_altitude"])
+            return results
+        
+        # Call comprehensive C++ flight calculator
+        if "flight" in wanted and all(v is not None for v in [tas, gs, heading, track, ias, mach, alt, agl, vs, weight, roll, vso, vne, mmo_val]):
+            results["flight"] = self.calculate_flight_data(
+                tas, gs_kts, heading, track, ias, mach, alt_ft, agl_ft, vs,
+                weight, roll, vso, vne, mmo_val
+            )
+        
+        # Call turn performance calculator
+        if "turn" in wanted and tas is not None and roll is not None:
+            results["turn"] = self.calculate_turn_performance(tas, abs(roll))
+        
+        # Call VNAV calculator
+        if "vnav" in wanted and alt_ft is not None and gs_kts is not None and vs is not None:
+            results["vnav"] = self.calculate_vnav_data(alt_ft, gs_kts, vs)
+        
+        # Call density altitude calculator
+        if "density" in wanted and oat is not None and alt_ft is not None and ias is not None and tas is not None:
+            results["density"] = self.calculate_density_altitude(alt_ft, oat, ias, tas)
+        
+        return results
+    
+    def render_data(self, data: Mapping[str, Any]):
+        """Show the tick data (see read_flight_data) on the display variables
         
+        Only changes reach Tk: a field is formatted again only when one of its
+        inputs changed, and its variable (and so its label), or its canvas
+        text item, is only set when the text changed. In steady flight most
+        ticks set no variable at all.
+        """
+        updates = 0
+        try:
+            for field in DISPLAY_FIELDS:
+                inputs = tuple([lookup(data, path) for path in field.inputs])
+                if inputs == self.rendered_inputs.get(field.name):
+                    continue
+                text = field.format(*inputs)
+                self.rendered_inputs[field.name] = inputs
+                if text is not None and text != self.rendered_text.get(field.name):
+                    self.rendered_text[field.name] = text
+                    if self.canvas_display is not None:
+                        self.canvas_display.set_text(field.name, text)
+                    else:
+                        self.display_vars[field.name].set(text)
+                    updates += 1
         except Exception as e:
             print(f"Error updating data: {e}")
+        instrumentation.count("render.updates", updates)
 
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="X-Plane MFD")
+    parser.add_argument(
+        "--url", default="http://localhost:8086/api/v2",
+        help="Base URL of the X-Plane Web API"
+    )
+    parser.add_argument(
+        "--transport", choices=["rest", "websocket"], default="rest",
+        help="Poll datarefs over REST or subscribe over the Web API WebSocket"
+    )
+    parser.add_argument(
+        "--calculators", choices=["auto", "library", "process", "numpy"], default="auto",
+        help="Run the C++ calculators in-process (libmfd_calc) or as separate processes, "
+             "or the NumPy engine (calc_engine.py)"
+    )
+    parser.add_argument(
+        "--ias-window", type=int, default=IAS_WINDOW, metavar="N",
+        help=f"IAS samples behind the gust factor, read at {IAS_RATE:g} Hz "
+             f"(1-{MAX_IAS_WINDOW}, default {IAS_WINDOW} = {IAS_WINDOW / IAS_RATE:g} s)"
+    )
+    parser.add_argument(
+        "--record", metavar="DIR", type=Path,
+        help="Record every tick to .mfdrec files in DIR (see flight_recorder.py)"
+    )
+    parser.add_argument(
+        "--record-max-mb", type=float, default=64.0,
+        help="Size at which the flight recorder starts a new file"
+    )
+    parser.add_argument(
+        "--metrics-file", metavar="PATH", type=Path,
+        help="Periodically write the instrumentation metrics to PATH (Prometheus text format)"
+    )
+    parser.add_argument(
+        "--metrics-interval", type=float, default=10.0,
+        help="Seconds between --metrics-file updates"
+    )
+    parser.add_argument(
+        "--replay", metavar="PATH", type=Path,
+        help="Play a recording (an .mfdrec file or a --record directory) instead of reading X-Plane"
+    )
+    parser.add_argument(
+        "--replay-speed", type=float, default=1.0,
+        help="Playback speed of --replay (1 = as recorded, 0 = as fast as possible)"
+    )
+    parser.add_argument(
+        "--replay-start", type=float, metavar="TIMESTAMP",
+        help="Start --replay at this recorded timestamp (epoch seconds)"
+    )
+    parser.add_argument(
+        "--replay-session", metavar="NAME",
+        help="Session of the --replay directory to play, e.g. mfd-20240101-120000 (default: the newest)"
+    )
+    parser.add_argument(
+        "--frame-rate", type=float, default=FRAME_RATE, metavar="HZ",
+        help=f"Display refresh rate ({FRAME_RATE_RANGE[0]:.0f}-{FRAME_RATE_RANGE[1]:.0f} Hz)"
+    )
+    parser.add_argument(
+        "--renderer", choices=["labels", "canvas"], default="labels",
+        help="Show the panels as Label widgets or draw them on a single Canvas"
+    )
+    args = parser.parse_args()
+    if not FRAME_RATE_RANGE[0] <= args.frame_rate <= FRAME_RATE_RANGE[1]:
+        parser.error(f"--frame-rate must be between {FRAME_RATE_RANGE[0]:.0f} and {FRAME_RATE_RANGE[1]:.0f} Hz")
+    if not 1 <= args.ias_window <= MAX_IAS_WINDOW:
+        parser.error(f"--ias-window must be between 1 and {MAX_IAS_WINDOW} samples")
+    
+    if args.replay is not None:
+        try:
+            paths = flight_recorder.session_files(args.replay, args.replay_session)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Replaying {flight_recorder.session_name(paths[0])}")
+        api = ReplayAPI(paths, speed=args.replay_speed if args.replay_speed > 0 else None)
+        if args.replay_start is not None:
+            api.seek(args.replay_start)
+    elif args.transport == "websocket" and WEBSOCKET_AVAILABLE:
+        api = XPlaneWebSocketAPI(args.url)
+    else:
+        if args.transport == "websocket":
+            print("websocket-client not available - using REST polling")
+        api = XPlaneAPI(args.url)
+    
     root = tk.Tk()
-    app = AircraftMFD(root)
+    recorder = None
+    if args.record is not None:
+        recorder = flight_recorder.FlightRecorder(
+            args.record, RECORDER_COLUMNS, max_file_bytes=int(args.record_max_mb * 1024 * 1024))
+    app = AircraftMFD(root, api, make_calculators(args.calculators), recorder, args.renderer,
+                      args.frame_rate, args.ias_window)
+    if args.replay is not None and args.replay_speed <= 0:
+        app.acquisition.period = 0.0  # One recorded row per tick, back to back
     
     # Center window on screen
     root.update_idletasks()
@@ -1235,7 +3349,16 @@ def main():
     y = (root.winfo_screenheight() // 2) - (height // 2)
     root.geometry(f'{width}x{height}+{x}+{y}')
     
+    metrics_writer = None
+    if args.metrics_file is not None:
+        metrics_writer = instrumentation.MetricsWriter(instrumentation.REGISTRY, args.metrics_file,
+                                                       args.metrics_interval)
+        metrics_writer.start()
+    
     root.mainloop()
+    
+    if metrics_writer is not None:
+        metrics_writer.stop()
 
 
 if __name__ == "__main__":
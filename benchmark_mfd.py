@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+End-to-end tick latency benchmark for the MFD
+
+Runs the MFD pipeline headless (no window) against the local Web API
+stand-in (xplane_stub_server.py): every tick is one acquire_snapshot() -
+dataref reads and calculators - followed by render_data() into the Tk
+variables, exactly as the acquisition thread and the UI thread run them.
+Ticks run back to back on a simulated 10 Hz clock, so each tick reads the
+same mix of datarefs as in flight without waiting for real time.
+
+Each tick is broken down into:
+    acquire    dataref reads (api.get_many), wall time
+    decode     JSON decoding of the responses, summed over the reader threads
+               (part of acquire)
+    calculate  calculator execution (run_calculators)
+    render     Tk variable updates (render_data), and with --renderer labels
+               or canvas the widgets redrawing them (needs a display)
+    tick       the whole tick
+
+and reported as p50/p99/max in milliseconds, plus ticks per second. With a
+baseline file the p50/p99 tick latency and ticks per second are compared
+against it and the run fails (exit status 1) on a regression beyond the
+tolerance.
+
+To run:
+    python3 benchmark_mfd.py --save-baseline   # record the baseline on this machine
+    python3 benchmark_mfd.py                   # compare against it
+"""
+
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+import tkinter as tk
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+import aircraft_mfd
+import xplane_stub_server
+
+STAGES = ("acquire", "decode", "calculate", "render", "tick")
+
+# Summary values compared against the baseline
+COMPARED = (("tick", "p50"), ("tick", "p99"))
+
+
+class StageTimer:
+    """Accumulates the seconds spent in each stage during one tick"""
+
+    def __init__(self):
+        self.lock = threading.Lock()  # decode is timed on the reader threads
+        self.current: Dict[str, float] = {}
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    def add(self, stage: str, seconds: float):
+        """Add time spent in a stage to the current tick"""
+        with self.lock:
+            self.current[stage] = self.current.get(stage, 0.0) + seconds
+
+    def wrap(self, stage: str, function):
+        """Return function timed as part of stage"""
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return timed
+
+    def end_tick(self):
+        """Store the current tick's stage times as one sample each"""
+        with self.lock:
+            for stage in STAGES:
+                self.samples[stage].append(self.current.get(stage, 0.0))
+            self.current = {}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of samples"""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """p50/p99/max of samples in milliseconds"""
+    return {
+        "p50": percentile(samples, 0.50) * 1000.0,
+        "p99": percentile(samples, 0.99) * 1000.0,
+        "max": max(samples) * 1000.0,
+    }
+
+
+def run_benchmark(ticks: int = 300, warmup: int = 20, transport: str = "rest", calculators: str = "auto",
+                  faults: xplane_stub_server.Faults = None, renderer: str = "variables") -> Dict[str, object]:
+    """Run the pipeline for warmup + ticks ticks against a stand-in server
+    
+    renderer "variables" renders into the display variables only (no window);
+    "labels" and "canvas" open the MFD window with that renderer and draw
+    every tick.
+
+    Returns:
+        {"stages": {stage: {"p50", "p99", "max"}}, "ticks_per_second": float, ...}
+    """
+    server = xplane_stub_server.start_in_background(faults=faults)
+    base_url = f"http://127.0.0.1:{server.server_port}/api/v2"
+    if transport == "websocket":
+        api = aircraft_mfd.XPlaneWebSocketAPI(base_url, index_path=None)
+    else:
+        api = aircraft_mfd.XPlaneAPI(base_url, index_path=None)
+
+    timer = StageTimer()
+    if renderer == "variables":
+        # StringVars need an interpreter, not a window
+        tk._default_root = tk.Tcl()
+        mfd = aircraft_mfd.AircraftMFD.__new__(aircraft_mfd.AircraftMFD)
+        mfd.init_state(api, aircraft_mfd.make_calculators(calculators))
+        mfd.init_data_variables()
+        window = None
+    else:
+        window = tk.Tk()
+        mfd = aircraft_mfd.AircraftMFD(window, api, aircraft_mfd.make_calculators(calculators), renderer=renderer)
+        mfd.acquisition.stop()  # The benchmark runs the ticks itself
+        mfd.init_state(api, mfd.calculators)  # Acquisition state for the simulated clock below
+        window.update()
+
+    def render(data):
+        mfd.render_data(data)
+        if window is not None:
+            window.update_idletasks()  # Redraw what changed
+
+    # Simulated clock: one scheduler period per tick
+    period = mfd.scheduler.period
+    tick_number = [0]
+    api.now = lambda: tick_number[0] * period
+    api.get_many = timer.wrap("acquire", api.get_many)
+    mfd.run_calculators = timer.wrap("calculate", mfd.run_calculators)
+    render_data = timer.wrap("render", render)
+    decode = requests.Response.json
+    requests.Response.json = timer.wrap("decode", decode)
+
+    try:
+        started = None
+        for tick in range(warmup + ticks):
+            if tick == warmup:
+                timer.samples = {stage: [] for stage in STAGES}
+                started = time.perf_counter()
+            tick_number[0] = tick
+            tick_started = time.perf_counter()
+            snapshot = mfd.acquire_snapshot()
+            if snapshot.connected:
+                render_data(snapshot.data)
+            timer.add("tick", time.perf_counter() - tick_started)
+            timer.end_tick()
+        elapsed = time.perf_counter() - started
+        connected = mfd.is_connected
+    finally:
+        requests.Response.json = decode
+        if window is not None:
+            window.destroy()
+        mfd.calculators.close()
+        api.close()
+        server.shutdown()
+        server.server_close()
+
+    return {
+        "transport": transport,
+        "renderer": renderer,
+        "calculators": type(mfd.calculators).__name__,
+        "ticks": ticks,
+        "connected": connected,
+        "stages": {stage: summarize(timer.samples[stage]) for stage in STAGES},
+        "ticks_per_second": ticks / elapsed,
+    }
+
+
+def report(result: Dict[str, object]):
+    """Print the benchmark results"""
+    print(f"{result['ticks']} ticks, {result['transport']} transport, {result['calculators']}, "
+          f"{result['renderer']} renderer")
+    print(f"{'stage':<10} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage, summary in result["stages"].items():
+        print(f"{stage:<10} {summary['p50']:9.3f} {summary['p99']:9.3f} {summary['max']:9.3f}")
+    print(f"{result['ticks_per_second']:.1f} ticks/s")
+
+
+def compare(result: Dict[str, object], baseline: Dict[str, object], tolerance: float) -> List[str]:
+    """Regressions of result against baseline beyond tolerance (a fraction)
+
+    The maximum is reported but not compared: a single slow tick is noise.
+    """
+    regressions = []
+    for stage, key in COMPARED:
+        measured = result["stages"][stage][key]
+        allowed = baseline["stages"][stage][key] * (1.0 + tolerance)
+        if measured > allowed:
+            regressions.append(f"{stage} {key} {measured:.3f} ms > {allowed:.3f} ms allowed")
+    minimum = baseline["ticks_per_second"] / (1.0 + tolerance)
+    if result["ticks_per_second"] < minimum:
+        regressions.append(f"{result['ticks_per_second']:.1f} ticks/s < {minimum:.1f} ticks/s allowed")
+    return regressions
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="End-to-end MFD tick latency benchmark")
+    parser.add_argument("--ticks", type=int, default=300, help="Ticks to measure")
+    parser.add_argument("--warmup", type=int, default=20, help="Ticks run before measuring")
+    parser.add_argument("--transport", choices=["rest", "websocket"], default="rest",
+                        help="Web API transport to benchmark")
+    parser.add_argument("--calculators", choices=["auto", "library", "process", "numpy"], default="auto",
+                        help="Calculator backend to benchmark")
+    parser.add_argument("--renderer", choices=["variables", "labels", "canvas"], default="variables",
+                        help="Render into the display variables only, or draw an MFD window with this renderer")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency injected by the stand-in server")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Jitter injected by the stand-in server")
+    parser.add_argument("--baseline", type=Path, default=Path("benchmark_baseline.json"),
+                        help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    if args.transport == "websocket" and not aircraft_mfd.WEBSOCKET_AVAILABLE:
+        print("websocket-client not available")
+        sys.exit(2)
+
+    faults = xplane_stub_server.Faults(args.latency_ms / 1000.0, args.jitter_ms / 1000.0, seed=0)
+    result = run_benchmark(args.ticks, args.warmup, args.transport, args.calculators, faults, args.renderer)
+    report(result)
+    if not result["connected"]:
+        print("❌ Lost the stand-in server during the run")
+        sys.exit(1)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline} - run with --save-baseline to create one")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    measured = (result["transport"], result["calculators"], result["renderer"])
+    if (baseline["transport"], baseline["calculators"], baseline.get("renderer", "variables")) != measured:
+        print(f"⚠️  Baseline measured {baseline['transport']} with {baseline['calculators']} "
+              f"and the {baseline.get('renderer', 'variables')} renderer")
+    regressions = compare(result, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"❌ Regression: {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"✅ Within {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Vectorized Python versions of the C++ calculators (NumPy)
+
+Each function mirrors the calculation of one C++ calculator (same formulas
+and constants) but takes scalars or NumPy arrays, broadcast together, so a
+whole recorded flight can be processed in one call. Results are dicts with
+the keys of the calculator's JSON output, holding arrays.
+
+The functions only do the maths. Inputs the C++ calculators reject (e.g. a
+negative bank angle for the turn calculator) are checked by
+EngineCalculators, which runs the engine one sample at a time as a drop-in
+calculator backend for the MFD when the C++ calculators are not built.
+
+Requirements:
+- numpy (install with: pip install numpy)
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Shared constants (calculators/*.cpp)
+DEG_TO_RAD = np.pi / 180.0
+RAD_TO_DEG = 180.0 / np.pi
+GRAVITY = 9.80665  # m/s²
+KTS_TO_MS = 0.514444
+FT_TO_M = 0.3048
+M_TO_FT = 3.28084
+NM_TO_FT = 6076.12
+METERS_PER_NM = 1852.0
+ANGLE_WRAP = 360.0
+HALF_CIRCLE = 180.0
+
+# flight_calculator
+IAS_WINDOW = 50  # mfd_default_ias_window, as aircraft_mfd.IAS_WINDOW
+SQRT_TWO = 1.414
+TYPICAL_GLIDE_RATIO = 12.0
+BEST_GLIDE_SPEED_KTS = 1.3 * 60.0
+ENERGY_RATE_DIVISOR = 101.27
+ENERGY_TREND_THRESHOLD = 50.0
+
+# turn_calculator
+STANDARD_RATE = 3.0  # deg/s
+INFINITE_RADIUS_NM = 999.9
+INFINITE_RADIUS_FT = 999900.0
+INFINITE_TIME = 999.9
+MIN_TAN_THRESHOLD = 0.001
+MIN_TURN_RATE_THRESHOLD = 0.01
+
+# vnav_calculator
+VS_CONVERSION_FACTOR = 101.27
+THREE_DEG_RAD = 3.0 * DEG_TO_RAD
+MIN_DISTANCE_NM = 0.01
+MIN_GROUNDSPEED_KTS = 1.0
+MIN_VS_FOR_TIME_CALC = 1.0
+
+# density_altitude_calculator
+SEA_LEVEL_TEMP_C = 15.0
+TEMP_LAPSE_RATE = 0.0019812  # °C per foot
+KELVIN_OFFSET = 273.15
+DENSITY_ALT_FACTOR = 120.0
+PRESSURE_ALTITUDE_CONSTANT = 6.8756e-6
+PRESSURE_ALTITUDE_EXPONENT = 5.2559
+MIN_IAS_FOR_RATIO = 10.0
+MIN_ALTITUDE_FT = -2000.0
+MAX_ALTITUDE_FT = 60000.0
+MIN_TEMPERATURE_C = -60.0
+MAX_TEMPERATURE_C = 60.0
+
+# Exit codes of the C++ calculators
+ERROR_PARSE_FAILED = 2
+ERROR_INVALID_VALUE = 3
+
+
+def normalize_angle(angle):
+    """Normalize angles to 0-360 degrees"""
+    result = np.fmod(angle, ANGLE_WRAP)
+    return np.where(result < 0.0, result + ANGLE_WRAP, result)
+
+
+def signed_angle(angle):
+    """Normalize angles to -180..180 degrees (180 stays 180)"""
+    result = normalize_angle(angle)
+    return np.where(result > HALF_CIRCLE, result - ANGLE_WRAP, result)
+
+
+def wind_components(track, heading, wind_dir, wind_speed) -> Dict[str, Any]:
+    """Components of a known wind relative to the track (wind_calculator)"""
+    track = normalize_angle(track)
+    heading = normalize_angle(heading)
+    wind_dir = normalize_angle(wind_dir)
+    wind_speed = np.asarray(wind_speed, dtype=float)
+    
+    wind_from_rad = signed_angle(wind_dir - track) * DEG_TO_RAD
+    return {
+        "headwind": -wind_speed * np.cos(wind_from_rad),
+        "crosswind": wind_speed * np.sin(wind_from_rad),
+        "total_wind": wind_speed,
+        "wca": np.zeros_like(wind_from_rad),  # Cannot calculate without TAS
+        "drift": signed_angle(track - heading),
+    }
+
+
+def _spread_over_mean(mean, variance):
+    """Standard deviation over mean, 0 where the mean IAS is not positive
+    
+    Parked or taxiing rows read an IAS of 0; the C++ history reports no
+    gusts there instead of dividing by zero.
+    """
+    positive = mean > 0
+    return np.where(positive, np.sqrt(variance) / np.where(positive, mean, 1.0), 0.0)
+
+
+def gust_factor(ias_history):
+    """Standard deviation over mean of IAS samples along the last axis
+    
+    The variance is taken about the mean (two passes) rather than as
+    E[x²] - mean², which cancels badly for small gusts at a high IAS.
+    """
+    ias_history = np.asarray(ias_history, dtype=float)
+    if ias_history.shape[-1] == 0:
+        return np.zeros(ias_history.shape[:-1])
+    mean = ias_history.mean(axis=-1)
+    deviation = ias_history - mean[..., np.newaxis]
+    return _spread_over_mean(mean, (deviation * deviation).mean(axis=-1))
+
+
+def rolling_gust_factor(ias, window: int = IAS_WINDOW):
+    """Gust factor of each sample of an IAS series over the last window samples
+    
+    Matches what the MFD shows when it adds each IAS reading to its
+    IasHistory: the history holds the current sample and up to window - 1
+    earlier ones. The default window is the MFD's.
+    
+    Each window is centred on its own mean as in gust_factor(), so long
+    series do not build up the error of running sums.
+    """
+    ias = np.asarray(ias, dtype=float)
+    if len(ias) == 0:
+        return np.zeros(0)
+    # Window ending at each sample, padded with NaN until the history is full
+    padded = np.concatenate((np.full(window - 1, np.nan), ias))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+    mean = np.nanmean(windows, axis=-1)
+    deviation = windows - mean[:, np.newaxis]
+    return _spread_over_mean(mean, np.nanmean(deviation * deviation, axis=-1))
+
+
+def wind_vector(tas_kts, gs_kts, heading_deg, track_deg, gust=0.0) -> Dict[str, Any]:
+    """Wind from the air and ground vectors (flight_calculator)
+    
+    Args:
+        gust: Gust factor to report, see gust_factor() and rolling_gust_factor()
+    """
+    heading_rad = np.asarray(heading_deg, dtype=float) * DEG_TO_RAD
+    track_rad = np.asarray(track_deg, dtype=float) * DEG_TO_RAD
+    
+    # Wind = Ground - Air
+    wind_x = gs_kts * np.sin(track_rad) - tas_kts * np.sin(heading_rad)
+    wind_y = gs_kts * np.cos(track_rad) - tas_kts * np.cos(heading_rad)
+    speed = np.hypot(wind_x, wind_y)
+    direction_from = normalize_angle(np.arctan2(wind_x, wind_y) * RAD_TO_DEG)
+    
+    wind_from_rad = signed_angle(direction_from - track_deg) * DEG_TO_RAD
+    return {
+        "speed_kts": speed,
+        "direction_from": direction_from,
+        "headwind": -speed * np.cos(wind_from_rad),
+        "crosswind": speed * np.sin(wind_from_rad),
+        "gust_factor": np.broadcast_to(np.asarray(gust, dtype=float), np.shape(speed)),
+    }
+
+
+def envelope(bank_deg, ias_kts, mach, vso_kts, vne_kts, mmo) -> Dict[str, Any]:
+    """Envelope margins (flight_calculator)"""
+    load_factor = 1.0 / np.cos(np.asarray(bank_deg, dtype=float) * DEG_TO_RAD)
+    
+    # Stall speed increases with load factor
+    vs_actual = vso_kts * np.sqrt(load_factor)
+    stall_margin = (ias_kts - vs_actual) / vs_actual * 100.0
+    vmo_margin = (vne_kts - np.asarray(ias_kts, dtype=float)) / vne_kts * 100.0
+    mmo_margin = (mmo - np.asarray(mach, dtype=float)) / mmo * 100.0
+    return {
+        "stall_margin_pct": stall_margin,
+        "vmo_margin_pct": vmo_margin,
+        "mmo_margin_pct": mmo_margin,
+        "min_margin_pct": np.minimum(np.minimum(stall_margin, vmo_margin), mmo_margin),
+        "load_factor": load_factor,
+        "corner_speed_kts": vs_actual * SQRT_TWO,  # Vc ≈ Vs * √2
+    }
+
+
+def energy(tas_kts, altitude_ft, vs_fpm) -> Dict[str, Any]:
+    """Specific energy and its trend (flight_calculator)"""
+    v_ms = np.asarray(tas_kts, dtype=float) * KTS_TO_MS
+    vs_fpm = np.asarray(vs_fpm, dtype=float)
+    
+    # Es = h + V²/(2g)
+    total_energy_m = altitude_ft * FT_TO_M + (v_ms * v_ms) / (2.0 * GRAVITY)
+    trend = np.where(vs_fpm > ENERGY_TREND_THRESHOLD, 1, np.where(vs_fpm < -ENERGY_TREND_THRESHOLD, -1, 0))
+    return {
+        "specific_energy_ft": total_energy_m * M_TO_FT,
+        "energy_rate_kts": vs_fpm / ENERGY_RATE_DIVISOR,
+        "trend": trend,
+    }
+
+
+def glide_reach(agl_ft, tas_kts, headwind_kts) -> Dict[str, Any]:
+    """Glide range at a typical 12:1 glide ratio (flight_calculator)"""
+    still_air_range = np.asarray(agl_ft, dtype=float) * TYPICAL_GLIDE_RATIO / NM_TO_FT
+    shape = np.shape(still_air_range)
+    return {
+        "still_air_range_nm": still_air_range,
+        "wind_adjusted_range_nm": still_air_range * (1.0 - headwind_kts / np.asarray(tas_kts, dtype=float)),
+        "glide_ratio": np.full(shape, TYPICAL_GLIDE_RATIO),
+        "best_glide_speed_kts": np.full(shape, BEST_GLIDE_SPEED_KTS),
+    }
+
+
+def flight(tas_kts, gs_kts, heading_deg, track_deg, ias_kts, mach, altitude_ft, agl_ft,
+           vs_fpm, weight_kg, bank_deg, vso_kts, vne_kts, mmo, gust=0.0) -> Dict[str, Any]:
+    """Wind, envelope, energy and glide results (flight_calculator)
+    
+    weight_kg is accepted for symmetry with the calculator, which does not
+    use it either.
+    """
+    wind = wind_vector(tas_kts, gs_kts, heading_deg, track_deg, gust)
+    return {
+        "wind": wind,
+        "envelope": envelope(bank_deg, ias_kts, mach, vso_kts, vne_kts, mmo),
+        "energy": energy(tas_kts, altitude_ft, vs_fpm),
+        "glide": glide_reach(agl_ft, tas_kts, wind["headwind"]),
+    }
+
+
+def turn_performance(tas_kts, bank_deg, course_change_deg) -> Dict[str, Any]:
+    """Turn radius, rate and lead distance (turn_calculator)"""
+    v_ms = np.asarray(tas_kts, dtype=float) * KTS_TO_MS
+    phi_rad = np.asarray(bank_deg, dtype=float) * DEG_TO_RAD
+    course_change_deg = np.asarray(course_change_deg, dtype=float)
+    
+    tan_phi = np.tan(phi_rad)
+    turning = np.abs(tan_phi) >= MIN_TAN_THRESHOLD  # Else essentially wings level
+    # Keep the wings-level samples out of the divisions (their result is replaced)
+    safe_tan_phi = np.where(turning, tan_phi, 1.0)
+    
+    # R = V² / (g * tan φ)
+    radius_m = (v_ms * v_ms) / (GRAVITY * safe_tan_phi)
+    # ω = (g * tan φ) / V
+    turn_rate = (GRAVITY * safe_tan_phi) / v_ms * RAD_TO_DEG
+    # L = R * tan(Δψ/2)
+    lead_m = radius_m * np.tan(course_change_deg * DEG_TO_RAD / 2.0)
+    rate_ok = np.abs(turn_rate) > MIN_TURN_RATE_THRESHOLD
+    time_to_turn = course_change_deg / np.where(rate_ok, turn_rate, 1.0)
+    
+    # φ = atan(ω * V / g) for ω = 3°/s
+    standard_rate_bank = np.arctan((STANDARD_RATE * DEG_TO_RAD * v_ms) / GRAVITY) * RAD_TO_DEG
+    return {
+        "radius_nm": np.where(turning, radius_m / METERS_PER_NM, INFINITE_RADIUS_NM),
+        "radius_ft": np.where(turning, radius_m * M_TO_FT, INFINITE_RADIUS_FT),
+        "turn_rate_dps": np.where(turning, turn_rate, 0.0),
+        "lead_distance_nm": np.where(turning, lead_m / METERS_PER_NM, 0.0),
+        "lead_distance_ft": np.where(turning, lead_m * M_TO_FT, 0.0),
+        "time_to_turn_sec": np.where(turning & rate_ok, time_to_turn, INFINITE_TIME),
+        "load_factor": 1.0 / np.cos(phi_rad),
+        "standard_rate_bank": standard_rate_bank,
+    }
+
+
+def vnav(current_alt_ft, target_alt_ft, distance_nm, groundspeed_kts, current_vs_fpm) -> Dict[str, Any]:
+    """Flight path to an altitude constraint (vnav_calculator)"""
+    altitude_change = np.asarray(target_alt_ft, dtype=float) - current_alt_ft
+    is_descent = altitude_change < 0.0
+    current_vs_fpm = np.asarray(current_vs_fpm, dtype=float)
+    
+    # Avoid division by zero
+    distance_nm = np.maximum(distance_nm, MIN_DISTANCE_NM)
+    groundspeed_kts = np.maximum(groundspeed_kts, MIN_GROUNDSPEED_KTS)
+    
+    gamma_rad = np.arctan(altitude_change / (distance_nm * NM_TO_FT))
+    abs_alt_change = np.abs(altitude_change)
+    vs_for_3deg = VS_CONVERSION_FACTOR * groundspeed_kts * np.tan(THREE_DEG_RAD)
+    
+    vs_ok = np.abs(current_vs_fpm) > MIN_VS_FOR_TIME_CALC
+    change_ok = abs_alt_change > MIN_VS_FOR_TIME_CALC
+    return {
+        "altitude_to_lose_ft": -altitude_change,
+        "flight_path_angle_deg": gamma_rad * RAD_TO_DEG,
+        "required_vs_fpm": VS_CONVERSION_FACTOR * groundspeed_kts * np.tan(gamma_rad),
+        "tod_distance_nm": abs_alt_change / (NM_TO_FT * np.tan(THREE_DEG_RAD)),
+        "time_to_constraint_min": np.where(
+            vs_ok, altitude_change / np.where(vs_ok, current_vs_fpm, 1.0), INFINITE_TIME),
+        "distance_per_1000ft": np.where(
+            change_ok, distance_nm * 1000.0 / np.where(change_ok, abs_alt_change, 1.0), 0.0),
+        "vs_for_3deg": np.where(is_descent, vs_for_3deg, -vs_for_3deg),
+        "is_descent": is_descent,
+    }
+
+
+def density_altitude(pressure_altitude_ft, oat_celsius, ias_kts, tas_kts) -> Dict[str, Any]:
+    """Density altitude and air density (density_altitude_calculator)"""
+    pressure_altitude_ft = np.asarray(pressure_altitude_ft, dtype=float)
+    oat_celsius = np.asarray(oat_celsius, dtype=float)
+    ias_kts = np.asarray(ias_kts, dtype=float)
+    
+    # DA = PA + 120 * (OAT - ISA)
+    temperature_deviation = oat_celsius - (SEA_LEVEL_TEMP_C - TEMP_LAPSE_RATE * pressure_altitude_ft)
+    # σ = (P/P₀) * (T₀/T)
+    pressure_ratio = (1.0 - PRESSURE_ALTITUDE_CONSTANT * pressure_altitude_ft) ** PRESSURE_ALTITUDE_EXPONENT
+    sigma = pressure_ratio * (SEA_LEVEL_TEMP_C + KELVIN_OFFSET) / (oat_celsius + KELVIN_OFFSET)
+    
+    ias_ok = ias_kts > MIN_IAS_FOR_RATIO
+    return {
+        "density_altitude_ft": pressure_altitude_ft + DENSITY_ALT_FACTOR * temperature_deviation,
+        "pressure_altitude_ft": pressure_altitude_ft,
+        "air_density_ratio": sigma,
+        "temperature_deviation_c": temperature_deviation,
+        "performance_loss_pct": (1.0 - sigma) * 100.0,
+        "eas_kts": tas_kts * np.sqrt(sigma),
+        "tas_to_ias_ratio": np.where(ias_ok, tas_kts / np.where(ias_ok, ias_kts, 1.0), 1.0),
+        "pressure_ratio": pressure_ratio,
+    }
+
+
+def to_python(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a result of scalar inputs to plain Python values, as json.loads would give"""
+    return {
+        key: to_python(value) if isinstance(value, dict) else np.asarray(value).item()
+        for key, value in result.items()
+    }
+
+
+class EngineCalculators:
+    """The NumPy engine as a calculator backend (no compiled calculators needed)
+    
+    Drop-in replacement for ProcessCalculators and CalculatorLibrary: the same
+    arguments give the same exit codes and result dicts.
+    """
+    
+    def __init__(self):
+        """Initialize the backend"""
+        self.last_error: Optional[str] = None  # Never set, the engine cannot fail to answer
+    
+    def calculate(self, name: str, *args, ias_history=None) -> Tuple[Optional[int], Optional[dict]]:
+        """Run one calculation (see ProcessCalculators.calculate)"""
+        if name == "flight":
+            return self.flight(*(float(arg) for arg in args), ias_history=ias_history)
+        handlers = {
+            "turn": self.turn,
+            "vnav": self.vnav,
+            "density_altitude": self.density_altitude,
+            "wind": self.wind,
+        }
+        return handlers[name](*(float(arg) for arg in args))
+    
+    def calculate_all(self, *args, ias_history=None) -> Dict[str, Tuple[Optional[int], Optional[dict]]]:
+        """Run every MFD calculation (see ProcessCalculators.calculate_all)"""
+        (tas, gs, heading, track, ias, mach, altitude, agl, vs, weight, bank, vso, vne, mmo,
+         oat, course_change, target_alt, distance, force_error) = (float(arg) for arg in args)
+        return {
+            "flight": self.flight(tas, gs, heading, track, ias, mach, altitude, agl, vs,
+                                  weight, bank, vso, vne, mmo, ias_history),
+            "turn": self.turn(tas, abs(bank), course_change),
+            "vnav": self.vnav(altitude, target_alt, distance, gs, vs),
+            "density_altitude": self.density_altitude(altitude, oat, ias, tas, force_error),
+        }
+    
+    def flight(self, tas, gs, heading, track, ias, mach, altitude, agl, vs,
+               weight, bank, vso, vne, mmo, ias_history=None) -> Tuple[int, Optional[dict]]:
+        """flight_calculator, with the gust factor of ias_history (aircraft_mfd.IasHistory, 0 if None)"""
+        gust = ias_history.gust_factor() if ias_history is not None else 0.0
+        return 0, to_python(flight(tas, gs, heading, track, ias, mach, altitude, agl, vs,
+                                   weight, bank, vso, vne, mmo, gust))
+    
+    def turn(self, tas_kts, bank_deg, course_change_deg) -> Tuple[int, Optional[dict]]:
+        """turn_calculator"""
+        if tas_kts <= 0.0 or not 0.0 <= bank_deg <= 90.0:
+            return ERROR_INVALID_VALUE, None
+        return 0, to_python(turn_performance(tas_kts, bank_deg, course_change_deg))
+    
+    def vnav(self, current_alt_ft, target_alt_ft, distance_nm, gs_kts, vs_fpm) -> Tuple[int, Optional[dict]]:
+        """vnav_calculator"""
+        return 0, to_python(vnav(current_alt_ft, target_alt_ft, distance_nm, gs_kts, vs_fpm))
+    
+    def density_altitude(self, pressure_alt_ft, oat_celsius, ias_kts, tas_kts,
+                         force_error=0.0) -> Tuple[int, Optional[dict]]:
+        """density_altitude_calculator"""
+        if int(force_error) != 0:
+            return ERROR_INVALID_VALUE, None
+        if not MIN_ALTITUDE_FT <= pressure_alt_ft <= MAX_ALTITUDE_FT:
+            return ERROR_PARSE_FAILED, None
+        if not MIN_TEMPERATURE_C <= oat_celsius <= MAX_TEMPERATURE_C:
+            return ERROR_PARSE_FAILED, None
+        return 0, to_python(density_altitude(pressure_alt_ft, oat_celsius, ias_kts, tas_kts))
+    
+    def wind(self, track, heading, wind_dir, wind_speed) -> Tuple[int, Optional[dict]]:
+        """wind_calculator"""
+        if wind_speed < 0.0:
+            return ERROR_INVALID_VALUE, None
+        return 0, to_python(wind_components(track, heading, wind_dir, wind_speed))
+    
+    def close(self):
+        """Nothing to release"""
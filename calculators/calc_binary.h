@@ -0,0 +1,75 @@
+// Compact binary output shared by the X-Plane MFD calculators
+//
+// Started with --binary, a calculator writes each result as one fixed-layout
+// record instead of JSON, at full double precision:
+//   header  : Uint16 format version, Uint16 calculator id, Int32 status
+//   payload : only when status is 0 - the fields of the calculator's result
+//             struct in mfd_calc.h, in declaration order, without padding
+// Every value is little-endian: Float64 as IEEE 754 binary64, Int32 as two's
+// complement. A layout change must bump binary_format_version.
+//
+// JSF Compliance:
+// - AV Rule 208: No exceptions (throw/catch/try)
+// - AV Rule 209: Fixed-width types (Int32, Uint8, Uint16, Float64) via jsf_types.h
+// - AV Rule 206: No dynamic memory allocation
+// - AV Rule 126: C++ style comments only (//)
+
+#ifndef CALC_BINARY_H
+#define CALC_BINARY_H
+
+#include <bit>
+#include <iostream>
+#include "jsf_types.h"
+
+namespace xplane_mfd::calc {
+
+// Version of the record layouts below
+const Uint16 binary_format_version = 1;
+
+// Calculator ids (payload layout)
+const Uint16 calculator_id_wind = 1;              // MfdWindComponents
+const Uint16 calculator_id_flight = 2;            // MfdWindVector, MfdEnvelope, MfdEnergy, MfdGlide
+const Uint16 calculator_id_turn = 3;              // MfdTurn
+const Uint16 calculator_id_vnav = 4;              // MfdVnav
+const Uint16 calculator_id_density_altitude = 5;  // MfdDensityAltitude
+const Uint16 calculator_id_compute_all = 6;       // MfdAllResults
+
+// Bits per byte written
+const Int32 bits_per_byte = 8;
+const Uint64 byte_mask = 0xFF;
+
+// Write the low byte_count bytes of a value, least significant first
+inline void write_little_endian(Uint64 value, Int32 byte_count) {
+    char bytes[sizeof(Uint64)];
+    for (Int32 i = 0; i < byte_count; ++i) {
+        bytes[i] = static_cast<char>((value >> (bits_per_byte * i)) & byte_mask);
+    }
+    std::cout.write(bytes, byte_count);
+}
+
+inline void write_float64(Float64 value) {
+    write_little_endian(std::bit_cast<Uint64>(value), sizeof(Float64));
+}
+
+inline void write_int32(Int32 value) {
+    write_little_endian(static_cast<Uint32>(value), sizeof(Int32));
+}
+
+// Read a little-endian Float64 (binary batch input, see calc_serve.h)
+inline Float64 read_float64(const Uint8 bytes[]) {
+    Uint64 value = 0;
+    for (Int32 i = 0; i < static_cast<Int32>(sizeof(Float64)); ++i) {
+        value |= static_cast<Uint64>(bytes[i]) << (bits_per_byte * i);
+    }
+    return std::bit_cast<Float64>(value);
+}
+
+inline void write_record_header(Uint16 calculator_id, Int32 status) {
+    write_little_endian(binary_format_version, sizeof(Uint16));
+    write_little_endian(calculator_id, sizeof(Uint16));
+    write_int32(status);
+}
+
+} // namespace xplane_mfd::calc
+
+#endif // CALC_BINARY_H
@@ -0,0 +1,457 @@
+// Long-lived request/response and batch modes shared by the X-Plane MFD calculators
+//
+// Started with --serve, a calculator keeps running and reads one request per
+// line on stdin. A request holds the same arguments as the command line,
+// separated by whitespace. Exactly one line is written (and flushed) per
+// request:
+//   - the result as single-line JSON, or
+//   - {"error": <code>} with the exit code the one-shot CLI would return
+// With --serve --binary, exactly one binary record (calc_binary.h) is
+// written instead, its status being the exit code.
+// An empty line or end of input stops the calculator.
+//
+// Started with --batch, a calculator streams records from stdin to stdout
+// for offline processing (e.g. a recorded flight), with buffered I/O and
+// without flushing per record:
+//   - input: CSV rows holding the command line arguments in order (a first
+//     line that does not start with a number is skipped as a header, empty
+//     lines are skipped), or with --binary-input fixed-size records of
+//     little-endian Float64 values, every argument including the optional
+//     ones (see batch_record_values in each calculator)
+//   - output: one single-line JSON result or {"error": <code>} per input
+//     record, or with --binary one binary record per input record
+// The record count and throughput are reported on stderr at the end.
+// Formatting JSON costs several times the calculation itself, so
+// --batch --binary is the high-throughput mode.
+//
+// JSF Compliance:
+// - AV Rule 208: No exceptions (throw/catch/try)
+// - AV Rule 209: Fixed-width types (Int32) via jsf_types.h
+// - AV Rule 206: No dynamic memory allocation (fixed-size line and argument buffers)
+// - AV Rule 113: Single exit point
+// - AV Rule 126: C++ style comments only (//)
+
+#ifndef CALC_SERVE_H
+#define CALC_SERVE_H
+
+#include <charconv>
+#include <chrono>
+#include <cstdio>
+#include <cstring>
+#include <iomanip>
+#include <iostream>
+#include <system_error>
+#include "jsf_types.h"
+#include "calc_binary.h"
+
+namespace xplane_mfd::calc {
+
+// Float64 written with 2 decimals, as std::fixed << std::setprecision(2)
+// would, but through std::to_chars: no locale or stream state per number.
+// JSON output of batch mode is mostly numbers, so this sets its throughput.
+struct Fixed2 {
+    Float64 value;
+};
+
+// Longest fixed-notation Float64: 309 integer digits, sign, point, 2 decimals
+const Int32 fixed2_max_length = 320;
+
+// Wrap a result for std::cout << fixed2(value)
+inline Fixed2 fixed2(Float64 value) {
+    return Fixed2{value};
+}
+
+inline std::ostream& operator<<(std::ostream& out, const Fixed2& number) {
+    char text[fixed2_max_length];
+    std::to_chars_result written = std::to_chars(text, text + fixed2_max_length, number.value,
+                                                 std::chars_format::fixed, 2);
+    out.write(text, written.ptr - text);
+    return out;
+}
+
+// Output written for each result
+struct OutputFormat {
+    bool binary;          // Binary records (calc_binary.h) instead of JSON
+    const char* newline;  // JSON: written after each member and brace
+    const char* indent;   // JSON: written once per nesting level before each member
+};
+
+// Indented multi-line JSON for humans (one-shot CLI)
+const OutputFormat json_pretty = {false, "\n", "  "};
+
+// Single-line JSON (serve mode, one response per line)
+const OutputFormat json_single_line = {false, "", ""};
+
+// Binary records (--binary)
+const OutputFormat binary_records = {true, "", ""};
+
+// Fixed buffer limits (AV Rule 206: no dynamic allocation)
+const Int32 max_request_length = 1024;
+const Int32 max_request_args = 32;
+
+// Request outcome that produced a JSON result
+const Int32 request_success = 0;
+// Request line longer than max_request_length (same code as a bad argument count)
+const Int32 request_too_long = 1;
+
+// Unknown mode option (same code as a bad argument count)
+const Int32 invalid_option = 1;
+// CSV field that is not a number (same code as an unparseable argument)
+const Int32 invalid_number = 2;
+// Binary batch input ended inside a record
+const Int32 truncated_input = 2;
+
+// Batch input buffer (AV Rule 206: static, allocated once)
+const Int32 batch_input_buffer_size = 1 << 16;
+
+// Handles one request - argc/argv as in main(), argv[0] is the program name
+typedef Int32 (*RequestHandler)(Int32 argc, const char* const argv[], const OutputFormat& format);
+
+// Handles one batch record - the command line arguments as numbers
+typedef Int32 (*ValuesHandler)(const Float64 values[], Int32 count, const OutputFormat& format);
+
+// What run_calculator needs to know about a calculator
+struct Calculator {
+    Uint16 id;                   // Binary record id (calc_binary.h)
+    RequestHandler run_request;  // Command line and --serve requests
+    ValuesHandler run_values;    // --batch records
+    Int32 record_values;         // Values in a --binary-input record
+};
+
+// Split a request line in place on whitespace
+// Returns the number of entries in argv, including argv[0]
+inline Int32 split_request(char* line, const char* argv[], Int32 max_args) {
+    Int32 argc = 1;
+    char* cursor = line;
+
+    while (*cursor != '\0' && argc < max_args) {
+        // Skip separators
+        while (*cursor == ' ' || *cursor == '\t' || *cursor == '\r' || *cursor == '\n') {
+            *cursor = '\0';
+            ++cursor;
+        }
+        if (*cursor != '\0') {
+            argv[argc] = cursor;
+            ++argc;
+            while (*cursor != '\0' && *cursor != ' ' && *cursor != '\t'
+                   && *cursor != '\r' && *cursor != '\n') {
+                ++cursor;
+            }
+        }
+    }
+
+    return argc;
+}
+
+// Discard the rest of an over-long request line
+inline void skip_line(std::FILE* input) {
+    Int32 c = std::fgetc(input);
+    while (c != EOF && c != '\n') {
+        c = std::fgetc(input);
+    }
+}
+
+// Write the response to a request that produced no result
+inline void write_error(Uint16 calculator_id, Int32 code, const OutputFormat& format) {
+    if (format.binary) {
+        write_record_header(calculator_id, code);
+    } else {
+        std::cout << "{\"error\": " << code << "}";
+    }
+}
+
+// Written after each response: JSON responses are lines, binary records are not delimited
+inline const char* response_end(const OutputFormat& format) {
+    return format.binary ? "" : "\n";
+}
+
+// Answer requests from stdin until an empty line or end of input
+// AV Rule 113: Single exit point
+inline Int32 serve_requests(const char* program_name, Uint16 calculator_id, RequestHandler handler,
+                            const OutputFormat& format) {
+    char line[max_request_length];
+    const char* argv[max_request_args];
+    bool running = true;
+
+    while (running) {
+        if (std::fgets(line, max_request_length, stdin) == nullptr) {
+            running = false;
+        } else if (std::strchr(line, '\n') == nullptr && !std::feof(stdin)) {
+            // Line did not fit in the buffer
+            skip_line(stdin);
+            write_error(calculator_id, request_too_long, format);
+            std::cout << response_end(format) << std::flush;
+        } else {
+            argv[0] = program_name;
+            Int32 argc = split_request(line, argv, max_request_args);
+            if (argc <= 1) {
+                running = false;
+            } else {
+                Int32 code = handler(argc, argv, format);
+                if (code != request_success) {
+                    write_error(calculator_id, code, format);
+                }
+                std::cout << response_end(format) << std::flush;
+            }
+        }
+    }
+
+    return request_success;  // Single exit point
+}
+
+// Parse a CSV row of numbers into values
+// Returns the number of fields (values beyond max_values are not stored),
+// or -1 if a field is not a number
+// AV Rule 113: Single exit point
+inline Int32 parse_csv_row(const char* line, Float64 values[], Int32 max_values) {
+    Int32 count = 0;
+    bool valid = true;
+    const char* cursor = line;
+    bool more_fields = true;
+
+    while (more_fields && valid) {
+        while (*cursor == ' ' || *cursor == '\t') {
+            ++cursor;
+        }
+        const char* end = cursor;
+        while (*end != '\0' && *end != ',' && *end != '\r' && *end != '\n') {
+            ++end;
+        }
+        const char* field_end = end;
+        while (field_end > cursor && (field_end[-1] == ' ' || field_end[-1] == '\t')) {
+            --field_end;
+        }
+
+        Float64 value = 0.0;
+        std::from_chars_result parsed = std::from_chars(cursor, field_end, value);
+        if (parsed.ec != std::errc() || parsed.ptr != field_end) {
+            valid = false;
+        } else {
+            if (count < max_values) {
+                values[count] = value;
+            }
+            ++count;
+        }
+
+        more_fields = (*end == ',');
+        cursor = end + 1;
+    }
+
+    return valid ? count : -1;  // Single exit point
+}
+
+// True if a CSV line holds only whitespace
+inline bool is_blank_line(const char* line) {
+    const char* cursor = line;
+    while (*cursor == ' ' || *cursor == '\t' || *cursor == '\r' || *cursor == '\n') {
+        ++cursor;
+    }
+    return *cursor == '\0';
+}
+
+// True if a CSV line starts like a number (anything else on the first line is a header)
+inline bool starts_with_number(const char* line) {
+    const char* cursor = line;
+    while (*cursor == ' ' || *cursor == '\t') {
+        ++cursor;
+    }
+    return (*cursor >= '0' && *cursor <= '9') || *cursor == '-' || *cursor == '+' || *cursor == '.';
+}
+
+// Answer one batch record and end its response
+inline void run_batch_record(const Calculator& calculator, const Float64 values[], Int32 count,
+                             const OutputFormat& format) {
+    Int32 code = calculator.run_values(values, count, format);
+    if (code != request_success) {
+        write_error(calculator.id, code, format);
+    }
+    std::cout << response_end(format);
+}
+
+// Stream CSV rows from stdin, counting the records answered
+// AV Rule 113: Single exit point
+inline Int32 batch_csv(const Calculator& calculator, const OutputFormat& format, Int64& records) {
+    char line[max_request_length];
+    Float64 values[max_request_args];
+    bool first_line = true;
+
+    while (std::fgets(line, max_request_length, stdin) != nullptr) {
+        if (std::strchr(line, '\n') == nullptr && !std::feof(stdin)) {
+            // Line did not fit in the buffer
+            skip_line(stdin);
+            write_error(calculator.id, request_too_long, format);
+            std::cout << response_end(format);
+            ++records;
+        } else if (is_blank_line(line) || (first_line && !starts_with_number(line))) {
+            // Not a record
+        } else {
+            Int32 count = parse_csv_row(line, values, max_request_args);
+            if (count < 0) {
+                write_error(calculator.id, invalid_number, format);
+                std::cout << response_end(format);
+            } else if (count > max_request_args) {
+                write_error(calculator.id, request_too_long, format);
+                std::cout << response_end(format);
+            } else {
+                run_batch_record(calculator, values, count, format);
+            }
+            ++records;
+        }
+        first_line = false;
+    }
+
+    return request_success;  // Single exit point
+}
+
+// Stream binary records of calculator.record_values Float64 values from stdin
+// AV Rule 113: Single exit point
+inline Int32 batch_binary(const Calculator& calculator, const OutputFormat& format, Int64& records) {
+    Int32 return_code = request_success;  // Single exit point variable
+    Uint8 record[max_request_args * sizeof(Float64)];
+    Float64 values[max_request_args];
+    const std::size_t record_size = static_cast<std::size_t>(calculator.record_values) * sizeof(Float64);
+    bool reading = true;
+
+    while (reading) {
+        std::size_t read = std::fread(record, 1, record_size, stdin);
+        if (read == record_size) {
+            for (Int32 i = 0; i < calculator.record_values; ++i) {
+                values[i] = read_float64(&record[i * sizeof(Float64)]);
+            }
+            run_batch_record(calculator, values, calculator.record_values, format);
+            ++records;
+        } else {
+            if (read != 0) {
+                std::cerr << "Error: Input ends inside a record (" << read << " of "
+                          << record_size << " bytes)\n";
+                return_code = truncated_input;
+            }
+            reading = false;
+        }
+    }
+
+    return return_code;  // Single exit point
+}
+
+// Stream records from stdin to stdout and report the throughput on stderr
+// AV Rule 113: Single exit point
+inline Int32 run_batch(const char* program_name, const Calculator& calculator, bool binary_input,
+                       const OutputFormat& format) {
+    static char input_buffer[batch_input_buffer_size];
+
+    // Buffer both streams: output is flushed once at the end, not per record
+    std::ios::sync_with_stdio(false);
+    std::setvbuf(stdin, input_buffer, _IOFBF, batch_input_buffer_size);
+
+    Int64 records = 0;
+    std::chrono::steady_clock::time_point start = std::chrono::steady_clock::now();
+    Int32 return_code = binary_input ? batch_binary(calculator, format, records)
+                                     : batch_csv(calculator, format, records);
+    std::cout << std::flush;
+    std::chrono::duration<Float64> elapsed = std::chrono::steady_clock::now() - start;
+
+    Float64 seconds = elapsed.count();
+    Float64 rate = seconds > 0.0 ? static_cast<Float64>(records) / seconds : 0.0;
+    std::cerr << program_name << ": " << records << " records in " << std::fixed
+              << std::setprecision(3) << seconds << " s (" << std::setprecision(0) << rate
+              << " records/s)\n";
+
+    return return_code;  // Single exit point
+}
+
+// Take a leading "<name> <integer>" option off a command line, for options a
+// calculator handles itself before run_calculator() (flight_calculator's
+// --ias-window). Without the option nothing changes. With it, value is set
+// and argv[0] moves over the option, so argc/argv describe the command line
+// without it.
+// Returns false if the option's value is missing or not an integer
+// AV Rule 113: Single exit point
+inline bool take_int_option(const char* name, Int32& argc, char**& argv, Int32& value) {
+    bool valid = true;  // Single exit point variable
+
+    if (argc >= 2 && std::strcmp(argv[1], name) == 0) {
+        valid = argc >= 3;
+        if (valid) {
+            const char* text = argv[2];
+            const char* end = text + std::strlen(text);
+            std::from_chars_result parsed = std::from_chars(text, end, value);
+            valid = parsed.ec == std::errc() && parsed.ptr == end;
+        }
+        if (valid) {
+            argv[2] = argv[0];
+            argv += 2;
+            argc -= 2;
+        }
+    }
+
+    return valid;  // Single exit point
+}
+
+// Describe the modes of run_calculator() at the end of a calculator's usage
+inline void print_modes_usage(const char* program_name) {
+    std::cerr << "\nModes:\n";
+    std::cerr << "  " << program_name << " --binary <arguments>                 one binary record\n";
+    std::cerr << "  " << program_name << " --serve [--binary]                   one request per stdin line\n";
+    std::cerr << "  " << program_name << " --batch [--binary-input] [--binary]  records streamed from stdin\n";
+    std::cerr << "Batch throughput is set by the output format: JSON lines reach about\n";
+    std::cerr << "0.1-0.5 million records/s, binary records 4-5 times as many. Use\n";
+    std::cerr << "--batch --binary for large offline jobs.\n";
+}
+
+// Run a calculator from its command line:
+//   <arguments>                              one request, indented JSON
+//   --binary <arguments>                     one request, binary record
+//   --serve [--binary]                       requests from stdin
+//   --batch [--binary-input] [--binary]      records streamed from stdin
+// AV Rule 113: Single exit point
+inline Int32 run_calculator(Int32 argc, const char* const argv[], const Calculator& calculator) {
+    Int32 return_code = request_success;  // Single exit point variable
+    bool serve = (argc == 2 || argc == 3) && std::strcmp(argv[1], "--serve") == 0;
+    bool batch = argc >= 2 && std::strcmp(argv[1], "--batch") == 0;
+    Int32 binary_flag = serve ? 2 : 1;
+    bool binary = argc > binary_flag && std::strcmp(argv[binary_flag], "--binary") == 0;
+
+    if (batch) {
+        // Options in any order
+        bool binary_input = false;
+        bool binary_output = false;
+        bool valid = true;
+        for (Int32 i = 2; i < argc; ++i) {
+            if (std::strcmp(argv[i], "--binary-input") == 0) {
+                binary_input = true;
+            } else if (std::strcmp(argv[i], "--binary") == 0) {
+                binary_output = true;
+            } else {
+                std::cerr << "Error: Unknown batch option " << argv[i] << "\n";
+                valid = false;
+            }
+        }
+        if (valid) {
+            return_code = run_batch(argv[0], calculator, binary_input,
+                                    binary_output ? binary_records : json_single_line);
+        } else {
+            return_code = invalid_option;
+        }
+    } else if (serve && (argc == 2 || binary)) {
+        return_code = serve_requests(argv[0], calculator.id, calculator.run_request,
+                                     binary ? binary_records : json_single_line);
+    } else if (binary && argc <= max_request_args) {
+        // Same request without the --binary flag
+        const char* request_argv[max_request_args];
+        request_argv[0] = argv[0];
+        for (Int32 i = 2; i < argc; ++i) {
+            request_argv[i - 1] = argv[i];
+        }
+        return_code = calculator.run_request(argc - 1, request_argv, binary_records);
+    } else if (binary) {
+        return_code = request_too_long;
+    } else {
+        return_code = calculator.run_request(argc, argv, json_pretty);
+    }
+
+    return return_code;  // Single exit point
+}
+
+} // namespace xplane_mfd::calc
+
+#endif // CALC_SERVE_H
@@ -0,0 +1,436 @@
+// Combined Calculator for X-Plane MFD
+// JSF AV C++ Coding Standard Compliant Version
+// 
+// Runs every calculation the MFD shows from one set of inputs:
+// - Wind vector, envelope margins, energy state and glide reach (flight_calculator)
+// - Turn performance for the given course change (turn_calculator)
+// - VNAV to the given constraint (vnav_calculator)
+// - Density altitude and performance (density_altitude_calculator)
+// 
+// One request replaces the four per-calculator requests the MFD makes each
+// tick. The calculations themselves are the ones in the individual
+// calculators, linked in through their C interface (mfd_calc.h).
+// 
+// JSF Compliance:
+// - AV Rule 208: No exceptions (throw/catch/try)
+// - AV Rule 209: Fixed-width types (Int32, Float64)
+// - AV Rule 206: No dynamic memory allocation
+// - AV Rule 119: No recursion
+// - AV Rule 52: Constants in lowercase
+// - AV Rule 113: Single exit point
+// - AV Rule 126: C++ style comments only (//)
+// 
+// Compile: make compute_all_calculator   (links the other calculators)
+// 
+// Usage: ./compute_all_calculator <tas_kts> <gs_kts> <heading> <track> <ias_kts> <mach>
+//            <altitude_ft> <agl_ft> <vs_fpm> <weight_kg> <bank_deg> <vso_kts> <vne_kts> <mmo>
+//            <oat_celsius> <course_change_deg> <target_alt_ft> <distance_nm> [force_error]
+//        ./compute_all_calculator --binary <args...>   (binary record, see calc_binary.h)
+//        ./compute_all_calculator --serve [--binary]   (one request per line on stdin, see calc_serve.h)
+//        ./compute_all_calculator --batch [--binary-input] [--binary]   (streamed records, see calc_serve.h)
+//        ./compute_all_calculator --ias-window N <any of the above>   (gust factor window, as flight_calculator)
+
+#include <iostream>
+#include <cmath>
+#include <cstdlib>
+#include "jsf_types.h"
+#include "calc_serve.h"
+#include "mfd_calc.h"
+
+namespace xplane_mfd::calc {
+
+// Internal linkage: every calculator is also linked into libmfd_calc
+namespace {
+
+// Error codes (AV Rule 52: lowercase constants)
+const Int32 error_success = 0;
+const Int32 error_invalid_args = 1;
+const Int32 error_parse_failed = 2;
+
+#ifndef XPLANE_MFD_LIBRARY
+// Number of required / optional request arguments
+const Int32 required_args = 18;
+const Int32 optional_args = 1;
+
+// JSF-compliant parse functions
+bool parse_float64(const char* str, Float64& result) {
+    char* end = nullptr;
+    result = strtod(str, &end);
+    return (end != str && *end == '\0');
+}
+
+bool parse_int32(const char* str, Int32& result) {
+    char* end = nullptr;
+    long value = strtol(str, &end, 10);
+    bool parsed = (end != str && *end == '\0');
+    if (parsed) {
+        result = static_cast<Int32>(value);
+    }
+    return parsed;
+}
+
+// Write {"error": <code>} in place of a part that failed
+void print_error_section(Int32 status) {
+    std::cout << "{\"error\": " << status << "}";
+}
+
+// Output every result as JSON - one member per calculator, with the same
+// content the calculator prints on its own
+void print_json(const MfdAllResults& results, const OutputFormat& format) {
+    const char* nl = format.newline;
+    const char* in = format.indent;
+    std::cout << "{" << nl;
+    
+    // Flight (wind, envelope, energy, glide)
+    std::cout << in << "\"flight\": ";
+    if (results.flight_status != error_success) {
+        print_error_section(results.flight_status);
+    } else {
+        std::cout << "{" << nl;
+        std::cout << in << in << "\"wind\": {" << nl;
+        std::cout << in << in << in << "\"speed_kts\": " << fixed2(results.wind.speed_kts) << "," << nl;
+        std::cout << in << in << in << "\"direction_from\": " << fixed2(results.wind.direction_from) << "," << nl;
+        std::cout << in << in << in << "\"headwind\": " << fixed2(results.wind.headwind) << "," << nl;
+        std::cout << in << in << in << "\"crosswind\": " << fixed2(results.wind.crosswind) << "," << nl;
+        std::cout << in << in << in << "\"gust_factor\": " << fixed2(results.wind.gust_factor) << nl;
+        std::cout << in << in << "}," << nl;
+        std::cout << in << in << "\"envelope\": {" << nl;
+        std::cout << in << in << in << "\"stall_margin_pct\": " << fixed2(results.envelope.stall_margin_pct) << "," << nl;
+        std::cout << in << in << in << "\"vmo_margin_pct\": " << fixed2(results.envelope.vmo_margin_pct) << "," << nl;
+        std::cout << in << in << in << "\"mmo_margin_pct\": " << fixed2(results.envelope.mmo_margin_pct) << "," << nl;
+        std::cout << in << in << in << "\"min_margin_pct\": " << fixed2(results.envelope.min_margin_pct) << "," << nl;
+        std::cout << in << in << in << "\"load_factor\": " << fixed2(results.envelope.load_factor) << "," << nl;
+        std::cout << in << in << in << "\"corner_speed_kts\": " << fixed2(results.envelope.corner_speed_kts) << nl;
+        std::cout << in << in << "}," << nl;
+        std::cout << in << in << "\"energy\": {" << nl;
+        std::cout << in << in << in << "\"specific_energy_ft\": " << fixed2(results.energy.specific_energy_ft) << "," << nl;
+        std::cout << in << in << in << "\"energy_rate_kts\": " << fixed2(results.energy.energy_rate_kts) << "," << nl;
+        std::cout << in << in << in << "\"trend\": " << results.energy.trend << nl;
+        std::cout << in << in << "}," << nl;
+        std::cout << in << in << "\"glide\": {" << nl;
+        std::cout << in << in << in << "\"still_air_range_nm\": " << fixed2(results.glide.still_air_range_nm) << "," << nl;
+        std::cout << in << in << in << "\"wind_adjusted_range_nm\": " << fixed2(results.glide.wind_adjusted_range_nm) << "," << nl;
+        std::cout << in << in << in << "\"glide_ratio\": " << fixed2(results.glide.glide_ratio) << "," << nl;
+        std::cout << in << in << in << "\"best_glide_speed_kts\": " << fixed2(results.glide.best_glide_speed_kts) << nl;
+        std::cout << in << in << "}" << nl;
+        std::cout << in << "}";
+    }
+    std::cout << "," << nl;
+    
+    // Turn
+    std::cout << in << "\"turn\": ";
+    if (results.turn_status != error_success) {
+        print_error_section(results.turn_status);
+    } else {
+        std::cout << "{" << nl;
+        std::cout << in << in << "\"radius_nm\": " << fixed2(results.turn.radius_nm) << "," << nl;
+        std::cout << in << in << "\"radius_ft\": " << fixed2(results.turn.radius_ft) << "," << nl;
+        std::cout << in << in << "\"turn_rate_dps\": " << fixed2(results.turn.turn_rate_dps) << "," << nl;
+        std::cout << in << in << "\"lead_distance_nm\": " << fixed2(results.turn.lead_distance_nm) << "," << nl;
+        std::cout << in << in << "\"lead_distance_ft\": " << fixed2(results.turn.lead_distance_ft) << "," << nl;
+        std::cout << in << in << "\"time_to_turn_sec\": " << fixed2(results.turn.time_to_turn_sec) << "," << nl;
+        std::cout << in << in << "\"load_factor\": " << fixed2(results.turn.load_factor) << "," << nl;
+        std::cout << in << in << "\"standard_rate_bank\": " << fixed2(results.turn.standard_rate_bank) << nl;
+        std::cout << in << "}";
+    }
+    std::cout << "," << nl;
+    
+    // VNAV
+    std::cout << in << "\"vnav\": ";
+    if (results.vnav_status != error_success) {
+        print_error_section(results.vnav_status);
+    } else {
+        std::cout << "{" << nl;
+        std::cout << in << in << "\"altitude_to_lose_ft\": " << fixed2(results.vnav.altitude_to_lose_ft) << "," << nl;
+        std::cout << in << in << "\"flight_path_angle_deg\": " << fixed2(results.vnav.flight_path_angle_deg) << "," << nl;
+        std::cout << in << in << "\"required_vs_fpm\": " << fixed2(results.vnav.required_vs_fpm) << "," << nl;
+        std::cout << in << in << "\"tod_distance_nm\": " << fixed2(results.vnav.tod_distance_nm) << "," << nl;
+        std::cout << in << in << "\"time_to_constraint_min\": " << fixed2(results.vnav.time_to_constraint_min) << "," << nl;
+        std::cout << in << in << "\"distance_per_1000ft\": " << fixed2(results.vnav.distance_per_1000ft) << "," << nl;
+        std::cout << in << in << "\"vs_for_3deg\": " << fixed2(results.vnav.vs_for_3deg) << "," << nl;
+        std::cout << in << in << "\"is_descent\": " << (results.vnav.is_descent != 0 ? "true" : "false") << nl;
+        std::cout << in << "}";
+    }
+    std::cout << "," << nl;
+    
+    // Density altitude
+    std::cout << in << "\"density_altitude\": ";
+    if (results.density_altitude_status != error_success) {
+        print_error_section(results.density_altitude_status);
+    } else {
+        const MfdDensityAltitude& da = results.density_altitude;
+        std::cout << "{" << nl;
+        std::cout << in << in << "\"density_altitude_ft\": " << fixed2(da.density_altitude_ft) << "," << nl;
+        std::cout << in << in << "\"pressure_altitude_ft\": " << fixed2(da.pressure_altitude_ft) << "," << nl;
+        std::cout << in << in << "\"air_density_ratio\": " << fixed2(da.air_density_ratio) << "," << nl;
+        std::cout << in << in << "\"temperature_deviation_c\": " << fixed2(da.temperature_deviation_c) << "," << nl;
+        std::cout << in << in << "\"performance_loss_pct\": " << fixed2(da.performance_loss_pct) << "," << nl;
+        std::cout << in << in << "\"eas_kts\": " << fixed2(da.eas_kts) << "," << nl;
+        std::cout << in << in << "\"tas_to_ias_ratio\": " << fixed2(da.tas_to_ias_ratio) << "," << nl;
+        std::cout << in << in << "\"pressure_ratio\": " << fixed2(da.pressure_ratio) << nl;
+        std::cout << in << "}";
+    }
+    std::cout << nl;
+    
+    std::cout << "}" << nl;
+}
+
+// Output every result as a binary record (MfdAllResults layout - parts that
+// failed are zero, see their status)
+void write_record(const MfdAllResults& results) {
+    write_record_header(calculator_id_compute_all, error_success);
+    
+    write_float64(results.wind.speed_kts);
+    write_float64(results.wind.direction_from);
+    write_float64(results.wind.headwind);
+    write_float64(results.wind.crosswind);
+    write_float64(results.wind.gust_factor);
+    
+    write_float64(results.envelope.stall_margin_pct);
+    write_float64(results.envelope.vmo_margin_pct);
+    write_float64(results.envelope.mmo_margin_pct);
+    write_float64(results.envelope.min_margin_pct);
+    write_float64(results.envelope.load_factor);
+    write_float64(results.envelope.corner_speed_kts);
+    
+    write_float64(results.energy.specific_energy_ft);
+    write_float64(results.energy.energy_rate_kts);
+    write_int32(results.energy.trend);
+    
+    write_float64(results.glide.still_air_range_nm);
+    write_float64(results.glide.wind_adjusted_range_nm);
+    write_float64(results.glide.glide_ratio);
+    write_float64(results.glide.best_glide_speed_kts);
+    
+    write_float64(results.turn.radius_nm);
+    write_float64(results.turn.radius_ft);
+    write_float64(results.turn.turn_rate_dps);
+    write_float64(results.turn.lead_distance_nm);
+    write_float64(results.turn.lead_distance_ft);
+    write_float64(results.turn.time_to_turn_sec);
+    write_float64(results.turn.load_factor);
+    write_float64(results.turn.standard_rate_bank);
+    
+    write_float64(results.vnav.altitude_to_lose_ft);
+    write_float64(results.vnav.flight_path_angle_deg);
+    write_float64(results.vnav.required_vs_fpm);
+    write_float64(results.vnav.tod_distance_nm);
+    write_float64(results.vnav.time_to_constraint_min);
+    write_float64(results.vnav.distance_per_1000ft);
+    write_float64(results.vnav.vs_for_3deg);
+    write_int32(results.vnav.is_descent);
+    
+    write_float64(results.density_altitude.density_altitude_ft);
+    write_float64(results.density_altitude.pressure_altitude_ft);
+    write_float64(results.density_altitude.air_density_ratio);
+    write_float64(results.density_altitude.temperature_deviation_c);
+    write_float64(results.density_altitude.performance_loss_pct);
+    write_float64(results.density_altitude.eas_kts);
+    write_float64(results.density_altitude.tas_to_ias_ratio);
+    write_float64(results.density_altitude.pressure_ratio);
+    
+    write_int32(results.flight_status);
+    write_int32(results.turn_status);
+    write_int32(results.vnav_status);
+    write_int32(results.density_altitude_status);
+}
+#endif // XPLANE_MFD_LIBRARY
+
+} // namespace
+
+} // namespace xplane_mfd::calc
+
+// C interface for libmfd_calc (see mfd_calc.h)
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_calc_all(
+    const MfdAllInputs* inputs,
+    const MfdIasHistory* ias_history,
+    MfdAllResults* results
+) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (inputs == nullptr || results == nullptr) {
+        return_code = error_invalid_args;
+    } else {
+        // 1. Flight: wind first, the glide reach needs its headwind
+        results->flight_status = mfd_calc_wind_vector(
+            inputs->tas_kts, inputs->gs_kts, inputs->heading_deg, inputs->track_deg,
+            ias_history, &results->wind
+        );
+        if (results->flight_status == error_success) {
+            results->flight_status = mfd_calc_envelope(
+                inputs->bank_deg, inputs->ias_kts, inputs->mach,
+                inputs->vso_kts, inputs->vne_kts, inputs->mmo, &results->envelope
+            );
+        }
+        if (results->flight_status == error_success) {
+            results->flight_status = mfd_calc_energy(
+                inputs->tas_kts, inputs->altitude_ft, inputs->vs_fpm, &results->energy
+            );
+        }
+        if (results->flight_status == error_success) {
+            results->flight_status = mfd_calc_glide_reach(
+                inputs->agl_ft, inputs->tas_kts, results->wind.headwind, &results->glide
+            );
+        }
+    
+        // 2. Turn (left and right banks turn alike)
+        results->turn_status = mfd_calc_turn_performance(
+            inputs->tas_kts, std::fabs(inputs->bank_deg), inputs->course_change_deg, &results->turn
+        );
+    
+        // 3. VNAV
+        results->vnav_status = mfd_calc_vnav(
+            inputs->altitude_ft, inputs->target_alt_ft, inputs->distance_nm,
+            inputs->gs_kts, inputs->vs_fpm, &results->vnav
+        );
+    
+        // 4. Density altitude
+        results->density_altitude_status = mfd_calc_density_altitude(
+            inputs->altitude_ft, inputs->oat_celsius, inputs->ias_kts, inputs->tas_kts,
+            inputs->force_error, &results->density_altitude
+        );
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Command line tool (not part of libmfd_calc)
+#ifndef XPLANE_MFD_LIBRARY
+
+void print_usage(const char* program_name) {
+    std::cerr << "Usage: " << program_name
+              << " <tas_kts> <gs_kts> <heading> <track> <ias_kts> <mach> <altitude_ft> <agl_ft>"
+              << " <vs_fpm> <weight_kg> <bank_deg> <vso_kts> <vne_kts> <mmo> <oat_celsius>"
+              << " <course_change_deg> <target_alt_ft> <distance_nm> [force_error]\n\n";
+    std::cerr << "Arguments:\n";
+    std::cerr << "  tas_kts ... mmo   : Same as flight_calculator\n";
+    std::cerr << "  oat_celsius       : Outside air temperature (°C)\n";
+    std::cerr << "  course_change_deg : Turn course change (degrees)\n";
+    std::cerr << "  target_alt_ft     : VNAV target altitude (feet)\n";
+    std::cerr << "  distance_nm       : VNAV distance to the target (nautical miles)\n";
+    std::cerr << "  force_error       : Optional, 1 to simulate a density altitude error (default: 0)\n\n";
+    std::cerr << "A part that fails is reported as {\"error\": <code>} with the exit code of\n";
+    std::cerr << "its calculator; the other parts are still calculated.\n";
+    xplane_mfd::calc::print_modes_usage(program_name);
+    xplane_mfd::calc::print_modes_usage(program_name);
+}
+
+// Values in a --batch record: the 18 required arguments and force_error
+// (optional in CSV rows)
+const Int32 batch_record_values = xplane_mfd::calc::required_args + xplane_mfd::calc::optional_args;
+
+// IAS of the requests or batch records so far, behind the gust factor
+// (AV Rule 206: static, allocated once)
+static MfdIasHistory ias_history;
+
+// Calculate and output the results of one request's values (batch mode and
+// the tail of run_request)
+// AV Rule 113: Single exit point
+Int32 run_values(const Float64 values[], Int32 count, const xplane_mfd::calc::OutputFormat& format) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (count != required_args && count != required_args + optional_args) {
+        return_code = error_invalid_args;
+    } else {
+        MfdAllInputs inputs;
+        inputs.tas_kts = values[0];
+        inputs.gs_kts = values[1];
+        inputs.heading_deg = values[2];
+        inputs.track_deg = values[3];
+        inputs.ias_kts = values[4];
+        inputs.mach = values[5];
+        inputs.altitude_ft = values[6];
+        inputs.agl_ft = values[7];
+        inputs.vs_fpm = values[8];
+        inputs.weight_kg = values[9];
+        inputs.bank_deg = values[10];
+        inputs.vso_kts = values[11];
+        inputs.vne_kts = values[12];
+        inputs.mmo = values[13];
+        inputs.oat_celsius = values[14];
+        inputs.course_change_deg = values[15];
+        inputs.target_alt_ft = values[16];
+        inputs.distance_nm = values[17];
+        inputs.force_error = (count > required_args && values[required_args] != 0.0) ? 1 : 0;
+    
+        // The gust factor covers the IAS of this and earlier requests
+        MfdAllResults results = {};  // Failed parts stay zero in binary records
+        return_code = mfd_ias_history_add(&ias_history, inputs.ias_kts);
+        if (return_code == error_success) {
+            return_code = mfd_calc_all(&inputs, &ias_history, &results);
+        }
+        if (return_code == error_success && format.binary) {
+            write_record(results);
+        } else if (return_code == error_success) {
+            print_json(results, format);
+        }
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Handle one request (command line or serve mode)
+// AV Rule 113: Single exit point
+Int32 run_request(Int32 argc, const char* const argv[], const xplane_mfd::calc::OutputFormat& format) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (argc != required_args + 1 && argc != required_args + optional_args + 1) {
+        print_usage(argv[0]);
+        return_code = error_invalid_args;
+    } else {
+        // Parse the inputs in MfdAllInputs field order
+        Float64 values[required_args + optional_args];
+        bool parse_success = true;
+    
+        for (Int32 i = 0; i < required_args && parse_success; ++i) {
+            parse_success = parse_float64(argv[i + 1], values[i]);
+        }
+    
+        Int32 force_error = 0;
+        if (argc == required_args + optional_args + 1) {
+            if (!parse_int32(argv[required_args + 1], force_error)) {
+                force_error = 0;
+            }
+        }
+        values[required_args] = static_cast<Float64>(force_error);
+    
+        if (!parse_success) {
+            std::cerr << "Error: Invalid numeric argument\n";
+            return_code = error_parse_failed;
+        } else {
+            return_code = run_values(values, required_args + optional_args, format);
+        }
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// AV Rule 113: Single exit point
+int main(int argc, char* argv[]) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    // [--ias-window N] first: samples behind the gust factor, as in flight_calculator
+    Int32 ias_window = mfd_default_ias_window;
+    if (!take_int_option("--ias-window", argc, argv, ias_window)
+        || mfd_ias_history_init(&ias_history, ias_window) != error_success) {
+        std::cerr << "Error: --ias-window takes 1 to " << mfd_max_ias_window << " samples\n";
+        return_code = error_invalid_args;
+    } else {
+        // [--binary] <arguments>, --serve [--binary] or --batch [--binary-input] [--binary]
+        const Calculator calculator = {calculator_id_compute_all, run_request, run_values, batch_record_values};
+        return_code = run_calculator(argc, argv, calculator);
+    }
+    
+    return return_code;  // Single exit point
+}
+
+#endif // XPLANE_MFD_LIBRARY
@@ -20,18 +20,25 @@
 // Compile: g++ -std=c++20 -O3 -o density_altitude_calculator density_altitude_calculator.cpp
 // 
 // Usage: ./density_altitude_calculator <pressure_alt_ft> <oat_celsius> <ias_kts> <tas_kts> [force_error]
+//        ./density_altitude_calculator --binary <args...>   (binary record, see calc_binary.h)
+//        ./density_altitude_calculator --serve [--binary]   (one request per line on stdin, see calc_serve.h)
+//        ./density_altitude_calculator --batch [--binary-input] [--binary]   (streamed records, see calc_serve.h)
 
 #include <iostream>
 #include <cmath>
-#include <iomanip>
 #include <cstring>
 #include <cstdlib>
 #include <vector>
 #include <memory>
 #include "jsf_types.h"
+#include "calc_serve.h"
+#include "mfd_calc.h"
 
 namespace xplane_mfd::calc {
 
+// Internal linkage: every calculator is also linked into libmfd_calc
+namespace {
+
 // Error codes (JSF-compliant error handling - no exceptions)
 const Int32 error_success = 0;
 const Int32 error_invalid_args = 1;
@@ -53,7 +60,8 @@ const Float64 max_altitude_ft = 60000.0;
 const Float64 min_temperature_c = -60.0;
 const Float64 max_temperature_c = 60.0;
 
-[[nodiscard]] double parse_double(std::string_view sv) {
+#ifndef XPLANE_MFD_LIBRARY
+[[nodiscard, maybe_unused]] double parse_double(std::string_view sv) {
     return std::stod(std::string(sv));
 }
 
@@ -73,6 +81,7 @@ bool parse_int32(const char* str, Int32& result) {
     }
     return false;
 }
+#endif // XPLANE_MFD_LIBRARY
 
 struct DensityAltitudeData {
     Float64 density_altitude_ft;      // Density altitude
@@ -170,23 +179,84 @@ DensityAltitudeData calculate_density_altitude_data(
     return result;
 }
 
+#ifndef XPLANE_MFD_LIBRARY
 // Output results as JSON
-void print_json(const DensityAltitudeData& da) {
-    std::cout << std::fixed << std::setprecision(2);
-    std::cout << "{\n";
-    std::cout << "  \"density_altitude_ft\": " << da.density_altitude_ft << ",\n";
-    std::cout << "  \"pressure_altitude_ft\": " << da.pressure_altitude_ft << ",\n";
-    std::cout << "  \"air_density_ratio\": " << da.air_density_ratio << ",\n";
-    std::cout << "  \"temperature_deviation_c\": " << da.temperature_deviation_c << ",\n";
-    std::cout << "  \"performance_loss_pct\": " << da.performance_loss_pct << ",\n";
-    std::cout << "  \"eas_kts\": " << da.eas_kts << ",\n";
-    std::cout << "  \"tas_to_ias_ratio\": " << da.tas_to_ias_ratio << ",\n";
-    std::cout << "  \"pressure_ratio\": " << da.pressure_ratio << "\n";
-    std::cout << "}\n";
+void print_json(const DensityAltitudeData& da, const OutputFormat& format) {
+    const char* nl = format.newline;
+    const char* in = format.indent;
+    std::cout << "{" << nl;
+    std::cout << in << "\"density_altitude_ft\": " << fixed2(da.density_altitude_ft) << "," << nl;
+    std::cout << in << "\"pressure_altitude_ft\": " << fixed2(da.pressure_altitude_ft) << "," << nl;
+    std::cout << in << "\"air_density_ratio\": " << fixed2(da.air_density_ratio) << "," << nl;
+    std::cout << in << "\"temperature_deviation_c\": " << fixed2(da.temperature_deviation_c) << "," << nl;
+    std::cout << in << "\"performance_loss_pct\": " << fixed2(da.performance_loss_pct) << "," << nl;
+    std::cout << in << "\"eas_kts\": " << fixed2(da.eas_kts) << "," << nl;
+    std::cout << in << "\"tas_to_ias_ratio\": " << fixed2(da.tas_to_ias_ratio) << "," << nl;
+    std::cout << in << "\"pressure_ratio\": " << fixed2(da.pressure_ratio) << nl;
+    std::cout << "}" << nl;
+}
+
+// Output results as a binary record (MfdDensityAltitude layout)
+void write_record(const DensityAltitudeData& da) {
+    write_record_header(calculator_id_density_altitude, error_success);
+    write_float64(da.density_altitude_ft);
+    write_float64(da.pressure_altitude_ft);
+    write_float64(da.air_density_ratio);
+    write_float64(da.temperature_deviation_c);
+    write_float64(da.performance_loss_pct);
+    write_float64(da.eas_kts);
+    write_float64(da.tas_to_ias_ratio);
+    write_float64(da.pressure_ratio);
 }
+#endif // XPLANE_MFD_LIBRARY
+
+} // namespace
 
 } // namespace xplane_mfd::calc
 
+// C interface for libmfd_calc (see mfd_calc.h)
+// Applies the same checks as the command line tool
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_calc_density_altitude(
+    Float64 pressure_altitude_ft,
+    Float64 oat_celsius,
+    Float64 ias_kts,
+    Float64 tas_kts,
+    Int32 force_error,
+    MfdDensityAltitude* result
+) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (result == nullptr) {
+        return_code = error_invalid_args;
+    } else if (force_error != 0) {
+        return_code = error_simulated;
+    } else if (pressure_altitude_ft < min_altitude_ft || pressure_altitude_ft > max_altitude_ft) {
+        return_code = error_parse_failed;
+    } else if (oat_celsius < min_temperature_c || oat_celsius > max_temperature_c) {
+        return_code = error_parse_failed;
+    } else {
+        DensityAltitudeData da = calculate_density_altitude_data(
+            pressure_altitude_ft, oat_celsius, ias_kts, tas_kts
+        );
+        result->density_altitude_ft = da.density_altitude_ft;
+        result->pressure_altitude_ft = da.pressure_altitude_ft;
+        result->air_density_ratio = da.air_density_ratio;
+        result->temperature_deviation_c = da.temperature_deviation_c;
+        result->performance_loss_pct = da.performance_loss_pct;
+        result->eas_kts = da.eas_kts;
+        result->tas_to_ias_ratio = da.tas_to_ias_ratio;
+        result->pressure_ratio = da.pressure_ratio;
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Command line tool (not part of libmfd_calc)
+#ifndef XPLANE_MFD_LIBRARY
+
 void print_usage(const char* program_name) {
     std::cerr << "Usage: " << program_name 
               << " <pressure_alt_ft> <oat_celsius> <ias_kts> <tas_kts> [force_error]\n\n";
@@ -199,9 +269,59 @@ void print_usage(const char* program_name) {
     std::cerr << "Example:\n";
     std::cerr << "  " << program_name << " 5000 25 150 170\n";
     std::cerr << "  (5000 ft PA, 25°C OAT, 150 kts IAS, 170 kts TAS)\n";
+    xplane_mfd::calc::print_modes_usage(program_name);
+    xplane_mfd::calc::print_modes_usage(program_name);
 }
 
-int main(int argc, char* argv[]) {
+// Values in a --batch record: pressure_alt_ft, oat_celsius, ias_kts, tas_kts,
+// force_error (optional in CSV rows)
+const Int32 batch_record_values = 5;
+
+// Validate one request's values, calculate and output the result (batch mode
+// and the tail of run_request)
+Int32 run_values(const Float64 values[], Int32 count, const xplane_mfd::calc::OutputFormat& format) {
+    using namespace xplane_mfd::calc;
+    
+    if (count != batch_record_values && count != batch_record_values - 1) {
+        return error_simulated;
+    }
+    
+    Float64 pressure_altitude_ft = values[0];
+    Float64 oat_celsius = values[1];
+    Float64 ias_kts = values[2];
+    Float64 tas_kts = values[3];
+    bool force_error = count == batch_record_values && values[4] != 0.0;
+    
+    if (force_error) {
+        return error_simulated;
+    }
+    
+    // Validate inputs against known ranges
+    if (pressure_altitude_ft < min_altitude_ft || pressure_altitude_ft > max_altitude_ft) {
+        std::cerr << "Warning: Pressure altitude outside typical range\n";
+        return error_parse_failed;
+    }
+    
+    if (oat_celsius < min_temperature_c || oat_celsius > max_temperature_c) {
+        std::cerr << "Warning: Temperature outside typical range\n";
+        return error_parse_failed;
+    }
+    
+    DensityAltitudeData da = calculate_density_altitude_data(
+        pressure_altitude_ft, oat_celsius, ias_kts, tas_kts
+    );
+    
+    if (format.binary) {
+        write_record(da);
+    } else {
+        print_json(da, format);
+    }
+    
+    return error_success;
+}
+
+// Handle one request (command line or serve mode)
+Int32 run_request(Int32 argc, const char* const argv[], const xplane_mfd::calc::OutputFormat& format) {
     using namespace xplane_mfd::calc;
     
     if (argc != 5 && argc != 6) {
@@ -230,26 +350,21 @@ int main(int argc, char* argv[]) {
         }
     }
     
-    if (force_error != 0) {
-        return error_simulated;
-    }
-    
-    // Validate inputs against known ranges
-    if (pressure_altitude_ft < min_altitude_ft || pressure_altitude_ft > max_altitude_ft) {
-        std::cerr << "Warning: Pressure altitude outside typical range\n";
-        return error_parse_failed;
-    }
-    
-    if (oat_celsius < min_temperature_c || oat_celsius > max_temperature_c) {
-        std::cerr << "Warning: Temperature outside typical range\n";
-        return error_parse_failed;
-    }
-    
-    DensityAltitudeData da = calculate_density_altitude_data(
-        pressure_altitude_ft, oat_celsius, ias_kts, tas_kts
-    );
+    const Float64 values[batch_record_values] = {
+        pressure_altitude_ft, oat_celsius, ias_kts, tas_kts, static_cast<Float64>(force_error)
+    };
+    return run_values(values, batch_record_values, format);
+}
+
+// AV Rule 113: Single exit point
+int main(int argc, char* argv[]) {
+    using namespace xplane_mfd::calc;
     
-    print_json(da);
+    // [--binary] <arguments>, --serve [--binary] or --batch [--binary-input] [--binary]
+    const Calculator calculator = {calculator_id_density_altitude, run_request, run_values, batch_record_values};
+    Int32 return_code = run_calculator(argc, argv, calculator);
     
-    return error_success;
+    return return_code;  // Single exit point
 }
+
+#endif // XPLANE_MFD_LIBRARY
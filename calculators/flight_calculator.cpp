@@ -17,20 +17,34 @@
 // - AV Rule 126: C++ style comments only (//)
 // 
 // Compile: g++ -std=c++20 -O3 -o flight_calculator flight_calculator.cpp
+// 
+// Usage: ./flight_calculator <tas_kts> <gs_kts> <heading> <track> <ias_kts> <mach> <altitude_ft>
+//                          <agl_ft> <vs_fpm> <weight_kg> <bank_deg> <vso_kts> <vne_kts> <mmo>
+//        ./flight_calculator --binary <args...>   (binary record, see calc_binary.h)
+//        ./flight_calculator --serve [--binary]   (one request per line on stdin, see calc_serve.h)
+//        ./flight_calculator --batch [--binary-input] [--binary]   (streamed records, see calc_serve.h)
+//        ./flight_calculator --ias-window N <any of the above>
+//
+// The gust factor is the standard deviation over the mean of the IAS of the
+// last N requests or batch records (default mfd_default_ias_window), so a
+// one-shot run reports 0.
 
 #include <iostream>
 #include <cmath>
 #include <algorithm>
-#include <iomanip>
 #include <numbers>
 #include <cstdlib>
-#include <array>
 #include <vector>
 #include <memory>
 #include "jsf_types.h"
+#include "calc_serve.h"
+#include "mfd_calc.h"
 
 namespace xplane_mfd::calc {
 
+// Internal linkage: every calculator is also linked into libmfd_calc
+namespace {
+
 // Error codes (AV Rule 52: lowercase)
 const Int32 error_success = 0;
 const Int32 error_invalid_args = 1;
@@ -45,9 +59,6 @@ const Float64 ft_to_m = 0.3048;
 const Float64 m_to_ft = 3.28084;
 const Float64 nm_to_ft = 6076.12;
 
-// Fixed-size array limit (AV Rule 206: no dynamic allocation)
-const Int32 max_ias_history = 20;
-
 // Calculation constants (AV Rule 151: no magic numbers)
 const Float64 angle_wrap = 360.0;
 const Float64 half_circle = 180.0;
@@ -64,12 +75,14 @@ const Float64 two_point_zero = 2.0;
 const Float64 hundred_percent = 100.0;
 const Float64 min_history_for_stats = 2.0;
 
+#ifndef XPLANE_MFD_LIBRARY
 // JSF-compliant parse function
 bool parse_float64(const char* str, Float64& result) {
     char* end = nullptr;
     result = strtod(str, &end);
     return (end != str && *end == '\0');
 }
+#endif // XPLANE_MFD_LIBRARY
 
 struct Vector2D {
     Float64 x, y;
@@ -97,6 +110,7 @@ Float64 normalize_angle(Float64 angle) {
     return result;
 }
 
+#ifndef XPLANE_MFD_LIBRARY
 /**
  * Iterative binomial coefficient calculation (n choose k)
  * Used for calculating combinations of alternate airports in flight planning
@@ -127,6 +141,7 @@ Float64 normalize_angle(Float64 angle) {
     }
     return result;
 }
+#endif // XPLANE_MFD_LIBRARY
 
 // 1. Wind vector calculation
 struct WindData {
@@ -137,14 +152,46 @@ struct WindData {
     Float64 gust_factor;
 };
 
+// Add a sample to an IAS history, the oldest one dropping out once the
+// window is full. The mean and sum of squared deviations follow in O(1)
+// (Welford's method, run backwards for the sample leaving the window).
+void add_ias_sample(MfdIasHistory& history, Float64 ias_kts) {
+    if (history.count < history.window) {
+        history.count += 1;
+        Float64 delta = ias_kts - history.mean;
+        history.mean += delta / history.count;
+        history.m2 += delta * (ias_kts - history.mean);
+    } else {
+        Float64 oldest = history.samples[history.next];
+        Float64 previous_mean = history.mean;
+        history.mean += (ias_kts - oldest) / history.count;
+        history.m2 += (ias_kts - oldest) * (ias_kts - history.mean + oldest - previous_mean);
+    }
+    // Rounding can leave a tiny negative sum for a steady IAS
+    if (history.m2 < 0.0) {
+        history.m2 = 0.0;
+    }
+    history.samples[history.next] = ias_kts;
+    history.next = (history.next + 1) % history.window;
+}
+
+// Standard deviation over mean of the samples in an IAS history (0 if empty,
+// or with no airspeed to compare against, e.g. parked)
+Float64 gust_factor(const MfdIasHistory* history) {
+    Float64 result = 0.0;
+    if (history != nullptr && history->count > 0 && history->mean > 0.0) {
+        result = sqrt(history->m2 / history->count) / history->mean;
+    }
+    return result;
+}
+
 // AV Rule 58: Long parameter lists formatted one per line
 WindData calculate_wind_vector(
     Float64 tas_kts,
     Float64 gs_kts,
     Float64 heading_deg,
     Float64 track_deg,
-    const Float64* ias_history,
-    Int32 history_size
+    const MfdIasHistory* ias_history
 ) {
     WindData result;
     
@@ -181,21 +228,8 @@ WindData calculate_wind_vector(
     result.headwind = -result.speed_kts * cos(wind_from_rad);
     result.crosswind = result.speed_kts * sin(wind_from_rad);
     
-    // Calculate gust factor from IAS history (fixed-size buffer, no dynamic allocation)
-    if (history_size > 0) {
-        Float64 sum_ias = 0.0;
-        Float64 sum_ias_sq = 0.0;
-        for (Int32 i = 0; i < history_size; ++i) {
-            sum_ias += ias_history[i];
-            sum_ias_sq += ias_history[i] * ias_history[i];
-        }
-        Float64 mean = sum_ias / history_size;
-        Float64 variance = (sum_ias_sq / history_size) - mean * mean;
-        Float64 std_dev = sqrt(variance);
-        result.gust_factor = std_dev / mean;
-    } else {
-        result.gust_factor = 0.0;
-    }
+    // Gust factor from the IAS history's running statistics (no pass over the samples)
+    result.gust_factor = gust_factor(ias_history);
     
     return result;
 }
@@ -304,90 +338,289 @@ GlideData calculate_glide_reach(Float64 agl_ft, Float64 tas_kts, Float64 headwin
     return result;
 }
 
+#ifndef XPLANE_MFD_LIBRARY
 // Output comprehensive JSON results
 void print_json_results(const WindData& wind, const EnvelopeMargins& envelope,
-                       const EnergyData& energy, const GlideData& glide) {
-    std::cout << std::fixed << std::setprecision(2);
-    std::cout << "{\n";
+                       const EnergyData& energy, const GlideData& glide,
+                       const OutputFormat& format) {
+    const char* nl = format.newline;
+    const char* in = format.indent;
+    std::cout << "{" << nl;
     
     // Wind
-    std::cout << "  \"wind\": {\n";
-    std::cout << "    \"speed_kts\": " << wind.speed_kts << ",\n";
-    std::cout << "    \"direction_from\": " << wind.direction_from << ",\n";
-    std::cout << "    \"headwind\": " << wind.headwind << ",\n";
-    std::cout << "    \"crosswind\": " << wind.crosswind << ",\n";
-    std::cout << "    \"gust_factor\": " << wind.gust_factor << "\n";
-    std::cout << "  },\n";
+    std::cout << in << "\"wind\": {" << nl;
+    std::cout << in << in << "\"speed_kts\": " << fixed2(wind.speed_kts) << "," << nl;
+    std::cout << in << in << "\"direction_from\": " << fixed2(wind.direction_from) << "," << nl;
+    std::cout << in << in << "\"headwind\": " << fixed2(wind.headwind) << "," << nl;
+    std::cout << in << in << "\"crosswind\": " << fixed2(wind.crosswind) << "," << nl;
+    std::cout << in << in << "\"gust_factor\": " << fixed2(wind.gust_factor) << nl;
+    std::cout << in << "}," << nl;
     
     // Envelope
-    std::cout << "  \"envelope\": {\n";
-    std::cout << "    \"stall_margin_pct\": " << envelope.stall_margin_pct << ",\n";
-    std::cout << "    \"vmo_margin_pct\": " << envelope.vmo_margin_pct << ",\n";
-    std::cout << "    \"mmo_margin_pct\": " << envelope.mmo_margin_pct << ",\n";
-    std::cout << "    \"min_margin_pct\": " << envelope.min_margin_pct << ",\n";
-    std::cout << "    \"load_factor\": " << envelope.load_factor << ",\n";
-    std::cout << "    \"corner_speed_kts\": " << envelope.corner_speed_kts << "\n";
-    std::cout << "  },\n";
+    std::cout << in << "\"envelope\": {" << nl;
+    std::cout << in << in << "\"stall_margin_pct\": " << fixed2(envelope.stall_margin_pct) << "," << nl;
+    std::cout << in << in << "\"vmo_margin_pct\": " << fixed2(envelope.vmo_margin_pct) << "," << nl;
+    std::cout << in << in << "\"mmo_margin_pct\": " << fixed2(envelope.mmo_margin_pct) << "," << nl;
+    std::cout << in << in << "\"min_margin_pct\": " << fixed2(envelope.min_margin_pct) << "," << nl;
+    std::cout << in << in << "\"load_factor\": " << fixed2(envelope.load_factor) << "," << nl;
+    std::cout << in << in << "\"corner_speed_kts\": " << fixed2(envelope.corner_speed_kts) << nl;
+    std::cout << in << "}," << nl;
     
     // Energy
-    std::cout << "  \"energy\": {\n";
-    std::cout << "    \"specific_energy_ft\": " << energy.specific_energy_ft << ",\n";
-    std::cout << "    \"energy_rate_kts\": " << energy.energy_rate_kts << ",\n";
-    std::cout << "    \"trend\": " << energy.trend << "\n";
-    std::cout << "  },\n";
+    std::cout << in << "\"energy\": {" << nl;
+    std::cout << in << in << "\"specific_energy_ft\": " << fixed2(energy.specific_energy_ft) << "," << nl;
+    std::cout << in << in << "\"energy_rate_kts\": " << fixed2(energy.energy_rate_kts) << "," << nl;
+    std::cout << in << in << "\"trend\": " << energy.trend << nl;
+    std::cout << in << "}," << nl;
     
     // Glide
-    std::cout << "  \"glide\": {\n";
-    std::cout << "    \"still_air_range_nm\": " << glide.still_air_range_nm << ",\n";
-    std::cout << "    \"wind_adjusted_range_nm\": " << glide.wind_adjusted_range_nm << ",\n";
-    std::cout << "    \"glide_ratio\": " << glide.glide_ratio << ",\n";
-    std::cout << "    \"best_glide_speed_kts\": " << glide.best_glide_speed_kts << "\n";
-    std::cout << "  },\n";
+    std::cout << in << "\"glide\": {" << nl;
+    std::cout << in << in << "\"still_air_range_nm\": " << fixed2(glide.still_air_range_nm) << "," << nl;
+    std::cout << in << in << "\"wind_adjusted_range_nm\": " << fixed2(glide.wind_adjusted_range_nm) << "," << nl;
+    std::cout << in << in << "\"glide_ratio\": " << fixed2(glide.glide_ratio) << "," << nl;
+    std::cout << in << in << "\"best_glide_speed_kts\": " << fixed2(glide.best_glide_speed_kts) << nl;
+    std::cout << in << "}," << nl;
     
     // Alternate airport combinations (JSF-compliant iterative binomial)
-    std::cout << "  \"alternate_airports\": {\n";
-    std::cout << "    \"combinations_5_choose_2\": " << binomial_coefficient(5, 2) << ",\n";
-    std::cout << "    \"combinations_10_choose_3\": " << binomial_coefficient(10, 3) << ",\n";
-    std::cout << "    \"note\": \"Iterative binomial calculation (JSF-compliant, no recursion)\"\n";
-    std::cout << "  }\n";
+    std::cout << in << "\"alternate_airports\": {" << nl;
+    std::cout << in << in << "\"combinations_5_choose_2\": " << binomial_coefficient(5, 2) << "," << nl;
+    std::cout << in << in << "\"combinations_10_choose_3\": " << binomial_coefficient(10, 3) << "," << nl;
+    std::cout << in << in << "\"note\": \"Iterative binomial calculation (JSF-compliant, no recursion)\"" << nl;
+    std::cout << in << "}" << nl;
     
-    std::cout << "}\n";
+    std::cout << "}" << nl;
+}
+
+// Output results as a binary record (MfdWindVector, MfdEnvelope, MfdEnergy,
+// MfdGlide layouts - the constant alternate airport counts are left out)
+void write_record(const WindData& wind, const EnvelopeMargins& envelope,
+                  const EnergyData& energy, const GlideData& glide) {
+    write_record_header(calculator_id_flight, error_success);
+    
+    write_float64(wind.speed_kts);
+    write_float64(wind.direction_from);
+    write_float64(wind.headwind);
+    write_float64(wind.crosswind);
+    write_float64(wind.gust_factor);
+    
+    write_float64(envelope.stall_margin_pct);
+    write_float64(envelope.vmo_margin_pct);
+    write_float64(envelope.mmo_margin_pct);
+    write_float64(envelope.min_margin_pct);
+    write_float64(envelope.load_factor);
+    write_float64(envelope.corner_speed_kts);
+    
+    write_float64(energy.specific_energy_ft);
+    write_float64(energy.energy_rate_kts);
+    write_int32(energy.trend);
+    
+    write_float64(glide.still_air_range_nm);
+    write_float64(glide.wind_adjusted_range_nm);
+    write_float64(glide.glide_ratio);
+    write_float64(glide.best_glide_speed_kts);
 }
+#endif // XPLANE_MFD_LIBRARY
+
+} // namespace
 
-// A JSF-compliant ring buffer for managing sensor history.
-// AV Rule 206: All memory is contained within the struct and is fixed at compile time.
-struct SensorHistoryBuffer {
-    //  The pre-allocated, fixed-size buffer.
-    std::array<Float64, max_ias_history> data;
+} // namespace xplane_mfd::calc
+
+// C interface for libmfd_calc (see mfd_calc.h)
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_ias_history_init(MfdIasHistory* history, Int32 window) {
+    using namespace xplane_mfd::calc;
     
-    Int32 head_index = 0; 
-    Int32 current_size = 0;
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (history == nullptr || window < 1 || window > mfd_max_ias_window) {
+        return_code = error_invalid_args;
+    } else {
+        history->mean = 0.0;
+        history->m2 = 0.0;
+        history->window = window;
+        history->count = 0;
+        history->next = 0;
+    }
+    
+    return return_code;  // Single exit point
+}
 
-    void add_reading(Float64 new_ias) {
-        data[head_index] = new_ias;
-        
-        // Move the head to the next position, wrapping around if necessary.
-        head_index = (head_index + 1) % max_ias_history;
-        
-        // The buffer size grows until it's full.
-        if (current_size < max_ias_history) {
-            current_size++;
-        }
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_ias_history_add(MfdIasHistory* history, Float64 ias_kts) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (history == nullptr || history->window < 1 || history->window > mfd_max_ias_window) {
+        return_code = error_invalid_args;
+    } else {
+        add_ias_sample(*history, ias_kts);
     }
+    
+    return return_code;  // Single exit point
+}
 
-    const Float64* get_data_ptr() const {
-        return data.data();
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_calc_wind_vector(
+    Float64 tas_kts,
+    Float64 gs_kts,
+    Float64 heading_deg,
+    Float64 track_deg,
+    const MfdIasHistory* ias_history,
+    MfdWindVector* result
+) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (result == nullptr) {
+        return_code = error_invalid_args;
+    } else {
+        WindData wind = calculate_wind_vector(tas_kts, gs_kts, heading_deg, track_deg, ias_history);
+        result->speed_kts = wind.speed_kts;
+        result->direction_from = wind.direction_from;
+        result->headwind = wind.headwind;
+        result->crosswind = wind.crosswind;
+        result->gust_factor = wind.gust_factor;
     }
     
-    Int32 get_size() const {
-        return current_size;
+    return return_code;  // Single exit point
+}
+
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_calc_envelope(
+    Float64 bank_deg,
+    Float64 ias_kts,
+    Float64 mach,
+    Float64 vso_kts,
+    Float64 vne_kts,
+    Float64 mmo,
+    MfdEnvelope* result
+) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (result == nullptr) {
+        return_code = error_invalid_args;
+    } else {
+        EnvelopeMargins envelope = calculate_envelope(bank_deg, ias_kts, mach, vso_kts, vne_kts, mmo);
+        result->stall_margin_pct = envelope.stall_margin_pct;
+        result->vmo_margin_pct = envelope.vmo_margin_pct;
+        result->mmo_margin_pct = envelope.mmo_margin_pct;
+        result->min_margin_pct = envelope.min_margin_pct;
+        result->load_factor = envelope.load_factor;
+        result->corner_speed_kts = envelope.corner_speed_kts;
     }
-};
+    
+    return return_code;  // Single exit point
+}
 
-} // namespace xplane_mfd::calc
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_calc_energy(Float64 tas_kts, Float64 altitude_ft, Float64 vs_fpm, MfdEnergy* result) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (result == nullptr) {
+        return_code = error_invalid_args;
+    } else {
+        EnergyData energy = calculate_energy(tas_kts, altitude_ft, vs_fpm);
+        result->specific_energy_ft = energy.specific_energy_ft;
+        result->energy_rate_kts = energy.energy_rate_kts;
+        result->trend = energy.trend;
+    }
+    
+    return return_code;  // Single exit point
+}
 
 // AV Rule 113: Single exit point
-int main(int argc, char* argv[]) {
+extern "C" Int32 mfd_calc_glide_reach(Float64 agl_ft, Float64 tas_kts, Float64 headwind_kts, MfdGlide* result) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (result == nullptr) {
+        return_code = error_invalid_args;
+    } else {
+        GlideData glide = calculate_glide_reach(agl_ft, tas_kts, headwind_kts);
+        result->still_air_range_nm = glide.still_air_range_nm;
+        result->wind_adjusted_range_nm = glide.wind_adjusted_range_nm;
+        result->glide_ratio = glide.glide_ratio;
+        result->best_glide_speed_kts = glide.best_glide_speed_kts;
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Command line tool (not part of libmfd_calc)
+#ifndef XPLANE_MFD_LIBRARY
+
+// Values in a --batch record: the 14 command line arguments in order
+const Int32 batch_record_values = 14;
+
+// IAS of the requests or batch records so far, behind the gust factor
+// (AV Rule 206: static, allocated once)
+static MfdIasHistory ias_history;
+
+// Calculate and output the result of one request's values (batch mode and
+// the tail of run_request)
+// AV Rule 113: Single exit point
+Int32 run_values(const Float64 values[], Int32 count, const xplane_mfd::calc::OutputFormat& format) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (count != batch_record_values) {
+        return_code = error_invalid_args;
+    } else {
+        const Float64 tas_kts = values[0];
+        const Float64 gs_kts = values[1];
+        const Float64 heading = values[2];
+        const Float64 track = values[3];
+        const Float64 ias_kts = values[4];
+        const Float64 mach = values[5];
+        const Float64 altitude_ft = values[6];
+        const Float64 agl_ft = values[7];
+        const Float64 vs_fpm = values[8];
+        // values[9] (weight_kg) is not used by the calculations
+        const Float64 bank_deg = values[10];
+        const Float64 vso_kts = values[11];
+        const Float64 vne_kts = values[12];
+        const Float64 mmo = values[13];
+        
+        // 1. Wind vector, the gust factor over the IAS of this and earlier requests
+        add_ias_sample(ias_history, ias_kts);
+        WindData wind = calculate_wind_vector(tas_kts, gs_kts, heading, track, &ias_history);
+        
+        // 2. Calculate envelope margins
+        EnvelopeMargins envelope = calculate_envelope(
+            bank_deg, ias_kts, mach,
+            vso_kts, vne_kts, mmo
+        );
+        
+        // 3. Calculate energy state
+        EnergyData energy = calculate_energy(tas_kts, altitude_ft, vs_fpm);
+        
+        // 4. Calculate glide reach
+        GlideData glide = calculate_glide_reach(agl_ft, tas_kts, wind.headwind);
+        
+        // Output JSON or a binary record
+        if (format.binary) {
+            write_record(wind, envelope, energy, glide);
+        } else {
+            print_json_results(wind, envelope, energy, glide, format);
+        }
+        
+        return_code = error_success;
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Handle one request (command line or serve mode)
+// AV Rule 113: Single exit point
+Int32 run_request(Int32 argc, const char* const argv[], const xplane_mfd::calc::OutputFormat& format) {
     using namespace xplane_mfd::calc;
     
     Int32 return_code = error_success;  // Single exit point variable
@@ -396,6 +629,7 @@ int main(int argc, char* argv[]) {
         std::cerr << "Usage: " << argv[0] << " <tas_kts> <gs_kts> <heading> <track> "
                   << "<ias_kts> <mach> <altitude_ft> <agl_ft> <vs_fpm> "
                   << "<weight_kg> <bank_deg> <vso_kts> <vne_kts> <mmo>\n";
+        print_modes_usage(argv[0]);
         return_code = error_invalid_args;
     } else {
         // Parse all inputs
@@ -440,39 +674,36 @@ int main(int argc, char* argv[]) {
             std::cerr << "Error: Invalid numeric argument\n";
             return_code = error_parse_failed;
         } else {
-            // 1. Pre-allocate the buffer at initialization (on the stack).
-            // This happens ONCE. No memory is allocated inside any loops.
-            SensorHistoryBuffer ias_buffer;
-
-            for (Int32 i = 0; i < 30; ++i) {
-                Float64 new_reading = 150.0 + (i % 7) - 3.0;
-                ias_buffer.add_reading(new_reading);
-            }
-
-            // Calculate wind vector using JSF-compliant fixed-size buffer
-            WindData wind = calculate_wind_vector(
-                tas_kts, gs_kts, heading, track,
-                ias_buffer.get_data_ptr(), ias_buffer.get_size()
-            );
-            
-            // 2. Calculate envelope margins
-            EnvelopeMargins envelope = calculate_envelope(
-                bank_deg, ias_kts, mach,
-                vso_kts, vne_kts, mmo
-            );
-            
-            // 3. Calculate energy state
-            EnergyData energy = calculate_energy(tas_kts, altitude_ft, vs_fpm);
-            
-            // 4. Calculate glide reach
-            GlideData glide = calculate_glide_reach(agl_ft, tas_kts, wind.headwind);
-            
-            // Output JSON
-            print_json_results(wind, envelope, energy, glide);
-            
-            return_code = error_success;
+            const Float64 values[batch_record_values] = {
+                tas_kts, gs_kts, heading, track, ias_kts, mach, altitude_ft, agl_ft,
+                vs_fpm, weight_kg, bank_deg, vso_kts, vne_kts, mmo
+            };
+            return_code = run_values(values, batch_record_values, format);
         }
     }
     
     return return_code;  // Single exit point
 }
+
+// AV Rule 113: Single exit point
+int main(int argc, char* argv[]) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    // [--ias-window N] first: samples behind the gust factor
+    Int32 ias_window = mfd_default_ias_window;
+    if (!take_int_option("--ias-window", argc, argv, ias_window)
+        || mfd_ias_history_init(&ias_history, ias_window) != error_success) {
+        std::cerr << "Error: --ias-window takes 1 to " << mfd_max_ias_window << " samples\n";
+        return_code = error_invalid_args;
+    } else {
+        // [--binary] <arguments>, --serve [--binary] or --batch [--binary-input] [--binary]
+        const Calculator calculator = {calculator_id_flight, run_request, run_values, batch_record_values};
+        return_code = run_calculator(argc, argv, calculator);
+    }
+    
+    return return_code;  // Single exit point
+}
+
+#endif // XPLANE_MFD_LIBRARY
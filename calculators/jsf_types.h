@@ -13,7 +13,11 @@
 #ifndef JSF_TYPES_H
 #define JSF_TYPES_H
 
+#ifdef __cplusplus
 #include <cstdint>
+#else
+#include <stdint.h>  // Also usable from C (see mfd_calc.h)
+#endif
 
 // Signed integer types (AV Rule 50: uppercase first letter)
 typedef int8_t   Int8;
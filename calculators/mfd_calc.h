@@ -0,0 +1,249 @@
+// C interface to the X-Plane MFD calculators (libmfd_calc)
+//
+// Every calculator is also compiled into one shared library so the MFD can
+// run the calculations in-process (Python ctypes) instead of going through
+// the command line tools. The interface is plain C: functions with C
+// linkage taking scalar inputs and filling caller-owned structs made of
+// fixed-width fields only.
+//
+// Each function returns the exit code the matching command line tool would
+// return for the same inputs (0 on success) and only writes the result on
+// success.
+//
+// JSF Compliance:
+// - AV Rule 208: No exceptions - error codes only
+// - AV Rule 209: Fixed-width types (Int32, Float64) via jsf_types.h
+// - AV Rule 206: No dynamic memory allocation - results go to caller-owned structs
+// - AV Rule 126: C++ style comments only (//)
+//
+// Build: make libmfd_calc   (libmfd_calc.so, libmfd_calc.dylib on macOS)
+
+#ifndef MFD_CALC_H
+#define MFD_CALC_H
+
+#include "jsf_types.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+// IAS history window limits (AV Rule 206: the history is a fixed-size struct)
+enum {
+    mfd_max_ias_window = 512,     // Largest window, in samples
+    mfd_default_ias_window = 50   // Default window: 2 s of the MFD's 25 Hz IAS readings
+};
+
+// flight_calculator: the last `window` IAS samples behind the gust factor.
+// Their mean and sum of squared deviations are updated as each sample comes
+// in and the oldest one drops out (Welford's method over a sliding window),
+// so adding a sample costs the same at any window length. Initialize with
+// mfd_ias_history_init() and only change through mfd_ias_history_add().
+typedef struct MfdIasHistory {
+    Float64 samples[mfd_max_ias_window];  // Ring buffer of the first `window` entries
+    Float64 mean;     // Mean of the samples held
+    Float64 m2;       // Sum of squared deviations from the mean
+    Int32 window;     // Samples kept (1 to mfd_max_ias_window)
+    Int32 count;      // Samples held (up to window)
+    Int32 next;       // Index the next sample is written to (the oldest once full)
+} MfdIasHistory;
+
+// flight_calculator: wind vector from TAS/heading and GS/track
+typedef struct MfdWindVector {
+    Float64 speed_kts;
+    Float64 direction_from;  // deg, where wind comes FROM
+    Float64 headwind;
+    Float64 crosswind;
+    Float64 gust_factor;
+} MfdWindVector;
+
+// flight_calculator: envelope margins
+typedef struct MfdEnvelope {
+    Float64 stall_margin_pct;
+    Float64 vmo_margin_pct;
+    Float64 mmo_margin_pct;
+    Float64 min_margin_pct;
+    Float64 load_factor;
+    Float64 corner_speed_kts;
+} MfdEnvelope;
+
+// flight_calculator: energy management
+typedef struct MfdEnergy {
+    Float64 specific_energy_ft;
+    Float64 energy_rate_kts;
+    Int32 trend;  // 1=increasing, 0=stable, -1=decreasing
+} MfdEnergy;
+
+// flight_calculator: glide reach
+typedef struct MfdGlide {
+    Float64 still_air_range_nm;
+    Float64 wind_adjusted_range_nm;
+    Float64 glide_ratio;
+    Float64 best_glide_speed_kts;
+} MfdGlide;
+
+// turn_calculator
+typedef struct MfdTurn {
+    Float64 radius_nm;
+    Float64 radius_ft;
+    Float64 turn_rate_dps;
+    Float64 lead_distance_nm;
+    Float64 lead_distance_ft;
+    Float64 time_to_turn_sec;
+    Float64 load_factor;
+    Float64 standard_rate_bank;
+} MfdTurn;
+
+// vnav_calculator
+typedef struct MfdVnav {
+    Float64 altitude_to_lose_ft;
+    Float64 flight_path_angle_deg;
+    Float64 required_vs_fpm;
+    Float64 tod_distance_nm;
+    Float64 time_to_constraint_min;
+    Float64 distance_per_1000ft;
+    Float64 vs_for_3deg;
+    Int32 is_descent;  // 1 if descending, 0 if climbing
+} MfdVnav;
+
+// density_altitude_calculator
+typedef struct MfdDensityAltitude {
+    Float64 density_altitude_ft;
+    Float64 pressure_altitude_ft;
+    Float64 air_density_ratio;
+    Float64 temperature_deviation_c;
+    Float64 performance_loss_pct;
+    Float64 eas_kts;
+    Float64 tas_to_ias_ratio;
+    Float64 pressure_ratio;
+} MfdDensityAltitude;
+
+// wind_calculator: components of a known wind
+typedef struct MfdWindComponents {
+    Float64 headwind;
+    Float64 crosswind;
+    Float64 total_wind;
+    Float64 wca;
+    Float64 drift;
+} MfdWindComponents;
+
+// compute_all_calculator: union of the inputs of every MFD calculation
+typedef struct MfdAllInputs {
+    Float64 tas_kts;
+    Float64 gs_kts;
+    Float64 heading_deg;
+    Float64 track_deg;
+    Float64 ias_kts;
+    Float64 mach;
+    Float64 altitude_ft;        // Also the pressure altitude for density altitude
+    Float64 agl_ft;
+    Float64 vs_fpm;
+    Float64 weight_kg;
+    Float64 bank_deg;           // Signed, the turn uses its magnitude
+    Float64 vso_kts;
+    Float64 vne_kts;
+    Float64 mmo;
+    Float64 oat_celsius;
+    Float64 course_change_deg;  // Turn
+    Float64 target_alt_ft;      // VNAV constraint
+    Float64 distance_nm;        // VNAV distance to the constraint
+    Int32 force_error;          // Density altitude, as in mfd_calc_density_altitude
+} MfdAllInputs;
+
+// compute_all_calculator: every MFD result, with the exit code of the
+// calculator that produced each part (a part is only written when its
+// status is 0)
+typedef struct MfdAllResults {
+    MfdWindVector wind;
+    MfdEnvelope envelope;
+    MfdEnergy energy;
+    MfdGlide glide;
+    MfdTurn turn;
+    MfdVnav vnav;
+    MfdDensityAltitude density_altitude;
+    Int32 flight_status;  // wind, envelope, energy and glide
+    Int32 turn_status;
+    Int32 vnav_status;
+    Int32 density_altitude_status;
+} MfdAllResults;
+
+// Empty a history and set its window (1 to mfd_max_ias_window samples)
+Int32 mfd_ias_history_init(MfdIasHistory* history, Int32 window);
+
+// Add an IAS sample, dropping the oldest one once the window is full
+Int32 mfd_ias_history_add(MfdIasHistory* history, Float64 ias_kts);
+
+// The gust factor is the standard deviation over the mean of ias_history
+// (0 when it is NULL or empty)
+// AV Rule 58: Long parameter lists formatted one per line
+Int32 mfd_calc_wind_vector(
+    Float64 tas_kts,
+    Float64 gs_kts,
+    Float64 heading_deg,
+    Float64 track_deg,
+    const MfdIasHistory* ias_history,
+    MfdWindVector* result
+);
+
+Int32 mfd_calc_envelope(
+    Float64 bank_deg,
+    Float64 ias_kts,
+    Float64 mach,
+    Float64 vso_kts,
+    Float64 vne_kts,
+    Float64 mmo,
+    MfdEnvelope* result
+);
+
+Int32 mfd_calc_energy(Float64 tas_kts, Float64 altitude_ft, Float64 vs_fpm, MfdEnergy* result);
+
+Int32 mfd_calc_glide_reach(Float64 agl_ft, Float64 tas_kts, Float64 headwind_kts, MfdGlide* result);
+
+Int32 mfd_calc_turn_performance(
+    Float64 tas_kts,
+    Float64 bank_deg,
+    Float64 course_change_deg,
+    MfdTurn* result
+);
+
+Int32 mfd_calc_vnav(
+    Float64 current_alt_ft,
+    Float64 target_alt_ft,
+    Float64 distance_nm,
+    Float64 groundspeed_kts,
+    Float64 current_vs_fpm,
+    MfdVnav* result
+);
+
+// force_error != 0 simulates a handled error (returns 3), like the CLI flag
+Int32 mfd_calc_density_altitude(
+    Float64 pressure_altitude_ft,
+    Float64 oat_celsius,
+    Float64 ias_kts,
+    Float64 tas_kts,
+    Int32 force_error,
+    MfdDensityAltitude* result
+);
+
+Int32 mfd_calc_wind_components(
+    Float64 track,
+    Float64 heading,
+    Float64 wind_dir,
+    Float64 wind_speed,
+    MfdWindComponents* result
+);
+
+// Every MFD calculation from one set of inputs. Returns 0 when the call
+// itself is valid - the status of each part is in the results. The gust
+// factor comes from ias_history as in mfd_calc_wind_vector (add the
+// current IAS to it first).
+Int32 mfd_calc_all(
+    const MfdAllInputs* inputs,
+    const MfdIasHistory* ias_history,
+    MfdAllResults* results
+);
+
+#ifdef __cplusplus
+} // extern "C"
+#endif
+
+#endif // MFD_CALC_H
@@ -20,17 +20,24 @@
 // Compile: g++ -std=c++20 -O3 -o turn_calculator turn_calculator.cpp
 // 
 // Usage: ./turn_calculator <tas_kts> <bank_deg> <course_change_deg>
+//        ./turn_calculator --binary <args...>   (binary record, see calc_binary.h)
+//        ./turn_calculator --serve [--binary]   (one request per line on stdin, see calc_serve.h)
+//        ./turn_calculator --batch [--binary-input] [--binary]   (streamed records, see calc_serve.h)
 
 #include <iostream>
 #include <cmath>
-#include <iomanip>
 #include <cstdlib>
 #include <numbers>
 #include <vector>
 #include "jsf_types.h"
+#include "calc_serve.h"
+#include "mfd_calc.h"
 
 namespace xplane_mfd::calc {
 
+// Internal linkage: every calculator is also linked into libmfd_calc
+namespace {
+
 // Error codes (AV Rule 52: lowercase constants)
 const Int32 error_success = 0;
 const Int32 error_invalid_args = 1;
@@ -54,12 +61,14 @@ const Float64 min_turn_rate_threshold = 0.01;
 const Float64 meters_per_nm = 1852.0;
 const Float64 feet_per_meter = 3.28084;
 
+#ifndef XPLANE_MFD_LIBRARY
 // JSF-compliant parse function
 bool parse_float64(const char* str, Float64& result) {
     char* end = nullptr;
     result = strtod(str, &end);
     return (end != str && *end == '\0');
 }
+#endif // XPLANE_MFD_LIBRARY
 
 struct TurnData {
     Float64 radius_nm;           // Turn radius in nautical miles
@@ -126,23 +135,77 @@ TurnData calculate_turn_performance(Float64 tas_kts, Float64 bank_deg, Float64 c
     return result;
 }
 
+#ifndef XPLANE_MFD_LIBRARY
 // Output results as JSON
-void print_json(const TurnData& turn) {
-    std::cout << std::fixed << std::setprecision(2);
-    std::cout << "{\n";
-    std::cout << "  \"radius_nm\": " << turn.radius_nm << ",\n";
-    std::cout << "  \"radius_ft\": " << turn.radius_ft << ",\n";
-    std::cout << "  \"turn_rate_dps\": " << turn.turn_rate_dps << ",\n";
-    std::cout << "  \"lead_distance_nm\": " << turn.lead_distance_nm << ",\n";
-    std::cout << "  \"lead_distance_ft\": " << turn.lead_distance_ft << ",\n";
-    std::cout << "  \"time_to_turn_sec\": " << turn.time_to_turn_sec << ",\n";
-    std::cout << "  \"load_factor\": " << turn.load_factor << ",\n";
-    std::cout << "  \"standard_rate_bank\": " << turn.standard_rate_bank << "\n";
-    std::cout << "}\n";
+void print_json(const TurnData& turn, const OutputFormat& format) {
+    const char* nl = format.newline;
+    const char* in = format.indent;
+    std::cout << "{" << nl;
+    std::cout << in << "\"radius_nm\": " << fixed2(turn.radius_nm) << "," << nl;
+    std::cout << in << "\"radius_ft\": " << fixed2(turn.radius_ft) << "," << nl;
+    std::cout << in << "\"turn_rate_dps\": " << fixed2(turn.turn_rate_dps) << "," << nl;
+    std::cout << in << "\"lead_distance_nm\": " << fixed2(turn.lead_distance_nm) << "," << nl;
+    std::cout << in << "\"lead_distance_ft\": " << fixed2(turn.lead_distance_ft) << "," << nl;
+    std::cout << in << "\"time_to_turn_sec\": " << fixed2(turn.time_to_turn_sec) << "," << nl;
+    std::cout << in << "\"load_factor\": " << fixed2(turn.load_factor) << "," << nl;
+    std::cout << in << "\"standard_rate_bank\": " << fixed2(turn.standard_rate_bank) << nl;
+    std::cout << "}" << nl;
+}
+
+// Output results as a binary record (MfdTurn layout)
+void write_record(const TurnData& turn) {
+    write_record_header(calculator_id_turn, error_success);
+    write_float64(turn.radius_nm);
+    write_float64(turn.radius_ft);
+    write_float64(turn.turn_rate_dps);
+    write_float64(turn.lead_distance_nm);
+    write_float64(turn.lead_distance_ft);
+    write_float64(turn.time_to_turn_sec);
+    write_float64(turn.load_factor);
+    write_float64(turn.standard_rate_bank);
 }
+#endif // XPLANE_MFD_LIBRARY
+
+} // namespace
 
 } // namespace xplane_mfd::calc
 
+// C interface for libmfd_calc (see mfd_calc.h)
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_calc_turn_performance(
+    Float64 tas_kts,
+    Float64 bank_deg,
+    Float64 course_change_deg,
+    MfdTurn* result
+) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (result == nullptr) {
+        return_code = error_invalid_args;
+    } else if (tas_kts <= 0.0) {
+        return_code = error_invalid_value;
+    } else if (bank_deg < 0.0 || bank_deg > 90.0) {
+        return_code = error_invalid_value;
+    } else {
+        TurnData turn = calculate_turn_performance(tas_kts, bank_deg, course_change_deg);
+        result->radius_nm = turn.radius_nm;
+        result->radius_ft = turn.radius_ft;
+        result->turn_rate_dps = turn.turn_rate_dps;
+        result->lead_distance_nm = turn.lead_distance_nm;
+        result->lead_distance_ft = turn.lead_distance_ft;
+        result->time_to_turn_sec = turn.time_to_turn_sec;
+        result->load_factor = turn.load_factor;
+        result->standard_rate_bank = turn.standard_rate_bank;
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Command line tool (not part of libmfd_calc)
+#ifndef XPLANE_MFD_LIBRARY
+
 void print_usage(const char* program_name) {
     std::cerr << "Usage: " << program_name 
               << " <tas_kts> <bank_deg> <course_change_deg>\n\n";
@@ -153,10 +216,45 @@ void print_usage(const char* program_name) {
     std::cerr << "Example:\n";
     std::cerr << "  " << program_name << " 250 25 90\n";
     std::cerr << "  (250 kts TAS, 25° bank, 90° turn)\n";
+    xplane_mfd::calc::print_modes_usage(program_name);
 }
 
+// Values in a --batch record: tas_kts, bank_deg, course_change_deg
+const Int32 batch_record_values = 3;
+
+// Validate one request's values, calculate and output the result (batch mode
+// and the tail of run_request)
 // AV Rule 113: Single exit point
-int main(int argc, char* argv[]) {
+Int32 run_values(const Float64 values[], Int32 count, const xplane_mfd::calc::OutputFormat& format) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (count != batch_record_values) {
+        return_code = error_invalid_args;
+    } else if (values[0] <= 0.0) {
+        std::cerr << "Error: TAS must be positive\n";
+        return_code = error_invalid_value;
+    } else if (values[1] < 0.0 || values[1] > 90.0) {
+        std::cerr << "Error: Bank angle must be between 0 and 90 degrees\n";
+        return_code = error_invalid_value;
+    } else {
+        // All inputs valid - calculate and output
+        TurnData turn = calculate_turn_performance(values[0], values[1], values[2]);
+        if (format.binary) {
+            write_record(turn);
+        } else {
+            print_json(turn, format);
+        }
+        return_code = error_success;
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Handle one request (command line or serve mode)
+// AV Rule 113: Single exit point
+Int32 run_request(Int32 argc, const char* const argv[], const xplane_mfd::calc::OutputFormat& format) {
     using namespace xplane_mfd::calc;
     
     Int32 return_code = error_success;  // Single exit point variable
@@ -180,19 +278,24 @@ int main(int argc, char* argv[]) {
         } else if (!parse_float64(argv[3], course_change_deg)) {
             std::cerr << "Error: Invalid course change\n";
             return_code = error_parse_failed;
-        } else if (tas_kts <= 0.0) {
-            std::cerr << "Error: TAS must be positive\n";
-            return_code = error_invalid_value;
-        } else if (bank_deg < 0.0 || bank_deg > 90.0) {
-            std::cerr << "Error: Bank angle must be between 0 and 90 degrees\n";
-            return_code = error_invalid_value;
         } else {
-            // All inputs valid - calculate and output
-            TurnData turn = calculate_turn_performance(tas_kts, bank_deg, course_change_deg);
-            print_json(turn);
-            return_code = error_success;
+            const Float64 values[batch_record_values] = {tas_kts, bank_deg, course_change_deg};
+            return_code = run_values(values, batch_record_values, format);
         }
     }
     
     return return_code;  // Single exit point
 }
+
+// AV Rule 113: Single exit point
+int main(int argc, char* argv[]) {
+    using namespace xplane_mfd::calc;
+    
+    // [--binary] <arguments>, --serve [--binary] or --batch [--binary-input] [--binary]
+    const Calculator calculator = {calculator_id_turn, run_request, run_values, batch_record_values};
+    Int32 return_code = run_calculator(argc, argv, calculator);
+    
+    return return_code;  // Single exit point
+}
+
+#endif // XPLANE_MFD_LIBRARY
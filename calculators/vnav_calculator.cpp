@@ -19,17 +19,24 @@
 // Compile: g++ -std=c++20 -O3 -o vnav_calculator vnav_calculator.cpp
 // 
 // Usage: ./vnav_calculator <current_alt_ft> <target_alt_ft> <distance_nm> <groundspeed_kts> <current_vs_fpm>
+//        ./vnav_calculator --binary <args...>   (binary record, see calc_binary.h)
+//        ./vnav_calculator --serve [--binary]   (one request per line on stdin, see calc_serve.h)
+//        ./vnav_calculator --batch [--binary-input] [--binary]   (streamed records, see calc_serve.h)
 
 #include <iostream>
 #include <cmath>
-#include <iomanip>
 #include <cstdlib>
 #include <numbers>
 #include <vector>
 #include "jsf_types.h"
+#include "calc_serve.h"
+#include "mfd_calc.h"
 
 namespace xplane_mfd::calc {
 
+// Internal linkage: every calculator is also linked into libmfd_calc
+namespace {
+
 // Error codes (AV Rule 52: lowercase)
 const Int32 error_success = 0;
 const Int32 error_invalid_args = 1;
@@ -50,12 +57,14 @@ const Float64 infinite_time = 999.9;
 const Float64 zero_distance = 0.0;
 const Float64 thousand_feet = 1000.0;
 
+#ifndef XPLANE_MFD_LIBRARY
 // JSF-compliant parse function
 bool parse_float64(const char* str, Float64& result) {
     char* end = nullptr;
     result = strtod(str, &end);
     return (end != str && *end == '\0');
 }
+#endif // XPLANE_MFD_LIBRARY
 
 struct VNAVData {
     Float64 altitude_to_lose_ft;      // Altitude change required
@@ -120,23 +129,75 @@ VNAVData calculate_vnav(Float64 current_alt_ft, Float64 target_alt_ft,
     return result;
 }
 
+#ifndef XPLANE_MFD_LIBRARY
 // Output results as JSON
-void print_json(const VNAVData& vnav) {
-    std::cout << std::fixed << std::setprecision(2);
-    std::cout << "{\n";
-    std::cout << "  \"altitude_to_lose_ft\": " << vnav.altitude_to_lose_ft << ",\n";
-    std::cout << "  \"flight_path_angle_deg\": " << vnav.flight_path_angle_deg << ",\n";
-    std::cout << "  \"required_vs_fpm\": " << vnav.required_vs_fpm << ",\n";
-    std::cout << "  \"tod_distance_nm\": " << vnav.tod_distance_nm << ",\n";
-    std::cout << "  \"time_to_constraint_min\": " << vnav.time_to_constraint_min << ",\n";
-    std::cout << "  \"distance_per_1000ft\": " << vnav.distance_per_1000ft << ",\n";
-    std::cout << "  \"vs_for_3deg\": " << vnav.vs_for_3deg << ",\n";
-    std::cout << "  \"is_descent\": " << (vnav.is_descent ? "true" : "false") << "\n";
-    std::cout << "}\n";
+void print_json(const VNAVData& vnav, const OutputFormat& format) {
+    const char* nl = format.newline;
+    const char* in = format.indent;
+    std::cout << "{" << nl;
+    std::cout << in << "\"altitude_to_lose_ft\": " << fixed2(vnav.altitude_to_lose_ft) << "," << nl;
+    std::cout << in << "\"flight_path_angle_deg\": " << fixed2(vnav.flight_path_angle_deg) << "," << nl;
+    std::cout << in << "\"required_vs_fpm\": " << fixed2(vnav.required_vs_fpm) << "," << nl;
+    std::cout << in << "\"tod_distance_nm\": " << fixed2(vnav.tod_distance_nm) << "," << nl;
+    std::cout << in << "\"time_to_constraint_min\": " << fixed2(vnav.time_to_constraint_min) << "," << nl;
+    std::cout << in << "\"distance_per_1000ft\": " << fixed2(vnav.distance_per_1000ft) << "," << nl;
+    std::cout << in << "\"vs_for_3deg\": " << fixed2(vnav.vs_for_3deg) << "," << nl;
+    std::cout << in << "\"is_descent\": " << (vnav.is_descent ? "true" : "false") << nl;
+    std::cout << "}" << nl;
+}
+
+// Output results as a binary record (MfdVnav layout)
+void write_record(const VNAVData& vnav) {
+    write_record_header(calculator_id_vnav, error_success);
+    write_float64(vnav.altitude_to_lose_ft);
+    write_float64(vnav.flight_path_angle_deg);
+    write_float64(vnav.required_vs_fpm);
+    write_float64(vnav.tod_distance_nm);
+    write_float64(vnav.time_to_constraint_min);
+    write_float64(vnav.distance_per_1000ft);
+    write_float64(vnav.vs_for_3deg);
+    write_int32(vnav.is_descent ? 1 : 0);
 }
+#endif // XPLANE_MFD_LIBRARY
+
+} // namespace
 
 } // namespace xplane_mfd::calc
 
+// C interface for libmfd_calc (see mfd_calc.h)
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_calc_vnav(
+    Float64 current_alt_ft,
+    Float64 target_alt_ft,
+    Float64 distance_nm,
+    Float64 groundspeed_kts,
+    Float64 current_vs_fpm,
+    MfdVnav* result
+) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (result == nullptr) {
+        return_code = error_invalid_args;
+    } else {
+        VNAVData vnav = calculate_vnav(current_alt_ft, target_alt_ft, distance_nm, groundspeed_kts, current_vs_fpm);
+        result->altitude_to_lose_ft = vnav.altitude_to_lose_ft;
+        result->flight_path_angle_deg = vnav.flight_path_angle_deg;
+        result->required_vs_fpm = vnav.required_vs_fpm;
+        result->tod_distance_nm = vnav.tod_distance_nm;
+        result->time_to_constraint_min = vnav.time_to_constraint_min;
+        result->distance_per_1000ft = vnav.distance_per_1000ft;
+        result->vs_for_3deg = vnav.vs_for_3deg;
+        result->is_descent = vnav.is_descent ? 1 : 0;
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Command line tool (not part of libmfd_calc)
+#ifndef XPLANE_MFD_LIBRARY
+
 void print_usage(const char* program_name) {
     std::cerr << "Usage: " << program_name 
               << " <current_alt_ft> <target_alt_ft> <distance_nm> <groundspeed_kts> <current_vs_fpm>\n\n";
@@ -149,10 +210,42 @@ void print_usage(const char* program_name) {
     std::cerr << "Example:\n";
     std::cerr << "  " << program_name << " 35000 10000 100 450 -1500\n";
     std::cerr << "  (FL350 to 10000 ft, 100 NM, 450 kts GS, -1500 fpm)\n";
+    xplane_mfd::calc::print_modes_usage(program_name);
 }
 
+// Values in a --batch record: current_alt_ft, target_alt_ft, distance_nm,
+// groundspeed_kts, current_vs_fpm
+const Int32 batch_record_values = 5;
+
+// Calculate and output the result of one request's values (batch mode and
+// the tail of run_request)
 // AV Rule 113: Single exit point
-int main(int argc, char* argv[]) {
+Int32 run_values(const Float64 values[], Int32 count, const xplane_mfd::calc::OutputFormat& format) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (count != batch_record_values) {
+        return_code = error_invalid_args;
+    } else {
+        // Calculate VNAV data
+        VNAVData vnav = calculate_vnav(values[0], values[1], values[2], values[3], values[4]);
+        
+        // Output JSON
+        if (format.binary) {
+            write_record(vnav);
+        } else {
+            print_json(vnav, format);
+        }
+        return_code = error_success;
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Handle one request (command line or serve mode)
+// AV Rule 113: Single exit point
+Int32 run_request(Int32 argc, const char* const argv[], const xplane_mfd::calc::OutputFormat& format) {
     using namespace xplane_mfd::calc;
     
     Int32 return_code = error_success;  // Single exit point variable
@@ -184,14 +277,25 @@ int main(int argc, char* argv[]) {
             std::cerr << "Error: Invalid vertical speed\n";
             return_code = error_parse_failed;
         } else {
-            // Calculate VNAV data
-            VNAVData vnav = calculate_vnav(current_alt_ft, target_alt_ft, distance_nm, groundspeed_kts, current_vs_fpm);
-            
-            // Output JSON
-            print_json(vnav);
-            return_code = error_success;
+            const Float64 values[batch_record_values] = {
+                current_alt_ft, target_alt_ft, distance_nm, groundspeed_kts, current_vs_fpm
+            };
+            return_code = run_values(values, batch_record_values, format);
         }
     }
     
     return return_code;  // Single exit point
 }
+
+// AV Rule 113: Single exit point
+int main(int argc, char* argv[]) {
+    using namespace xplane_mfd::calc;
+    
+    // [--binary] <arguments>, --serve [--binary] or --batch [--binary-input] [--binary]
+    const Calculator calculator = {calculator_id_vnav, run_request, run_values, batch_record_values};
+    Int32 return_code = run_calculator(argc, argv, calculator);
+    
+    return return_code;  // Single exit point
+}
+
+#endif // XPLANE_MFD_LIBRARY
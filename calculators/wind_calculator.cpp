@@ -16,17 +16,24 @@
 // Compile: g++ -std=c++20 -O3 -o wind_calculator wind_calculator.cpp
 // 
 // Usage: ./wind_calculator <track> <heading> <wind_dir> <wind_speed>
+//        ./wind_calculator --binary <args...>   (binary record, see calc_binary.h)
+//        ./wind_calculator --serve [--binary]   (one request per line on stdin, see calc_serve.h)
+//        ./wind_calculator --batch [--binary-input] [--binary]   (streamed records, see calc_serve.h)
 
 #include <iostream>
 #include <cmath>
-#include <iomanip>
 #include <cstdlib>
 #include <numbers>
 #include <vector>
 #include "jsf_types.h"
+#include "calc_serve.h"
+#include "mfd_calc.h"
 
 namespace xplane_mfd::calc {
 
+// Internal linkage: every calculator is also linked into libmfd_calc
+namespace {
+
 // Error codes (JSF-compliant error handling)
 const Int32 error_success = 0;
 const Int32 error_invalid_args = 1;
@@ -39,12 +46,14 @@ const Float64 angle_wrap_limit = 360.0;
 const Float64 half_circle = 180.0;
 const Float64 wind_calm_threshold = 0.0;
 
+#ifndef XPLANE_MFD_LIBRARY
 // JSF-compliant parse function (no exceptions)
 bool parse_float64(const char* str, Float64& result) {
     char* end = nullptr;
     result = strtod(str, &end);
     return (end != str && *end == '\0');
 }
+#endif // XPLANE_MFD_LIBRARY
 
 struct WindComponents {
     Float64 headwind;      // Positive = headwind, negative = tailwind
@@ -99,20 +108,67 @@ WindComponents calculate_wind(Float64 track, Float64 heading,
     return result;
 }
 
+#ifndef XPLANE_MFD_LIBRARY
 // Output results as JSON
-void print_json(const WindComponents& wind) {
-    std::cout << std::fixed << std::setprecision(2);
-    std::cout << "{\n";
-    std::cout << "  \"headwind\": " << wind.headwind << ",\n";
-    std::cout << "  \"crosswind\": " << wind.crosswind << ",\n";
-    std::cout << "  \"total_wind\": " << wind.total_wind << ",\n";
-    std::cout << "  \"wca\": " << wind.wca << ",\n";
-    std::cout << "  \"drift\": " << wind.drift << "\n";
-    std::cout << "}\n";
+void print_json(const WindComponents& wind, const OutputFormat& format) {
+    const char* nl = format.newline;
+    const char* in = format.indent;
+    std::cout << "{" << nl;
+    std::cout << in << "\"headwind\": " << fixed2(wind.headwind) << "," << nl;
+    std::cout << in << "\"crosswind\": " << fixed2(wind.crosswind) << "," << nl;
+    std::cout << in << "\"total_wind\": " << fixed2(wind.total_wind) << "," << nl;
+    std::cout << in << "\"wca\": " << fixed2(wind.wca) << "," << nl;
+    std::cout << in << "\"drift\": " << fixed2(wind.drift) << nl;
+    std::cout << "}" << nl;
+}
+
+// Output results as a binary record (MfdWindComponents layout)
+void write_record(const WindComponents& wind) {
+    write_record_header(calculator_id_wind, error_success);
+    write_float64(wind.headwind);
+    write_float64(wind.crosswind);
+    write_float64(wind.total_wind);
+    write_float64(wind.wca);
+    write_float64(wind.drift);
 }
+#endif // XPLANE_MFD_LIBRARY
+
+} // namespace
 
 } // namespace xplane_mfd::calc
 
+// C interface for libmfd_calc (see mfd_calc.h)
+// AV Rule 113: Single exit point
+extern "C" Int32 mfd_calc_wind_components(
+    Float64 track,
+    Float64 heading,
+    Float64 wind_dir,
+    Float64 wind_speed,
+    MfdWindComponents* result
+) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (result == nullptr) {
+        return_code = error_invalid_args;
+    } else if (wind_speed < wind_calm_threshold) {
+        return_code = error_invalid_value;
+    } else {
+        WindComponents wind = calculate_wind(track, heading, wind_dir, wind_speed);
+        result->headwind = wind.headwind;
+        result->crosswind = wind.crosswind;
+        result->total_wind = wind.total_wind;
+        result->wca = wind.wca;
+        result->drift = wind.drift;
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Command line tool (not part of libmfd_calc)
+#ifndef XPLANE_MFD_LIBRARY
+
 void print_usage(const char* program_name) {
     std::cerr << "Usage: " << program_name 
               << " <track> <heading> <wind_dir> <wind_speed>\n\n";
@@ -124,10 +180,44 @@ void print_usage(const char* program_name) {
     std::cerr << "Example:\n";
     std::cerr << "  " << program_name << " 90 85 270 15\n";
     std::cerr << "  (Track 90°, Heading 85°, Wind from 270° at 15 knots)\n";
+    xplane_mfd::calc::print_modes_usage(program_name);
 }
 
+// Values in a --batch record: track, heading, wind_dir, wind_speed
+const Int32 batch_record_values = 4;
+
+// Validate one request's values, calculate and output the result (batch mode
+// and the tail of run_request)
 // AV Rule 113: Single exit point
-int main(int argc, char* argv[]) {
+Int32 run_values(const Float64 values[], Int32 count, const xplane_mfd::calc::OutputFormat& format) {
+    using namespace xplane_mfd::calc;
+    
+    Int32 return_code = error_success;  // Single exit point variable
+    
+    if (count != batch_record_values) {
+        return_code = error_invalid_args;
+    } else if (values[3] < wind_calm_threshold) {
+        std::cerr << "Error: Wind speed cannot be negative\n";
+        return_code = error_invalid_value;
+    } else {
+        // All inputs valid - calculate wind components
+        WindComponents wind = calculate_wind(values[0], values[1], values[2], values[3]);
+        
+        // Output JSON or a binary record
+        if (format.binary) {
+            write_record(wind);
+        } else {
+            print_json(wind, format);
+        }
+        return_code = error_success;
+    }
+    
+    return return_code;  // Single exit point
+}
+
+// Handle one request (command line or serve mode)
+// AV Rule 113: Single exit point
+Int32 run_request(Int32 argc, const char* const argv[], const xplane_mfd::calc::OutputFormat& format) {
     using namespace xplane_mfd::calc;
     
     Int32 return_code = error_success;  // Single exit point variable
@@ -155,18 +245,24 @@ int main(int argc, char* argv[]) {
         } else if (!parse_float64(argv[4], wind_speed)) {
             std::cerr << "Error: Invalid wind speed\n";
             return_code = error_parse_failed;
-        } else if (wind_speed < wind_calm_threshold) {
-            std::cerr << "Error: Wind speed cannot be negative\n";
-            return_code = error_invalid_value;
         } else {
-            // All inputs valid - calculate wind components
-            WindComponents wind = calculate_wind(track, heading, wind_dir, wind_speed);
-            
-            // Output JSON
-            print_json(wind);
-            return_code = error_success;
+            const Float64 values[batch_record_values] = {track, heading, wind_dir, wind_speed};
+            return_code = run_values(values, batch_record_values, format);
         }
     }
     
     return return_code;  // Single exit point
 }
+
+// AV Rule 113: Single exit point
+int main(int argc, char* argv[]) {
+    using namespace xplane_mfd::calc;
+    
+    // [--binary] <arguments>, --serve [--binary] or --batch [--binary-input] [--binary]
+    const Calculator calculator = {calculator_id_wind, run_request, run_values, batch_record_values};
+    Int32 return_code = run_calculator(argc, argv, calculator);
+    
+    return return_code;  // Single exit point
+}
+
+#endif // XPLANE_MFD_LIBRARY
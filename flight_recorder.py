@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Flight data recorder for the X-Plane MFD
+
+Appends every acquisition tick (dataref values and calculator results) to a
+compact columnar log of fixed-width float64 columns, and reads such logs back
+through a memory map without parsing.
+
+File layout (.mfdrec, little-endian):
+
+    header   magic b"MFDREC\\0\\0", Uint32 format version, Uint32 column
+             count, Uint32 rows per block, 4 padding bytes, then one
+             COLUMN_NAME_SIZE-byte NUL-padded UTF-8 name per column
+    blocks   Uint64 row count, then every column's block_rows float64 values,
+             column after column (rows past the row count are NaN)
+
+Column 0 is always "timestamp" (seconds since the epoch). Missing and
+non-numeric values are stored as NaN, booleans as 0.0/1.0. Every block has the
+same size, so block i of a file starts at header_size + i * block_size.
+
+A log is split into files of at most max_file_bytes, each with its own header.
+"""
+
+import array
+import bisect
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+MAGIC = b"MFDREC\0\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIII4x")  # Magic, format version, column count, rows per block
+BLOCK_HEADER = struct.Struct("<Q")  # Rows in the block
+COLUMN_NAME_SIZE = 64
+VALUE_SIZE = 8  # float64
+FILE_SUFFIX = ".mfdrec"
+NAN = float("nan")
+
+
+def flatten(data: Mapping[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Flatten nested result dicts into "a.b.c" column names"""
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict):  # Results are plain dicts (checking for any Mapping is slow)
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[prefix + key] = value
+    return flat
+
+
+def to_float(value: Any) -> float:
+    """Column value of a field (NaN if missing or not a number)"""
+    if isinstance(value, (int, float)):  # bool is an int
+        return float(value)
+    return NAN
+
+
+def header_size(column_count: int) -> int:
+    """Bytes before the first block of a file"""
+    return HEADER.size + column_count * COLUMN_NAME_SIZE
+
+
+def block_size(column_count: int, block_rows: int) -> int:
+    """Bytes of every block of a file"""
+    return BLOCK_HEADER.size + column_count * block_rows * VALUE_SIZE
+
+
+def recording_files(directory: Path) -> List[Path]:
+    """Recording files in a directory, oldest first"""
+    return sorted(Path(directory).glob(f"*{FILE_SUFFIX}"))
+
+
+def session_name(path: Path) -> str:
+    """Recording session of a file: its name without the file number ("mfd-20240101-120000")"""
+    return Path(path).stem.rsplit("-", 1)[0]
+
+
+def recording_sessions(directory: Path) -> Dict[str, List[Path]]:
+    """Recording files in a directory grouped by session, oldest session first
+
+    Each FlightRecorder writes all of its files under one session name, so a
+    session is one continuous recording; separate sessions have gaps between
+    them and must not be played back as one.
+    """
+    sessions: Dict[str, List[Path]] = {}
+    for path in recording_files(directory):
+        sessions.setdefault(session_name(path), []).append(path)
+    return dict(sorted(sessions.items(), key=lambda item: session_start(item[0])))
+
+
+def session_start(session: str) -> Tuple[str, str, int]:
+    """Sort key of a session by start time, whatever the recorder name
+
+    Sessions are named "name-YYYYmmdd-HHMMSS", with ".N" appended for the
+    Nth recorder started within the same second (see FlightRecorder.open_file).
+    """
+    date, start = session.rsplit("-", 2)[1:]
+    start, _, counter = start.partition(".")
+    return date, start, int(counter or 1)
+
+
+def session_files(path: Path, session: Optional[str] = None) -> List[Path]:
+    """Files of one recording: an .mfdrec file, or one session of a directory
+
+    Args:
+        path: Recording file or directory of recordings
+        session: Session to pick from a directory (see session_name()), the
+            newest if None
+
+    Raises:
+        ValueError: The directory holds no recording, or not the session asked for
+    """
+    path = Path(path)
+    if not path.is_dir():
+        return [path]
+    sessions = recording_sessions(path)
+    if not sessions:
+        raise ValueError(f"No {FILE_SUFFIX} recordings in {path}")
+    if session is None:
+        return list(sessions.values())[-1]
+    if session not in sessions:
+        raise ValueError(f"No session {session} in {path} (sessions: {', '.join(sessions)})")
+    return sessions[session]
+
+
+class FlightRecorder:
+    """Appends one row per tick to rotating .mfdrec files
+
+    Rows are collected in a fixed ring of preallocated blocks. Full blocks are
+    written by a background thread, so record() never waits for the disk and
+    memory stays bounded however long the session: if the writer falls
+    ring_blocks blocks behind, rows are dropped (and counted) instead.
+
+    record(), flush() and close() must be called from one thread (the
+    acquisition thread, or any thread once it has stopped).
+    """
+
+    def __init__(self, directory: Path, columns: Sequence[str], block_rows: int = 1024,
+                 max_file_bytes: int = 64 * 1024 * 1024, max_files: Optional[int] = None,
+                 ring_blocks: int = 4, name: str = "mfd"):
+        """Initialize the recorder (the first file is created with the first full block)
+
+        Args:
+            directory: Directory the files are written to (created if missing)
+            columns: Recorded fields, nested results as "a.b.c" (see flatten());
+                "timestamp" is added as column 0
+            block_rows: Rows per block - the unit of buffering and writing
+            max_file_bytes: Size at which a new file is started
+            max_files: Oldest files of this recorder are deleted beyond this many
+                (None keeps every file)
+            ring_blocks: Blocks in memory, including the one being filled
+            name: File name prefix
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.columns = ("timestamp",) + tuple(column for column in columns if column != "timestamp")
+        for column in self.columns:
+            if len(column.encode("utf-8")) > COLUMN_NAME_SIZE:
+                raise ValueError(f"Column name longer than {COLUMN_NAME_SIZE} bytes: {column}")
+        self.block_rows = block_rows
+        self.block_size = block_size(len(self.columns), block_rows)
+        # (offset of the column in a block, name) of every column after the timestamp
+        self.column_starts = [(index * block_rows, column) for index, column in enumerate(self.columns) if index > 0]
+        self.max_file_bytes = max(max_file_bytes, header_size(len(self.columns)) + self.block_size)
+        self.max_files = max_files
+        self.name = name
+
+        # Ring of blocks: free ones wait in free_blocks, full ones in full_blocks
+        self.blocks = [array.array("d", [NAN]) * (len(self.columns) * block_rows) for _ in range(ring_blocks)]
+        self.free_blocks: "queue.Queue[int]" = queue.Queue()
+        for index in range(1, ring_blocks):
+            self.free_blocks.put(index)
+        self.full_blocks: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self.current: Optional[int] = 0  # Block being filled (None while none is free)
+        self.rows = 0  # Rows in the current block
+
+        self.rows_recorded = 0
+        self.rows_dropped = 0  # Rows lost because the writer fell behind
+        self.files: List[Path] = []  # Files of this recorder still on disk, oldest first
+        # File name part shared by the log, made unique when the first file is opened
+        self.session = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        self.file_number = 0
+        self.file = None
+        self.file_bytes = 0
+        self.write_error: Optional[str] = None  # Last failure of the writer thread
+
+        self.writer = threading.Thread(target=self.write_blocks, name="mfd-recorder", daemon=True)
+        self.writer.start()
+
+    def record(self, timestamp: float, data: Mapping[str, Any]):
+        """Append one row
+
+        Args:
+            timestamp: Seconds since the epoch
+            data: Field values, nested results allowed (see flatten())
+        """
+        if self.current is None:
+            try:
+                self.current = self.free_blocks.get_nowait()
+            except queue.Empty:
+                self.rows_dropped += 1
+                return
+
+        flat = flatten(data)
+        block = self.blocks[self.current]
+        row = self.rows
+        block[row] = timestamp
+        for start, column in self.column_starts:
+            value = flat.get(column)
+            block[start + row] = value if type(value) is float else to_float(value)
+        self.rows += 1
+        self.rows_recorded += 1
+
+        if self.rows == self.block_rows:
+            self.full_blocks.put((self.current, self.rows))
+            self.current = None
+            self.rows = 0
+
+    def flush(self, wait: bool = False):
+        """Hand the partly filled block to the writer (recording continues in a new block)
+
+        Args:
+            wait: Return only once every block handed over has been written
+        """
+        if self.current is not None and self.rows > 0:
+            block = self.blocks[self.current]
+            for column_index in range(len(self.columns)):
+                start = column_index * self.block_rows
+                block[start + self.rows:start + self.block_rows] = array.array("d", [NAN]) * (self.block_rows - self.rows)
+            self.full_blocks.put((self.current, self.rows))
+            self.current = None
+            self.rows = 0
+        if wait:
+            self.full_blocks.join()
+
+    def close(self, timeout: float = 5.0):
+        """Write the remaining rows and close the current file"""
+        self.flush()
+        self.full_blocks.put(None)
+        self.writer.join(timeout)
+
+    def write_blocks(self):
+        """Write full blocks until close() (writer thread)"""
+        while True:
+            item = self.full_blocks.get()
+            if item is None:
+                self.full_blocks.task_done()
+                break
+            index, rows = item
+            try:
+                self.write_block(self.blocks[index], rows)
+            except OSError as e:
+                self.write_error = str(e)
+                print(f"Flight recorder error: {e}")
+            self.free_blocks.put(index)
+            self.full_blocks.task_done()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write_block(self, block: array.array, rows: int):
+        """Append one block to the current file, starting a new file when it is full"""
+        if self.file is None or self.file_bytes + self.block_size > self.max_file_bytes:
+            self.open_file()
+        self.file.write(BLOCK_HEADER.pack(rows))
+        if sys.byteorder == "little":
+            self.file.write(memoryview(block))
+        else:
+            swapped = array.array("d", block)
+            swapped.byteswap()
+            self.file.write(memoryview(swapped))
+        self.file.flush()
+        self.file_bytes += self.block_size
+
+    def open_file(self):
+        """Start the next file of the log and delete the oldest beyond max_files
+
+        Files are never overwritten. A session name already used in the
+        directory (another recorder started within the same second) gets a
+        ".N" counter appended before the first file is created.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        session = self.session
+        counter = 1
+        while True:
+            path = self.directory / f"{self.name}-{self.session}-{self.file_number:04d}{FILE_SUFFIX}"
+            if self.file_number > 0 or not any(self.directory.glob(f"{self.name}-{self.session}-*{FILE_SUFFIX}")):
+                try:
+                    self.file = open(path, "xb")
+                    break
+                except FileExistsError:
+                    if self.file_number > 0:
+                        raise
+            counter += 1
+            self.session = f"{session}.{counter}"
+        self.file_number += 1
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(self.columns), self.block_rows))
+        for column in self.columns:
+            self.file.write(column.encode("utf-8").ljust(COLUMN_NAME_SIZE, b"\0"))
+        self.file_bytes = header_size(len(self.columns))
+        self.files.append(path)
+
+        while self.max_files is not None and len(self.files) > self.max_files:
+            try:
+                self.files.pop(0).unlink()
+            except OSError:
+                pass
+
+
+class RecordingReader:
+    """Memory-mapped view of one .mfdrec file
+
+    Values are read straight from the mapping. A file still being written can
+    be opened: only the blocks complete at open time are visible.
+    """
+
+    def __init__(self, path: Path):
+        """Open a recording
+
+        Raises:
+            ValueError: If the file is not a recording of a supported version
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{self.path}: not a flight recording")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, column_count, self.block_rows = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.map.close()
+            raise ValueError(f"{self.path}: not a version {FORMAT_VERSION} flight recording")
+        self.columns = tuple(
+            bytes(self.map[offset:offset + COLUMN_NAME_SIZE]).rstrip(b"\0").decode("utf-8")
+            for offset in range(HEADER.size, header_size(column_count), COLUMN_NAME_SIZE)
+        )
+        self.column_index = {name: index for index, name in enumerate(self.columns)}
+        self.data_offset = header_size(column_count)
+        self.block_size = block_size(column_count, self.block_rows)
+        self.block_count = max(size - self.data_offset, 0) // self.block_size
+
+        # Rows in each block, and the first row of each block
+        self.block_lengths = [BLOCK_HEADER.unpack_from(self.map, self.block_offset(block))[0]
+                              for block in range(self.block_count)]
+        self.block_starts = []
+        total = 0
+        for rows in self.block_lengths:
+            self.block_starts.append(total)
+            total += rows
+        self.rows = total
+
+        # Complete blocks only: a file being written may end inside a value
+        end = self.block_offset(self.block_count)
+        self.values = memoryview(self.map)[:end].cast("d") if sys.byteorder == "little" else None
+
+    def block_offset(self, block: int) -> int:
+        """Byte offset of a block"""
+        return self.data_offset + block * self.block_size
+
+    def value_offset(self, block: int, column: int, row: int) -> int:
+        """Byte offset of a value (row within the block)"""
+        return self.block_offset(block) + BLOCK_HEADER.size + (column * self.block_rows + row) * VALUE_SIZE
+
+    def block_column(self, block: int, name: str) -> memoryview:
+        """Values of one column in one block, without copying (little-endian hosts)
+
+        Release the view before close().
+        """
+        start = self.value_offset(block, self.column_index[name], 0) // VALUE_SIZE
+        return self.values[start:start + self.block_lengths[block]]
+
+    def column(self, name: str) -> array.array:
+        """Every value of one column, in row order"""
+        values = array.array("d")
+        column = self.column_index[name]
+        for block, rows in enumerate(self.block_lengths):
+            start = self.value_offset(block, column, 0)
+            values.frombytes(self.map[start:start + rows * VALUE_SIZE])
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values
+
+    def locate(self, row: int) -> tuple:
+        """(block, row within the block) of a row"""
+        if not 0 <= row < self.rows:
+            raise IndexError(f"row {row} out of range")
+        block = bisect.bisect_right(self.block_starts, row) - 1
+        return block, row - self.block_starts[block]
+
+    def row(self, row: int) -> Dict[str, float]:
+        """One row as {column name: value}"""
+        block, block_row = self.locate(row)
+        return {
+            name: struct.unpack_from("<d", self.map, self.value_offset(block, column, block_row))[0]
+            for column, name in enumerate(self.columns)
+        }
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def close(self):
+        """Release the memory map"""
+        if self.values is not None:
+            self.values.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_recording(paths: Iterable[Path]) -> Dict[str, array.array]:
+    """Every column of a log split over several files of one recorder, in file order"""
+    columns: Dict[str, array.array] = {}
+    for path in paths:
+        with RecordingReader(path) as reader:
+            for name in reader.columns:
+                columns.setdefault(name, array.array("d")).extend(reader.column(name))
+    return columns
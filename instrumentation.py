@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Hot-path instrumentation for the X-Plane MFD
+
+Timing spans and event counters for every stage of a tick, cheap enough to
+leave on in flight:
+
+    with instrumentation.span("acquire.read"):
+        ...
+    instrumentation.count("api.timeouts")
+
+Each span name feeds a histogram of its durations, kept both since start
+(fixed buckets, as Prometheus expects) and over the last `window`
+observations (for the p50/p99/max shown in the diagnostics panel). Each
+counter keeps its total and a rolling per-second series over the last
+`counter_window` seconds.
+
+Metrics.prometheus_text() renders everything in the Prometheus text
+exposition format; MetricsWriter dumps it to a file periodically for a
+node_exporter textfile collector or for reading by hand.
+"""
+
+import bisect
+import collections
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+# Histogram bucket upper bounds in seconds (plus +Inf)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class RollingHistogram:
+    """Distribution of a span's durations since start and over a rolling window"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 1000):
+        """Initialize the histogram
+
+        Args:
+            buckets: Increasing bucket upper bounds in seconds (+Inf is added)
+            window: Observations kept for the rolling statistics
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Since start, per bucket (not cumulative)
+        self.recent_counts = [0] * (len(self.buckets) + 1)  # Per bucket, over `recent`
+        self.recent = collections.deque(maxlen=window)  # (seconds, bucket index)
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """Add one duration"""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            if len(self.recent) == self.recent.maxlen:
+                self.recent_counts[self.recent[0][1]] -= 1
+            self.recent.append((seconds, index))
+            self.recent_counts[index] += 1
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Estimate a quantile of the rolling window from its buckets (None if empty)
+
+        Interpolates linearly inside the bucket holding the quantile, like
+        Prometheus' histogram_quantile(). Values past the last bucket report
+        the largest one seen.
+        """
+        with self.lock:
+            counts = list(self.recent_counts)
+            largest = max(seconds for seconds, _ in self.recent) if self.recent else None
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank = fraction * total
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.buckets):
+                    return largest
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index]
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, largest)
+            seen += bucket_count
+        return largest
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """p50/p99/max in seconds and count of the rolling window"""
+        with self.lock:
+            largest = max((seconds for seconds, _ in self.recent), default=None)
+            count = len(self.recent)
+        return {"p50": self.quantile(0.5), "p99": self.quantile(0.99), "max": largest, "count": count}
+
+
+class RollingCounter:
+    """Event count since start and per second over a rolling window"""
+
+    def __init__(self, window: int = 60):
+        """Initialize the counter
+
+        Args:
+            window: Seconds covered by the rolling rate
+        """
+        self.total = 0
+        self.slots = [0] * window  # Events per second, indexed by second % window
+        self.slot_seconds = [-1] * window  # Second each slot currently counts
+        self.lock = threading.Lock()
+
+    def add(self, amount: int = 1):
+        """Count events"""
+        second = int(time.monotonic())
+        slot = second % len(self.slots)
+        with self.lock:
+            if self.slot_seconds[slot] != second:
+                self.slot_seconds[slot] = second
+                self.slots[slot] = 0
+            self.slots[slot] += amount
+            self.total += amount
+
+    def series(self) -> List[int]:
+        """Events in each of the last `window` complete seconds, oldest first"""
+        current = int(time.monotonic())
+        window = len(self.slots)
+        with self.lock:
+            return [self.slots[second % window] if self.slot_seconds[second % window] == second else 0
+                    for second in range(current - window, current)]
+
+    def rate(self) -> float:
+        """Events per second over the rolling window"""
+        return sum(self.series()) / len(self.slots)
+
+
+class Span:
+    """Context manager timing a block into a histogram"""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: RollingHistogram):
+        self.histogram = histogram
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """Registry of span histograms and event counters, created on first use"""
+
+    def __init__(self, window: int = 1000, counter_window: int = 60, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initialize the registry
+
+        Args:
+            window: Observations in each histogram's rolling window
+            counter_window: Seconds in each counter's rolling window
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.window = window
+        self.counter_window = counter_window
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.counters: Dict[str, RollingCounter] = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name: str) -> RollingHistogram:
+        """Histogram of a span, created on first use"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, RollingHistogram(self.buckets, self.window))
+        return histogram
+
+    def counter(self, name: str) -> RollingCounter:
+        """Counter of an event, created on first use"""
+        counter = self.counters.get(name)
+        if counter is None:
+            with self.lock:
+                counter = self.counters.setdefault(name, RollingCounter(self.counter_window))
+        return counter
+
+    def span(self, name: str) -> Span:
+        """Time a with block as the span name"""
+        return Span(self.histogram(name))
+
+    def observe(self, name: str, seconds: float):
+        """Record a duration measured elsewhere as the span name"""
+        self.histogram(name).observe(seconds)
+
+    def count(self, name: str, amount: int = 1):
+        """Count events"""
+        self.counter(name).add(amount)
+
+    def summary_lines(self) -> List[str]:
+        """Rolling statistics as fixed-width text lines (diagnostics panel)"""
+        lines = [f"{'SPAN':<20}{'P50 MS':>9}{'P99 MS':>9}{'MAX MS':>9}{'N':>7}"]
+        for name, histogram in sorted(self.histograms.items()):
+            summary = histogram.summary()
+            values = [f"{summary[key] * 1000.0:9.2f}" if summary[key] is not None else f"{'---':>9}"
+                      for key in ("p50", "p99", "max")]
+            lines.append(f"{name:<20}{''.join(values)}{summary['count']:>7}")
+        lines.append("")
+        lines.append(f"{'EVENT':<20}{'TOTAL':>12}{'PER S':>10}")
+        for name, counter in sorted(self.counters.items()):
+            lines.append(f"{name:<20}{counter.total:>12}{counter.rate():>10.1f}")
+        return lines
+
+    def prometheus_text(self, prefix: str = "mfd") -> str:
+        """Every metric in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_span_seconds Duration of each instrumented stage",
+            f"# TYPE {prefix}_span_seconds histogram",
+        ]
+        histograms = sorted(self.histograms.items())
+        for name, histogram in histograms:
+            with histogram.lock:
+                counts = list(histogram.counts)
+                count, total = histogram.count, histogram.sum
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f'{prefix}_span_seconds_bucket{{span="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {total!r}')
+            lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {count}')
+
+        lines.append(f"# HELP {prefix}_span_recent_seconds Quantiles of the last {self.window} durations of each stage")
+        lines.append(f"# TYPE {prefix}_span_recent_seconds gauge")
+        for name, histogram in histograms:
+            for fraction in (0.5, 0.99):
+                value = histogram.quantile(fraction)
+                if value is not None:
+                    lines.append(f'{prefix}_span_recent_seconds{{span="{name}",quantile="{fraction}"}} {value!r}')
+
+        counters = sorted(self.counters.items())
+        lines.append(f"# HELP {prefix}_events_total Instrumented events since start")
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, counter in counters:
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {counter.total}')
+        lines.append(f"# HELP {prefix}_event_rate Events per second over the last {self.counter_window} s")
+        lines.append(f"# TYPE {prefix}_event_rate gauge")
+        for name, counter in counters:
+            lines.append(f'{prefix}_event_rate{{event="{name}"}} {counter.rate()!r}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path):
+        """Write prometheus_text() to path atomically (readers never see a partial file)"""
+        path = Path(path)
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_text(self.prometheus_text())
+        os.replace(temporary, path)
+
+
+class MetricsWriter(threading.Thread):
+    """Background thread dumping a registry to a Prometheus text file every interval"""
+
+    def __init__(self, metrics: Metrics, path: Path, interval: float = 10.0):
+        """Initialize the writer
+
+        Args:
+            metrics: Registry to dump
+            path: File to (re)write
+            interval: Seconds between dumps
+        """
+        super().__init__(name="mfd-metrics", daemon=True)
+        self.metrics = metrics
+        self.path = Path(path)
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.write()
+
+    def write(self):
+        """Dump the registry now"""
+        try:
+            self.metrics.write_prometheus(self.path)
+        except OSError as e:
+            print(f"Error writing metrics to {self.path}: {e}")
+
+    def stop(self):
+        """Stop the writer after one last dump"""
+        self.stop_event.set()
+        if self.is_alive():
+            self.join(timeout=2.0)
+        self.write()
+
+
+# Registry the MFD reports to
+REGISTRY = Metrics()
+
+
+def span(name: str) -> Span:
+    """Time a with block as the span name in REGISTRY"""
+    return REGISTRY.span(name)
+
+
+def count(name: str, amount: int = 1):
+    """Count events in REGISTRY"""
+    REGISTRY.count(name, amount)
@@ -8,5 +8,5 @@ if [ -d "my_env" ]; then
     source my_env/bin/activate
 fi
 
-python3 aircraft_mfd.py
+python3 aircraft_mfd.py "$@"
 
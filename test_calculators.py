@@ -2,6 +2,7 @@ from pathlib import Path
 import subprocess
 import sys
 import json
+import warnings
 
 
 def test_density_altitude_calculator():
@@ -50,7 +51,7 @@ def test_flight_calculator():
             "direction_from": 195.53,
             "headwind": 4.05,
             "crosswind": 21.79,
-            "gust_factor": 0.01
+            "gust_factor": 0.00  # One IAS sample, no gusts yet
         },
         "envelope": {
             "stall_margin_pct": 82.98,
@@ -125,6 +126,531 @@ def test_wind_calculator():
     
     return test_calculator("wind_calculator", arguments, expected_output)
 
+def test_serve_mode():
+    print("Testing turn_calculator --serve")
+    calculator_path = Path(__file__).parent / "turn_calculator"
+
+    if not calculator_path.exists():
+        print("turn_calculator not found")
+        return False
+
+    one_shot = subprocess.run(
+        [str(calculator_path), "250", "25", "90"],
+        capture_output=True,
+        text=True,
+        timeout=2.0
+    )
+
+    # Valid request, invalid bank angle, valid request again on the same process
+    result = subprocess.run(
+        [str(calculator_path), "--serve"],
+        input="250 25 90\n250 95 90\n250 25 90\n",
+        capture_output=True,
+        text=True,
+        timeout=2.0
+    )
+
+    lines = result.stdout.splitlines()
+    if result.returncode != 0 or len(lines) != 3:
+        print(f"❌ Expected 3 response lines and exit code 0, got {len(lines)} lines, code {result.returncode}")
+        print(result.stdout)
+        return False
+
+    try:
+        responses = [json.loads(line) for line in lines]
+    except json.JSONDecodeError:
+        print("❌ Response was not valid single-line JSON")
+        print(result.stdout)
+        return False
+
+    errors = compare_json(json.loads(one_shot.stdout), responses[0])
+    if responses[1] != {"error": 3}:
+        errors.append(f"invalid request: expected {{'error': 3}}, got {responses[1]}")
+    if responses[2] != responses[0]:
+        errors.append("repeated request gave a different response")
+
+    if errors:
+        print("❌ Serve mode mismatch:")
+        for err in errors:
+            print(f" - {err}")
+        return False
+    else:
+        print("✅ Serve mode matches the one-shot output")
+        return True
+
+def test_calculator_library():
+    print("Testing libmfd_calc")
+    import aircraft_mfd
+
+    try:
+        library = aircraft_mfd.CalculatorLibrary()
+    except OSError as e:
+        print(f"libmfd_calc not loaded: {e}")
+        return False
+
+    cases = [
+        ("turn", "turn_calculator", ["250", "25", "90"]),
+        ("vnav", "vnav_calculator", ["35000", "10000", "100", "450", "-1500"]),
+        ("density_altitude", "density_altitude_calculator", ["5000", "25", "150", "170", "0"]),
+        ("flight", "flight_calculator", ["250", "245", "90", "95", "220", "0.65", "35000", "35000",
+                                         "-500", "75000", "5", "120", "250", "0.82"]),
+    ]
+
+    errors = []
+    for name, filename, arguments in cases:
+        cli = subprocess.run(
+            [str(Path(__file__).parent / filename)] + arguments,
+            capture_output=True,
+            text=True,
+            timeout=2.0
+        )
+        expected = json.loads(cli.stdout)
+        returncode, actual = library.calculate(name, *arguments)
+        if returncode != 0:
+            errors.append(f"{name}: returned {returncode}")
+            continue
+
+        if name == "flight":
+            expected.pop("alternate_airports")
+            for section in expected:
+                errors.extend(f"{name}.{section}.{err}" for err in compare_json(expected[section], actual[section]))
+        else:
+            errors.extend(f"{name}: {err}" for err in compare_json(expected, actual))
+
+    # Given one IAS history, the library and the calculator processes give
+    # the same flight result, gust factor included
+    flight_arguments = cases[-1][2]
+    history = aircraft_mfd.IasHistory(aircraft_mfd.IAS_WINDOW)
+    processes = aircraft_mfd.ProcessCalculators(Path(__file__).parent)
+    for ias in (220.0, 232.0, 208.0, 226.0):
+        history.add(ias)
+        calculator_arguments = flight_arguments[:4] + [ias] + flight_arguments[5:]
+        library_result = library.calculate("flight", *calculator_arguments, ias_history=history)
+        process_result = processes.calculate("flight", *calculator_arguments, ias_history=history)
+        if library_result[0] != process_result[0]:
+            errors.append(f"flight at {ias} kts: library returned {library_result[0]}, "
+                          f"processes returned {process_result[0]}")
+            continue
+        for section in library_result[1]:
+            errors.extend(f"flight at {ias} kts {section}.{err}"
+                          for err in compare_json(process_result[1][section], library_result[1][section]))
+    processes.close()
+    if history.gust_factor() <= 0.0:
+        errors.append("IAS history of a gusting series reports no gusts")
+
+    # Error codes match the command line tools
+    if library.calculate("turn", 250, 95, 90) != (3, None):
+        errors.append("turn: invalid bank angle not rejected with code 3")
+    if library.calculate("density_altitude", 5000, 25, 150, 170, 1) != (3, None):
+        errors.append("density_altitude: forced error not reported with code 3")
+
+    if errors:
+        print("❌ Library mismatch:")
+        for err in errors:
+            print(f" - {err}")
+        return False
+    else:
+        print("✅ Library matches the command line calculators")
+        return True
+
+def test_compute_all():
+    print("Testing compute_all_calculator")
+    import aircraft_mfd
+
+    script_dir = Path(__file__).parent
+    flight_arguments = ["250", "245", "90", "95", "220", "0.65", "35000", "35000",
+                        "-500", "75000", "-5", "120", "250", "0.82"]
+    arguments = flight_arguments + ["-10", "90", "10000", "100"]
+
+    # Each part must match the single-purpose calculator given the same inputs
+    cases = [
+        ("flight", "flight_calculator", flight_arguments),
+        ("turn", "turn_calculator", ["250", "5", "90"]),
+        ("vnav", "vnav_calculator", ["35000", "10000", "100", "245", "-500"]),
+        ("density_altitude", "density_altitude_calculator", ["35000", "-10", "220", "250", "0"]),
+    ]
+    expected = {}
+    for name, filename, calculator_arguments in cases:
+        cli = subprocess.run(
+            [str(script_dir / filename)] + calculator_arguments,
+            capture_output=True,
+            text=True,
+            timeout=2.0
+        )
+        expected[name] = json.loads(cli.stdout)
+    expected["flight"].pop("alternate_airports")
+
+    backends = [("process", aircraft_mfd.ProcessCalculators(script_dir))]
+    try:
+        backends.append(("library", aircraft_mfd.CalculatorLibrary()))
+    except OSError as e:
+        print(f"libmfd_calc not loaded: {e}")
+        return False
+
+    errors = []
+    for backend_name, backend in backends:
+        parts = backend.calculate_all(*arguments, 0)
+        for name in aircraft_mfd.COMPUTE_ALL_PARTS:
+            returncode, actual = parts[name]
+            if returncode != 0:
+                errors.append(f"{backend_name} {name}: returned {returncode}")
+                continue
+            if name == "flight":
+                for section in expected[name]:
+                    errors.extend(f"{backend_name} {name}.{section}.{err}"
+                                  for err in compare_json(expected[name][section], actual[section]))
+            else:
+                errors.extend(f"{backend_name} {name}: {err}" for err in compare_json(expected[name], actual))
+
+        # A failing part does not stop the others
+        parts = backend.calculate_all(*arguments, 1)
+        if parts["density_altitude"] != (3, None):
+            errors.append(f"{backend_name}: forced density altitude error not reported with code 3")
+        if parts["turn"][0] != 0:
+            errors.append(f"{backend_name}: turn failed along with density altitude")
+        backend.close()
+
+    if errors:
+        print("❌ Combined calculator mismatch:")
+        for err in errors:
+            print(f" - {err}")
+        return False
+    else:
+        print("✅ Combined calculator matches the single-purpose calculators")
+        return True
+
+def test_binary_output():
+    print("Testing --binary output")
+    import aircraft_mfd
+
+    script_dir = Path(__file__).parent
+    cases = [
+        ("wind", ["090", "085", "240", "60"]),
+        ("turn", ["250", "25", "90"]),
+        ("vnav", ["35000", "10000", "100", "450", "-1500"]),
+        ("density_altitude", ["5000", "25", "150", "170"]),
+        ("flight", ["250", "245", "90", "95", "220", "0.65", "35000", "35000",
+                    "-500", "75000", "5", "120", "250", "0.82"]),
+    ]
+
+    errors = []
+    for name, arguments in cases:
+        calculator_path = script_dir / f"{name}_calculator"
+        expected = json.loads(subprocess.run(
+            [str(calculator_path)] + arguments,
+            capture_output=True,
+            text=True,
+            timeout=2.0
+        ).stdout)
+        record = subprocess.run(
+            [str(calculator_path), "--binary"] + arguments,
+            capture_output=True,
+            timeout=2.0
+        ).stdout
+
+        layout = aircraft_mfd.BINARY_RECORDS[name]
+        header_size = aircraft_mfd.BINARY_HEADER.size
+        if len(record) != header_size + layout.payload.size:
+            errors.append(f"{name}: record is {len(record)} bytes, expected {header_size + layout.payload.size}")
+            continue
+        header = aircraft_mfd.BINARY_HEADER.unpack(record[:header_size])
+        if header != (aircraft_mfd.BINARY_FORMAT_VERSION, layout.calculator_id, 0):
+            errors.append(f"{name}: unexpected header {header}")
+        actual = layout.decode(record[header_size:])
+
+        if name == "flight":
+            # The alternate airport counts are constants and not part of the record
+            expected.pop("alternate_airports")
+            for section in expected:
+                errors.extend(f"{name}.{section}.{err}" for err in compare_json(expected[section], actual[section]))
+        else:
+            errors.extend(f"{name}: {err}" for err in compare_json(expected, actual))
+
+    # Full precision instead of 2 decimals
+    calculators = aircraft_mfd.ProcessCalculators(script_dir)
+    _, turn = calculators.calculate("turn", 250, 25, 90)
+    calculators.close()
+    if turn is None or turn["radius_nm"] == round(turn["radius_nm"], 2):
+        errors.append(f"turn: result not at full precision ({turn})")
+
+    # Serve mode answers an invalid request with a header carrying the exit code
+    result = subprocess.run(
+        [str(script_dir / "turn_calculator"), "--serve", "--binary"],
+        input=b"250 95 90\n",
+        capture_output=True,
+        timeout=2.0
+    )
+    if result.stdout != aircraft_mfd.BINARY_HEADER.pack(aircraft_mfd.BINARY_FORMAT_VERSION, 3, 3):
+        errors.append(f"serve: invalid request answered with {result.stdout!r}")
+
+    if errors:
+        print("❌ Binary output mismatch:")
+        for err in errors:
+            print(f" - {err}")
+        return False
+    else:
+        print("✅ Binary records match the JSON output")
+        return True
+
+def test_numpy_engine():
+    print("Testing calc_engine (NumPy)")
+    try:
+        import numpy as np
+        import calc_engine
+    except ImportError:
+        print("⚠️ numpy not installed - skipping")
+        return True
+    import aircraft_mfd
+
+    script_dir = Path(__file__).parent
+    flight_arguments = ["250", "245", "90", "95", "220", "0.65", "35000", "35000",
+                        "-500", "75000", "5", "120", "250", "0.82"]
+    cases = [
+        ("wind", ["090", "085", "240", "60"]),
+        ("turn", ["250", "25", "90"]),
+        ("turn", ["250", "0", "90"]),
+        ("vnav", ["35000", "10000", "100", "450", "-1500"]),
+        ("vnav", ["5000", "8000", "0", "0", "0"]),
+        ("density_altitude", ["5000", "25", "150", "170"]),
+        ("density_altitude", ["-2000", "-60", "5", "5"]),
+        ("flight", flight_arguments),
+        ("turn", ["250", "95", "90"]),
+        ("wind", ["090", "085", "240", "-5"]),
+        ("density_altitude", ["70000", "25", "150", "170"]),
+        ("density_altitude", ["5000", "25", "150", "170", "1"]),
+    ]
+
+    engine = calc_engine.EngineCalculators()
+    errors = []
+    for name, arguments in cases:
+        cli = subprocess.run(
+            [str(script_dir / f"{name}_calculator")] + arguments,
+            capture_output=True,
+            text=True,
+            timeout=2.0
+        )
+        returncode, actual = engine.calculate(name, *arguments)
+        if returncode != cli.returncode:
+            errors.append(f"{name} {arguments}: returned {returncode}, calculator returned {cli.returncode}")
+            continue
+        if cli.returncode != 0:
+            continue
+        expected = json.loads(cli.stdout)
+        if name == "flight":
+            # The calculator reports constants for the alternates
+            expected.pop("alternate_airports")
+            for section in expected:
+                errors.extend(f"{name}.{section}.{err}" for err in compare_json(expected[section], actual[section]))
+        else:
+            errors.extend(f"{name} {arguments}: {err}" for err in compare_json(expected, actual))
+
+    # Whole arrays at once must match the library sample by sample
+    try:
+        library = aircraft_mfd.CalculatorLibrary()
+    except OSError as e:
+        print(f"libmfd_calc not loaded: {e}")
+        return False
+
+    # The sliding IAS history gives the gust factor of the whole series,
+    # through the window filling up and then sliding, on every backend,
+    # down to a parked aircraft reading an IAS of 0
+    window = 5
+    gust_ias = [220.0, 230.0, 210.0, 240.0, 225.0, 190.0, 260.0, 220.0, 220.0, 220.0, 221.0, 219.0,
+                15.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        try:
+            expected_gust = calc_engine.rolling_gust_factor(gust_ias, window)
+            parked_gust = calc_engine.gust_factor([[220.0, 230.0], [0.0, 0.0]])
+        except RuntimeWarning as e:
+            print(f"❌ gust factor of a parked aircraft warns: {e}")
+            return False
+    if expected_gust[-1] != 0.0 or parked_gust[1] != 0.0:
+        errors.append(f"gust_factor of a parked aircraft: expected 0, got {expected_gust[-1]} and {parked_gust[1]}")
+    batch = subprocess.run(
+        [str(script_dir / "flight_calculator"), "--ias-window", str(window), "--batch"],
+        input="".join(",".join(flight_arguments[:4] + [str(ias)] + flight_arguments[5:]) + "\n" for ias in gust_ias),
+        capture_output=True,
+        text=True,
+        timeout=5.0
+    )
+    processes = aircraft_mfd.ProcessCalculators(script_dir)
+    gust_backends = [("library", library), ("process", processes), ("engine", engine)]
+    # The history is updated by libmfd_calc, or in Python when it is not built
+    history = aircraft_mfd.IasHistory(window)
+    fallback = aircraft_mfd.IasHistory(window, library_path=None)
+    if history.lib is None:
+        errors.append("IAS history not updated through libmfd_calc")
+    for i, ias in enumerate(gust_ias):
+        history.add(ias)
+        fallback.add(ias)
+        calculator_arguments = flight_arguments[:4] + [ias] + flight_arguments[5:]
+        gusts = [("flight_calculator", json.loads(batch.stdout.splitlines()[i])["wind"]["gust_factor"], 0.006),
+                 ("Python fallback", fallback.gust_factor(), 1e-12)]
+        gusts.extend((backend_name, backend.calculate("flight", *calculator_arguments, ias_history=history)[1]
+                      ["wind"]["gust_factor"], 1e-9) for backend_name, backend in gust_backends)
+        for backend_name, gust, tol in gusts:
+            if abs(gust - expected_gust[i]) > tol:
+                errors.append(f"{backend_name} gust_factor of sample {i}: expected {expected_gust[i]}, got {gust}")
+    processes.close()
+    if aircraft_mfd.IasHistory(1).gust_factor() != 0.0:
+        errors.append("gust_factor of an empty IAS history is not 0")
+    for bad_window in ("0", "513"):
+        returncode = subprocess.run(
+            [str(script_dir / "flight_calculator"), "--ias-window", bad_window] + flight_arguments,
+            capture_output=True,
+            timeout=2.0
+        ).returncode
+        if returncode != 1:
+            errors.append(f"--ias-window {bad_window}: returned {returncode}, expected 1")
+
+    # A small gust spread at a high IAS over a long series keeps its precision
+    steady_ias = 200.0 + 0.01 * np.sin(np.arange(5000) * 0.7)
+    steady_gust = calc_engine.rolling_gust_factor(steady_ias, window)
+    history = aircraft_mfd.IasHistory(window)
+    for i, ias in enumerate(steady_ias):
+        history.add(ias)
+        if abs(history.gust_factor() - steady_gust[i]) > 1e-12:
+            errors.append(f"Small gust of sample {i}: library {history.gust_factor()}, engine {steady_gust[i]}")
+            break
+
+    # The calculator tools, calc_engine and the MFD share one default window
+    if calc_engine.IAS_WINDOW != aircraft_mfd.IAS_WINDOW:
+        errors.append(f"Default IAS window: calc_engine {calc_engine.IAS_WINDOW}, MFD {aircraft_mfd.IAS_WINDOW}")
+    default_ias = [180.0 + 2.0 * i for i in range(aircraft_mfd.IAS_WINDOW + 10)]
+    batch = subprocess.run(
+        [str(script_dir / "flight_calculator"), "--batch"],
+        input="".join(",".join(flight_arguments[:4] + [str(ias)] + flight_arguments[5:]) + "\n" for ias in default_ias),
+        capture_output=True,
+        text=True,
+        timeout=5.0
+    )
+    default_gust = json.loads(batch.stdout.splitlines()[-1])["wind"]["gust_factor"]
+    expected_default_gust = calc_engine.rolling_gust_factor(default_ias)[-1]
+    if abs(default_gust - expected_default_gust) > 0.006:
+        errors.append(f"flight_calculator default window: gust_factor {default_gust}, "
+                      f"calc_engine {expected_default_gust}")
+    samples = 50
+    t = np.linspace(0.0, 1.0, samples)
+    tas = 200.0 + 80.0 * t
+    ias = 180.0 + 60.0 * t + 4.0 * np.sin(40.0 * t)
+    bank = 40.0 * np.sin(6.0 * t)
+    altitude = 35000.0 * (1.0 - t)
+    vs = -2500.0 * np.cos(3.0 * t)
+    arrays = {
+        "flight": calc_engine.flight(tas, tas - 10.0, 90.0 + 30.0 * t, 95.0 + 20.0 * t, ias, 0.4 + 0.3 * t,
+                                     altitude, altitude - 500.0, vs, 75000.0, bank, 120.0, 350.0, 0.82,
+                                     calc_engine.rolling_gust_factor(ias)),
+        "turn": calc_engine.turn_performance(tas, np.abs(bank), 90.0),
+        "vnav": calc_engine.vnav(altitude, 10000.0, 100.0 * t, tas - 10.0, vs),
+        "density_altitude": calc_engine.density_altitude(altitude, 15.0 - 50.0 * t, ias, tas),
+    }
+    history = aircraft_mfd.IasHistory(calc_engine.IAS_WINDOW)
+    for i in range(samples):
+        history.add(ias[i])
+        parts = library.calculate_all(tas[i], tas[i] - 10.0, 90.0 + 30.0 * t[i], 95.0 + 20.0 * t[i], ias[i],
+                                      0.4 + 0.3 * t[i], altitude[i], altitude[i] - 500.0, vs[i], 75000.0,
+                                      bank[i], 120.0, 350.0, 0.82, 15.0 - 50.0 * t[i], 90.0, 10000.0,
+                                      100.0 * t[i], 0, ias_history=history)
+        for name in aircraft_mfd.COMPUTE_ALL_PARTS:
+            returncode, expected = parts[name]
+            if returncode != 0:
+                errors.append(f"sample {i} {name}: library returned {returncode}")
+                continue
+            if name == "flight":
+                for section in expected:
+                    actual = {key: arrays[name][section][key][i] for key in arrays[name][section]}
+                    errors.extend(f"sample {i} {name}.{section}.{err}"
+                                  for err in compare_json(expected[section], actual, tol=1e-6))
+            else:
+                actual = {key: arrays[name][key][i] for key in arrays[name]}
+                errors.extend(f"sample {i} {name}: {err}" for err in compare_json(expected, actual, tol=1e-6))
+
+    if errors:
+        print("❌ NumPy engine mismatch:")
+        for err in errors:
+            print(f" - {err}")
+        return False
+    else:
+        print("✅ NumPy engine matches the C++ calculators")
+        return True
+
+def test_batch_mode():
+    print("Testing --batch")
+    import struct
+
+    script_dir = Path(__file__).parent
+    errors = []
+
+    # CSV in, JSON lines out: one line per record, same results as one-shot runs
+    rows = [["250", "25", "90"], ["180", "95", "90"], ["200", "x", "90"], ["300", "45", "180"]]
+    batch = subprocess.run(
+        [str(script_dir / "turn_calculator"), "--batch"],
+        input="tas_kts,bank_deg,course_change_deg\n" + "".join(",".join(row) + "\n" for row in rows),
+        capture_output=True,
+        text=True,
+        timeout=5.0
+    )
+    responses = [json.loads(line) for line in batch.stdout.splitlines()]
+    if len(responses) != len(rows):
+        errors.append(f"turn: {len(responses)} responses to {len(rows)} records")
+    for row, response in zip(rows, responses):
+        one_shot = subprocess.run(
+            [str(script_dir / "turn_calculator")] + row,
+            capture_output=True,
+            text=True,
+            timeout=2.0
+        )
+        expected = json.loads(one_shot.stdout) if one_shot.returncode == 0 else {"error": one_shot.returncode}
+        errors.extend(f"turn {row}: {err}" for err in compare_json(expected, response))
+    if "records/s" not in batch.stderr:
+        errors.append(f"turn: no throughput report ({batch.stderr!r})")
+
+    # Binary in, binary out: the same records as one-shot --binary runs
+    rows = [[250, 245, 90, 95, 220, 0.65, 35000, 35000, -500, 75000, 5, 120, 250, 0.82],
+            [120, 130, 270, 265, 110, 0.2, 3000, 2500, 700, 5000, 30, 55, 160, 0.3]]
+    batch = subprocess.run(
+        [str(script_dir / "flight_calculator"), "--batch", "--binary-input", "--binary"],
+        input=b"".join(struct.pack(f"<{len(row)}d", *row) for row in rows),
+        capture_output=True,
+        timeout=5.0
+    )
+    expected = [subprocess.run(
+        [str(script_dir / "flight_calculator"), "--binary"] + [str(value) for value in row],
+        capture_output=True,
+        timeout=2.0
+    ).stdout for row in rows]
+    # Apart from the gust factor (8-byte header, then the fifth wind field):
+    # the batch keeps the IAS of earlier records
+    gust = slice(40, 48)
+    records = [batch.stdout[i * len(expected[0]):(i + 1) * len(expected[0])] for i in range(len(rows))]
+    if len(batch.stdout) != sum(map(len, expected)) or any(
+            record[:gust.start] + record[gust.stop:] != one_shot[:gust.start] + one_shot[gust.stop:]
+            for record, one_shot in zip(records, expected)):
+        errors.append("flight: binary batch records differ from one-shot --binary records")
+    elif abs(struct.unpack("<d", records[1][gust])[0] - 1.0 / 3.0) > 1e-12:
+        errors.append(f"flight: batch gust factor {struct.unpack('<d', records[1][gust])[0]}, expected 1/3 "
+                      "(IAS 220 then 110)")
+
+    # Input ending inside a record
+    batch = subprocess.run(
+        [str(script_dir / "vnav_calculator"), "--batch", "--binary-input"],
+        input=struct.pack("<5d", 35000, 10000, 100, 450, -1500) + b"\0" * 12,
+        capture_output=True,
+        timeout=5.0
+    )
+    if batch.returncode != 2 or len(batch.stdout.splitlines()) != 1:
+        errors.append(f"vnav: truncated input returned {batch.returncode} with {batch.stdout!r}")
+
+    if errors:
+        print("❌ Batch mode mismatch:")
+        for err in errors:
+            print(f" - {err}")
+        return False
+    else:
+        print("✅ Batch mode matches the one-shot output")
+        return True
+
 def test_calculator(filename, arguments, expected_output=None, expected_return_code=0):
     print(f"Testing {filename}")
     script_dir = Path(__file__).parent
@@ -221,7 +747,13 @@ def main():
         test_vnav_calculator,
         test_density_altitude_calculator,
         test_wind_calculator,
-        test_flight_calculator
+        test_flight_calculator,
+        test_serve_mode,
+        test_calculator_library,
+        test_compute_all,
+        test_binary_output,
+        test_numpy_engine,
+        test_batch_mode
     ]
 
     any_failures = False
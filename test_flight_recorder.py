@@ -0,0 +1,317 @@
+import math
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import aircraft_mfd
+import flight_recorder
+
+
+def test_round_trip():
+    directory = Path(tempfile.mkdtemp())
+    library = aircraft_mfd.CalculatorLibrary()
+    parts = library.calculate_all(250, 245, 90, 95, 220, 0.65, 35000, 35000, -500, 75000, -10, 120, 250, 0.82,
+                                  -10, 90, 10000, 100, 0)
+    # Shaped like the data of a tick (see AircraftMFD.read_flight_data)
+    data = {field: None for field in aircraft_mfd.FIELD_DATAREFS}
+    data.update(tas=250.0, ias=220.0, aircraft="QWlyY3JhZnQ=", rpm=None, prop_rpm=2400)
+    data.update({key: parts[calculator][1] for key, calculator in aircraft_mfd.RESULT_CALCULATORS.items()})
+
+    recorder = flight_recorder.FlightRecorder(directory, aircraft_mfd.RECORDER_COLUMNS, block_rows=16)
+    for i in range(40):
+        recorder.record(1700000000.0 + i * 0.1, dict(data, ias=220.0 + i))
+    recorder.close()
+
+    with flight_recorder.RecordingReader(recorder.files[0]) as reader:
+        row = reader.row(39)
+        ias = reader.column("ias")
+        if len(reader) != 40 or list(ias) != [220.0 + i for i in range(40)]:
+            print(f"❌ Read back {len(reader)} rows, ias {list(ias)[:5]}...")
+            return False
+        expected = flight_recorder.flatten({key: value for key, value in data.items() if key != "aircraft"})
+        for column in aircraft_mfd.RECORDER_COLUMNS:
+            value = expected[column]
+            if column == "ias":
+                value = 259.0
+            if value is None:
+                if not math.isnan(row[column]):
+                    print(f"❌ {column}: missing value read back as {row[column]}")
+                    return False
+            elif row[column] != float(value):
+                print(f"❌ {column}: recorded {value}, read back {row[column]}")
+                return False
+        if row["timestamp"] != 1700000000.0 + 39 * 0.1:
+            print(f"❌ Timestamp read back as {row['timestamp']}")
+            return False
+
+    print("✅ Every recorder column reads back from the memory map")
+    return True
+
+
+def test_rotation():
+    directory = Path(tempfile.mkdtemp())
+    columns = ["a", "b"]
+    file_bytes = flight_recorder.header_size(3) + 2 * flight_recorder.block_size(3, 8)
+    recorder = flight_recorder.FlightRecorder(directory, columns, block_rows=8, max_file_bytes=file_bytes,
+                                              max_files=3, ring_blocks=64)
+    for i in range(100):
+        recorder.record(float(i), {"a": i, "b": -i})
+    recorder.close()
+
+    files = flight_recorder.recording_files(directory)
+    sizes = [path.stat().st_size for path in files]
+    if len(files) != 3 or files != recorder.files or max(sizes) > file_bytes:
+        print(f"❌ Rotation kept {len(files)} files of {sizes} bytes (limit 3 of {file_bytes})")
+        return False
+
+    # 100 rows = 13 blocks, 2 per file: the last 3 files hold blocks 8-12 (rows 64-99)
+    columns = flight_recorder.read_recording(files)
+    if list(columns["a"]) != [float(i) for i in range(64, 100)]:
+        print(f"❌ Rotated files hold rows {list(columns['a'])}")
+        return False
+
+    print("✅ Files rotate by size and the oldest are deleted")
+    return True
+
+
+def test_sessions():
+    directory = Path(tempfile.mkdtemp())
+    file_bytes = flight_recorder.header_size(2) + flight_recorder.block_size(2, 8)
+    for session, start in (("20240101-120000", 0.0), ("20240102-090000", 86400.0)):
+        recorder = flight_recorder.FlightRecorder(directory, ["a"], block_rows=8, max_file_bytes=file_bytes)
+        recorder.session = session
+        for i in range(20):
+            recorder.record(start + i, {"a": i})
+        recorder.close()
+
+    sessions = flight_recorder.recording_sessions(directory)
+    if list(sessions) != ["mfd-20240101-120000", "mfd-20240102-090000"] or [len(files) for files in
+                                                                            sessions.values()] != [3, 3]:
+        print(f"❌ Sessions {sessions}")
+        return False
+
+    # A directory plays one session, not every file in it
+    newest = flight_recorder.read_recording(flight_recorder.session_files(directory))["timestamp"]
+    oldest = flight_recorder.read_recording(flight_recorder.session_files(directory, "mfd-20240101-120000"))
+    if newest[0] != 86400.0 or len(newest) != 20 or oldest["timestamp"][-1] != 19.0:
+        print(f"❌ Session files hold {list(newest)}")
+        return False
+    try:
+        flight_recorder.session_files(directory, "mfd-20230101-000000")
+        print("❌ Unknown session accepted")
+        return False
+    except ValueError:
+        pass
+
+    # Recorders started within the same second keep their own files
+    for i in range(3):
+        recorder = flight_recorder.FlightRecorder(directory, ["a"], block_rows=8)
+        recorder.session = "20240103-000000"
+        recorder.record(172800.0 + i, {"a": i})
+        recorder.close()
+    sessions = flight_recorder.recording_sessions(directory)
+    same_second = ["mfd-20240103-000000", "mfd-20240103-000000.2", "mfd-20240103-000000.3"]
+    if list(sessions)[2:] != same_second:
+        print(f"❌ Sessions started within one second: {list(sessions)[2:]}")
+        return False
+    for i, session in enumerate(same_second):
+        values = flight_recorder.read_recording(sessions[session])["a"]
+        if list(values) != [float(i)]:
+            print(f"❌ Session {session} holds {list(values)}")
+            return False
+
+    print("✅ Recordings are grouped into sessions and one session is replayed")
+    return True
+
+
+def test_bad_files():
+    directory = Path(tempfile.mkdtemp())
+    short = directory / "short.mfdrec"
+    short.write_bytes(flight_recorder.MAGIC[:4])
+    other = directory / "other.mfdrec"
+    other.write_bytes(b"\0" * flight_recorder.header_size(2))
+    for path in (short, other, directory / "empty.mfdrec"):
+        path.touch()
+        try:
+            flight_recorder.RecordingReader(path)
+            print(f"❌ {path.name} opened as a recording")
+            return False
+        except ValueError:
+            pass
+
+    print("✅ Files that are not recordings are rejected")
+    return True
+
+
+def test_bounded_memory():
+    directory = Path(tempfile.mkdtemp())
+    recorder = flight_recorder.FlightRecorder(directory, ["a"], block_rows=10, ring_blocks=3)
+
+    # Stall the writer: blocks pile up in the ring until none is free
+    release = threading.Event()
+    write_block = recorder.write_block
+    def stalled_write_block(block, rows):
+        release.wait(5.0)
+        write_block(block, rows)
+    recorder.write_block = stalled_write_block
+
+    for i in range(1000):
+        recorder.record(float(i), {"a": i})
+    blocks = len(recorder.blocks)
+    recorded, dropped = recorder.rows_recorded, recorder.rows_dropped
+    release.set()
+    recorder.close()
+
+    if blocks != 3 or recorded != 30 or dropped != 970:
+        print(f"❌ Stalled writer: {blocks} blocks, {recorded} rows kept, {dropped} dropped")
+        return False
+    with flight_recorder.RecordingReader(recorder.files[0]) as reader:
+        if list(reader.column("a")) != [float(i) for i in range(30)]:
+            print("❌ Rows kept while the writer stalled were not written")
+            return False
+
+    print("✅ Memory stays bounded when the writer falls behind")
+    return True
+
+
+def test_live_file():
+    directory = Path(tempfile.mkdtemp())
+    recorder = flight_recorder.FlightRecorder(directory, ["a"], block_rows=4)
+    for i in range(10):
+        recorder.record(float(i), {"a": i * 0.5})
+    recorder.flush(wait=True)
+
+    try:
+        # Readable while the recorder still has the file open
+        with flight_recorder.RecordingReader(recorder.files[0]) as reader:
+            block = reader.block_column(1, "a")
+            values = list(block)
+            block.release()
+            if len(reader) != 10 or values != [2.0, 2.5, 3.0, 3.5]:
+                print(f"❌ Live file read {len(reader)} rows, block 1 {values}")
+                return False
+    finally:
+        recorder.close()
+
+    print("✅ A file being written can be memory-mapped")
+    return True
+
+
+def record_flight(directory, rows=40):
+    """Record rows 0.1 s apart with ias 200, 201, ... and no heading"""
+    recorder = flight_recorder.FlightRecorder(directory, aircraft_mfd.RECORDER_COLUMNS, block_rows=16)
+    for i in range(rows):
+        recorder.record(1700000000.0 + i * 0.1, {"ias": 200.0 + i, "alt": 5000.0, "heading": None})
+    recorder.close()
+    return recorder.files
+
+
+def test_replay_steps():
+    files = record_flight(Path(tempfile.mkdtemp()))
+    api = aircraft_mfd.ReplayAPI(files, speed=None)
+    specs = [aircraft_mfd.FIELD_DATAREFS["ias"], aircraft_mfd.FIELD_DATAREFS["heading"],
+             aircraft_mfd.FIELD_DATAREFS["aircraft"]]
+
+    ias, clocks = [], []
+    while api.is_connected():
+        clocks.append(api.now())
+        values = api.get_many(specs)
+        if api.is_connected():
+            ias.append(values[specs[0]])
+            if values[specs[1]] is not None or values[specs[2]] is not None:
+                print(f"❌ Unrecorded values replayed as {values}")
+                return False
+    api.close()
+
+    if ias != [200.0 + i for i in range(40)]:
+        print(f"❌ Stepped replay read ias {ias}")
+        return False
+    if abs(clocks[-2] - 3.9) > 1e-6 or clocks != sorted(clocks):
+        print(f"❌ Replay clock ran {clocks[:3]} ... {clocks[-2:]}")
+        return False
+
+    print("✅ Replay steps through every recorded row, then disconnects")
+    return True
+
+
+def test_replay_seek():
+    files = record_flight(Path(tempfile.mkdtemp()))
+    api = aircraft_mfd.ReplayAPI(files, speed=None)
+    spec = aircraft_mfd.FIELD_DATAREFS["ias"]
+    for _ in range(30):
+        api.now()
+    clock = api.now()
+
+    api.seek(1700000000.0 + 1.05)  # Between rows 10 and 11
+    resumed = api.now()
+    ias = api.get_many([spec])[spec]
+    api.close()
+
+    if ias != 211.0 or resumed < clock:
+        print(f"❌ Seek resumed at ias {ias}, clock {clock} -> {resumed}")
+        return False
+
+    print("✅ Seeking by timestamp resumes at the next recorded row")
+    return True
+
+
+def test_replay_speed():
+    files = record_flight(Path(tempfile.mkdtemp()))
+    api = aircraft_mfd.ReplayAPI(files, speed=10.0)
+    spec = aircraft_mfd.FIELD_DATAREFS["ias"]
+    started = time.monotonic()
+    api.now()
+    first = api.get_many([spec])[spec]
+    time.sleep(0.2)  # 2 s of recording at 10x
+    clock = api.now()
+    ias = api.get_many([spec])[spec]
+    elapsed = time.monotonic() - started
+    time.sleep(0.3)
+    api.now()
+    ended = not api.is_connected()
+    api.close()
+
+    if first != 200.0 or not 2.0 <= clock <= elapsed * 10.0 or abs(ias - 200.0 - clock * 10.0) > 1.0:
+        print(f"❌ 10x replay read ias {first} then {ias} at clock {clock}")
+        return False
+    if not ended:
+        print("❌ 10x replay still connected after the end of the recording")
+        return False
+
+    print("✅ Replay follows the recorded timestamps at 10x")
+    return True
+
+
+def run_test(test_fn):
+    """Run a test function and return True if it passed, False otherwise."""
+    print(f"Running {test_fn.__name__}")
+    result = test_fn()
+    if not result:
+        print(f"❌ {test_fn.__name__} FAILED\n")
+    return result
+
+
+def main():
+    tests = [
+        test_round_trip,
+        test_rotation,
+        test_sessions,
+        test_bad_files,
+        test_bounded_memory,
+        test_live_file,
+        test_replay_steps,
+        test_replay_seek,
+        test_replay_speed
+    ]
+
+    any_failures = False
+    for test_fn in tests:
+        if not run_test(test_fn):
+            any_failures = True
+
+    exit(1 if any_failures else 0)
+
+
+if __name__ == "__main__":
+    main()
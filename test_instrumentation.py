@@ -0,0 +1,122 @@
+import tempfile
+import time
+from pathlib import Path
+
+import aircraft_mfd
+import instrumentation
+import xplane_stub_server
+
+
+def test_rolling_histogram():
+    histogram = instrumentation.RollingHistogram(buckets=(0.001, 0.01, 0.1), window=100)
+    for _ in range(1000):
+        histogram.observe(0.05)  # Pushed out of the window below
+    for i in range(100):
+        histogram.observe(0.0001 if i < 98 else 0.2)
+
+    summary = histogram.summary()
+    if summary["count"] != 100 or summary["max"] != 0.2:
+        print(f"❌ Rolling window holds {summary}")
+        return False
+    if not 0.0 < summary["p50"] <= 0.001 or summary["p99"] != 0.2:
+        print(f"❌ Quantiles p50 {summary['p50']}, p99 {summary['p99']}")
+        return False
+    if histogram.count != 1100 or histogram.counts != [98, 0, 1000, 2]:
+        print(f"❌ Totals since start: {histogram.count} in {histogram.counts}")
+        return False
+
+    print("✅ Rolling quantiles follow the window, totals keep every observation")
+    return True
+
+
+def test_prometheus_text():
+    metrics = instrumentation.Metrics(buckets=(0.001, 0.01))
+    with metrics.span("acquire.read"):
+        pass
+    metrics.observe("acquire.read", 0.005)
+    metrics.count("api.requests", 3)
+    text = metrics.prometheus_text()
+
+    expected = [
+        '# TYPE mfd_span_seconds histogram',
+        'mfd_span_seconds_bucket{span="acquire.read",le="0.001"} 1',
+        'mfd_span_seconds_bucket{span="acquire.read",le="0.01"} 2',
+        'mfd_span_seconds_bucket{span="acquire.read",le="+Inf"} 2',
+        'mfd_span_seconds_count{span="acquire.read"} 2',
+        '# TYPE mfd_events_total counter',
+        'mfd_events_total{event="api.requests"} 3',
+    ]
+    missing = [line for line in expected if line not in text.splitlines()]
+    if missing:
+        print(f"❌ Missing from the Prometheus text: {missing}")
+        return False
+
+    path = Path(tempfile.mkdtemp()) / "mfd.prom"
+    writer = instrumentation.MetricsWriter(metrics, path, interval=60.0)
+    writer.start()
+    writer.stop()  # Writes once more on the way out
+    if path.read_text() != metrics.prometheus_text():
+        print("❌ Metrics file does not match the registry")
+        return False
+
+    print("✅ Metrics render in the Prometheus text format")
+    return True
+
+
+def test_pipeline_spans():
+    # The MFD reports to the shared registry: start from a clean one
+    instrumentation.REGISTRY = instrumentation.Metrics()
+    server = xplane_stub_server.start_in_background()
+    api = aircraft_mfd.XPlaneAPI(f"http://127.0.0.1:{server.server_port}/api/v2", index_path=None)
+    mfd = aircraft_mfd.AircraftMFD.__new__(aircraft_mfd.AircraftMFD)
+    mfd.init_state(api, aircraft_mfd.make_calculators())
+
+    try:
+        for _ in range(5):
+            mfd.acquire_snapshot()
+            time.sleep(0.1)
+    finally:
+        mfd.calculators.close()
+        api.close()
+        server.shutdown()
+
+    registry = instrumentation.REGISTRY
+    spans = {"acquire.read", "api.request"}
+    events = {"api.requests", "api.id_cache_hits", "scheduler.fields_read", "scheduler.fields_cached"}
+    if not spans <= set(registry.histograms) or not events <= set(registry.counters):
+        print(f"❌ Recorded spans {sorted(registry.histograms)}, events {sorted(registry.counters)}")
+        return False
+    if registry.counter("api.requests").total != registry.histogram("api.request").count:
+        print("❌ Request counter and request span disagree")
+        return False
+
+    print("✅ Acquisition reports its spans and counters")
+    return True
+
+
+def run_test(test_fn):
+    """Run a test function and return True if it passed, False otherwise."""
+    print(f"Running {test_fn.__name__}")
+    result = test_fn()
+    if not result:
+        print(f"❌ {test_fn.__name__} FAILED\n")
+    return result
+
+
+def main():
+    tests = [
+        test_rolling_histogram,
+        test_prometheus_text,
+        test_pipeline_spans
+    ]
+
+    any_failures = False
+    for test_fn in tests:
+        if not run_test(test_fn):
+            any_failures = True
+
+    exit(1 if any_failures else 0)
+
+
+if __name__ == "__main__":
+    main()
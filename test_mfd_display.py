@@ -0,0 +1,300 @@
+import gc
+import tkinter as tk
+
+import aircraft_mfd
+import instrumentation
+import xplane_stub_server
+
+
+def make_display():
+    """MFD display state without a window (StringVars only need an interpreter)"""
+    tk._default_root = tk.Tcl()
+    mfd = aircraft_mfd.AircraftMFD.__new__(aircraft_mfd.AircraftMFD)
+    mfd.init_data_variables()
+    return mfd
+
+
+def tick_data(**changes):
+    """Tick data shaped like read_flight_data() output"""
+    data = {field: None for field in aircraft_mfd.FIELD_DATAREFS}
+    data.update(lat=51.47, lon=-0.4543, alt=3048.0, agl=3000.0, heading=90.0, pitch=3.0, roll=15.0, track=94.0,
+                ias=220.0, gs=123.6, vs=500.0, mach=0.42, n1=85.0, n2=93.0, rpm=None, prop_rpm=None,
+                throttle=0.8, fuel_total=8000.0)
+    data["turn"] = {"radius_nm": 4.2, "turn_rate_dps": 1.9, "time_to_turn_sec": 47.0, "standard_rate_bank": 31.0}
+    data.update(changes)
+    return data
+
+
+def count_sets(mfd):
+    """Wrap every display variable's set() to count the calls"""
+    calls = []
+    for name, var in mfd.display_vars.items():
+        set_text = var.set
+        var.set = lambda text, name=name, set_text=set_text: (calls.append(name), set_text(text))
+    return calls
+
+
+def test_render_text():
+    mfd = make_display()
+    mfd.render_data(tick_data(n1=0, rpm=2400.0, lat=-33.25))
+
+    expected = {
+        "lat": "033°15.000'S",
+        "alt": "10000 FT",
+        "heading": "090.00°",
+        "roll": "+15.00°",
+        "gs": "240.3 KTS",
+        "n1": "2400 RPM",
+        "n2": "93.0%",
+        "turn_radius": "4.20 NM",
+        "headwind": "---",  # No flight result yet
+    }
+    wrong = {name: mfd.display_vars[name].get() for name, text in expected.items()
+             if mfd.display_vars[name].get() != text}
+    if wrong:
+        print(f"❌ Rendered {wrong}")
+        return False
+
+    print("✅ Fields render with their units and formats")
+    return True
+
+
+def test_render_changes_only():
+    mfd = make_display()
+    calls = count_sets(mfd)
+    mfd.render_data(tick_data())
+    first = len(calls)
+
+    # Same values: nothing is formatted or set
+    calls.clear()
+    mfd.render_data(tick_data())
+    if calls:
+        print(f"❌ Unchanged tick set {calls}")
+        return False
+
+    # A change too small to show formats the field but does not set it
+    mfd.render_data(tick_data(heading=90.001, ias=221.0))
+    if calls != ["ias"]:
+        print(f"❌ Tick with one visible change set {calls}")
+        return False
+
+    # A missing value keeps the last text
+    calls.clear()
+    mfd.render_data(tick_data(heading=None, ias=221.0))
+    if calls or mfd.heading_var.get() != "090.00°":
+        print(f"❌ Missing heading set {calls}, shows {mfd.heading_var.get()}")
+        return False
+
+    print(f"✅ Only changed text reaches Tk ({first} variables on the first tick, then 1 and 0)")
+    return True
+
+
+def test_canvas_layout():
+    width, height = 890.0, 800.0
+    boxes = aircraft_mfd.section_boxes(width, height, 0)
+    if sorted(boxes) != list(range(1, 10)):
+        print(f"❌ All-panels view shows panels {sorted(boxes)}")
+        return False
+    # Three columns of three, in the label renderer's order, without overlap
+    if not boxes[1][2] < boxes[4][0] < boxes[4][2] < boxes[7][0] or not boxes[1][3] < boxes[2][1] < boxes[3][1]:
+        print(f"❌ Panels overlap or are out of order: {boxes}")
+        return False
+    if boxes[9][2] > width or boxes[9][3] > height:
+        print(f"❌ Panel 9 outside the canvas: {boxes[9]}")
+        return False
+
+    full = aircraft_mfd.section_boxes(width, height, 6)
+    if list(full) != [6] or full[6][2] - full[6][0] < width - 2 * aircraft_mfd.CANVAS_PAD:
+        print(f"❌ Full-screen ENGINE: {full}")
+        return False
+    if aircraft_mfd.section_boxes(width, height, aircraft_mfd.DIAGNOSTICS_MODE):
+        print("❌ Panels drawn under the diagnostics panel")
+        return False
+
+    rows = aircraft_mfd.row_centers(full[6], 33.0, 4)
+    if rows != sorted(rows) or rows[0] <= full[6][1] + 33.0 or rows[-1] >= full[6][3]:
+        print(f"❌ Rows at {rows} in {full[6]}")
+        return False
+
+    print("✅ Canvas panels are laid out like the label panels")
+    return True
+
+
+def test_frame_clock():
+    clock = aircraft_mfd.FrameClock(rate=10.0)
+    now = 100.0
+    delays = []
+    for _ in range(20):
+        clock.start_frame(now)
+        now += 0.03  # Work
+        delay, skipped = clock.next_delay(now)
+        delays.append(delay)
+        now += delay
+    # The work is made up for: frames start every 100 ms, not every 130 ms
+    if abs(delays[-1] - 0.07) > 1e-9 or abs(clock.achieved_rate() - 10.0) > 1e-6:
+        print(f"❌ Delay {delays[-1]:.3f} s, achieved {clock.achieved_rate():.2f} Hz")
+        return False
+
+    # A frame started late keeps the next deadline on the grid
+    late = clock.start_frame(now + 0.004)
+    delay, skipped = clock.next_delay(now + 0.034)
+    if abs(late - 0.004) > 1e-9 or abs(delay - 0.066) > 1e-9 or skipped:
+        print(f"❌ Late frame: lateness {late}, next in {delay}, skipped {skipped}")
+        return False
+    now += 0.1
+
+    # A 250 ms frame skips the two frames it overran instead of queueing them
+    clock.start_frame(now)
+    delay, skipped = clock.next_delay(now + 0.25)
+    if skipped != 2 or abs(delay - 0.05) > 1e-9 or clock.skipped != 2:
+        print(f"❌ Overrun: next in {delay}, skipped {skipped}")
+        return False
+
+    print("✅ Frames follow absolute deadlines and overruns skip frames")
+    return True
+
+
+def requests_per_second(server, display_mode, seconds=5.0):
+    """Web API requests per simulated second with a display mode shown"""
+    gc.collect()  # Free earlier tests' Tk variables here, not on a reader thread
+    api = aircraft_mfd.XPlaneAPI(f"http://127.0.0.1:{server.server_port}/api/v2", index_path=None)
+    mfd = aircraft_mfd.AircraftMFD.__new__(aircraft_mfd.AircraftMFD)
+    mfd.init_state(api, aircraft_mfd.make_calculators())
+    mfd.display_mode = display_mode
+    period = mfd.scheduler.period
+    tick = [0]
+    api.now = lambda: tick[0] * period  # Back-to-back ticks on a simulated clock
+    try:
+        mfd.acquire_snapshot()  # First tick reads everything
+        tick[0] += 1
+        instrumentation.REGISTRY = instrumentation.Metrics()
+        ticks = int(seconds / period)
+        for _ in range(ticks):
+            snapshot = mfd.acquire_snapshot()
+            tick[0] += 1
+        calculations = instrumentation.REGISTRY.histograms.get("acquire.calculate")
+        return (instrumentation.REGISTRY.counter("api.requests").total / seconds,
+                calculations.count if calculations else 0, snapshot)
+    finally:
+        mfd.calculators.close()
+        api.close()
+
+
+def test_panel_demand():
+    server = xplane_stub_server.start_in_background()
+    try:
+        all_panels, all_calculations, _ = requests_per_second(server, 0)
+        position, position_calculations, snapshot = requests_per_second(server, 1)
+        diagnostics, diagnostics_calculations, _ = requests_per_second(server, aircraft_mfd.DIAGNOSTICS_MODE)
+    finally:
+        server.shutdown()
+
+    # Apart from IAS, read at its full rate whatever is shown for the gust factor
+    if position - aircraft_mfd.IAS_RATE > all_panels * 0.25:
+        print(f"❌ POSITION panel alone reads {position:.0f} requests/s, all panels {all_panels:.0f}")
+        return False
+    if position_calculations >= all_calculations / 10:
+        print(f"❌ POSITION panel ran the calculators {position_calculations} times ({all_calculations} for all)")
+        return False
+    # The diagnostics panel measures the pipeline at its full load
+    if diagnostics != all_panels or diagnostics_calculations != all_calculations:
+        print(f"❌ DIAGNOSTICS panel reads {diagnostics:.0f} requests/s and ran the calculators "
+              f"{diagnostics_calculations} times ({all_panels:.0f} and {all_calculations} for all)")
+        return False
+    # Hidden fields are still refreshed in the background
+    if snapshot.data["n1"] is None or snapshot.data.get("flight") is None:
+        print("❌ Background refresh missing for hidden panels")
+        return False
+
+    print(f"✅ Full-screen POSITION reads {position:.0f} requests/s instead of {all_panels:.0f}")
+    return True
+
+
+def test_gust_samples():
+    server = xplane_stub_server.start_in_background()
+    api = aircraft_mfd.XPlaneAPI(f"http://127.0.0.1:{server.server_port}/api/v2", index_path=None)
+    mfd = aircraft_mfd.AircraftMFD.__new__(aircraft_mfd.AircraftMFD)
+    mfd.init_state(api, aircraft_mfd.make_calculators())
+    mfd.display_mode = 1  # POSITION: no IAS, no flight results shown
+    samples = []
+    add = mfd.ias_history.add
+    mfd.ias_history.add = lambda ias: (samples.append(ias), add(ias))
+    period = mfd.scheduler.period
+    tick = [0]
+    api.now = lambda: tick[0] * period
+    try:
+        for _ in range(int(2.0 / period)):
+            mfd.acquire_snapshot()
+            tick[0] += 1
+    finally:
+        mfd.calculators.close()
+        api.close()
+        server.shutdown()
+
+    # Every IAS reading, at IAS_RATE, feeds the history behind the gust factor
+    expected = 2.0 * aircraft_mfd.IAS_RATE
+    if abs(len(samples) - expected) > 1:
+        print(f"❌ {len(samples)} IAS samples in 2 s with POSITION shown, expected {expected:.0f}")
+        return False
+    # So the default window is 2 s of recent IAS when the WIND panel is shown
+    if mfd.ias_history.state.count != aircraft_mfd.IAS_WINDOW or mfd.ias_history.gust_factor() <= 0.0:
+        print(f"❌ History holds {mfd.ias_history.state.count} samples, gust {mfd.ias_history.gust_factor()}")
+        return False
+
+    print(f"✅ The gust factor gets {len(samples)} IAS samples in 2 s whatever panel is shown")
+    return True
+
+
+def test_demand_switch():
+    scheduler = aircraft_mfd.DatarefScheduler(aircraft_mfd.DATAREF_RATES, background_rate=0.2)
+    scheduler.update(dict.fromkeys(aircraft_mfd.AIRCRAFT_LIMIT_FIELDS, 1.0))
+    scheduler.set_demand(aircraft_mfd.PANEL_DEMANDS[1].fields)
+    scheduler.due_fields(0.0)
+
+    # Within the background period, only the demanded fields come due
+    due = set(scheduler.due_fields(1.0))
+    if not due <= aircraft_mfd.PANEL_DEMANDS[1].fields or "lat" not in due:
+        print(f"❌ Due with POSITION shown: {sorted(due)}")
+        return False
+
+    # Showing another panel reads its fields on the next tick
+    scheduler.set_demand(aircraft_mfd.PANEL_DEMANDS[6].fields)
+    due = set(scheduler.due_fields(1.01))
+    if not {"n1", "n2", "throttle", "fuel_total"} <= due:
+        print(f"❌ Due after switching to ENGINE: {sorted(due)}")
+        return False
+
+    print("✅ Fields of a newly shown panel are read on the next tick")
+    return True
+
+
+def run_test(test_fn):
+    """Run a test function and return True if it passed, False otherwise."""
+    print(f"Running {test_fn.__name__}")
+    result = test_fn()
+    if not result:
+        print(f"❌ {test_fn.__name__} FAILED\n")
+    return result
+
+
+def main():
+    tests = [
+        test_render_text,
+        test_render_changes_only,
+        test_canvas_layout,
+        test_frame_clock,
+        test_panel_demand,
+        test_gust_samples,
+        test_demand_switch
+    ]
+
+    any_failures = False
+    for test_fn in tests:
+        if not run_test(test_fn):
+            any_failures = True
+
+    exit(1 if any_failures else 0)
+
+
+if __name__ == "__main__":
+    main()
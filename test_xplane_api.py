@@ -0,0 +1,348 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+import aircraft_mfd
+import flight_recorder
+import xplane_stub_server
+
+
+def test_rest_transport():
+    server = xplane_stub_server.start_in_background()
+    api = aircraft_mfd.XPlaneAPI(base_url_for(server), index_path=None)
+
+    try:
+        if not api.load_dataref_index(name for name, _ in aircraft_mfd.MFD_DATAREFS):
+            print("❌ Could not load dataref index")
+            return False
+
+        values = api.get_many(aircraft_mfd.MFD_DATAREFS)
+        missing = [name for (name, _), value in values.items() if value is None]
+        if missing or len(values) != len(aircraft_mfd.MFD_DATAREFS):
+            print(f"❌ No value for: {missing}")
+            return False
+
+        stats = api.connection_stats()
+        if stats["reused"] == 0:
+            print(f"❌ Connections were not reused: {stats}")
+            return False
+
+        print("✅ REST transport read every MFD dataref")
+        return True
+    finally:
+        api.close()
+        server.shutdown()
+
+
+def test_websocket_transport():
+    if not aircraft_mfd.WEBSOCKET_AVAILABLE:
+        print("⚠️  websocket-client not installed, skipping")
+        return True
+
+    server = xplane_stub_server.start_in_background()
+    api = aircraft_mfd.XPlaneWebSocketAPI(base_url_for(server), index_path=None)
+
+    try:
+        api.load_dataref_index(name for name, _ in aircraft_mfd.MFD_DATAREFS)
+        api.subscribe(aircraft_mfd.MFD_DATAREFS)
+
+        # Wait for the first push to fill the table
+        deadline = time.monotonic() + 2.0
+        while len(api.latest_values) < len(aircraft_mfd.MFD_DATAREFS) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        requests_before = api.connection_stats()["requests"]
+        values = {
+            spec: api.get_dataref_value(*spec)
+            for spec in aircraft_mfd.MFD_DATAREFS
+        }
+        requests_after = api.connection_stats()["requests"]
+
+        missing = [name for (name, _), value in values.items() if value is None]
+        if missing:
+            print(f"❌ No value for: {missing}")
+            return False
+
+        if requests_after != requests_before:
+            print(f"❌ Reads went over REST ({requests_after - requests_before} requests)")
+            return False
+
+        n1 = values[("sim/cockpit2/engine/indicators/N1_percent", 0)]
+        if not isinstance(n1, float):
+            print(f"❌ Indexed dataref not unwrapped: {n1!r}")
+            return False
+
+        print("✅ WebSocket transport served every MFD dataref from the pushed table")
+        return True
+    finally:
+        api.close()
+        server.shutdown()
+
+
+def test_circuit_breaker():
+    server = xplane_stub_server.start_in_background()
+    api = aircraft_mfd.XPlaneAPI(base_url_for(server), index_path=None)
+
+    try:
+        api.load_dataref_index(name for name, _ in aircraft_mfd.MFD_DATAREFS)
+        if not api.is_connected():
+            print("❌ Not connected after loading the index")
+            return False
+
+        # Simulate X-Plane going away
+        server.shutdown()
+        server.server_close()
+        api.session.close()
+
+        api.get_many(aircraft_mfd.MFD_DATAREFS)
+        if api.is_connected():
+            print(f"❌ Still connected after failed reads (breaker {api.breaker.state})")
+            return False
+
+        started = time.monotonic()
+        values = api.get_many(aircraft_mfd.MFD_DATAREFS)
+        elapsed = time.monotonic() - started
+        if any(value is not None for value in values.values()) or elapsed > 0.1:
+            print(f"❌ Reads were not short-circuited ({elapsed:.3f}s)")
+            return False
+
+        print("✅ Circuit breaker opened and short-circuited reads")
+        return True
+    finally:
+        api.close()
+
+
+def test_breaker_probe_released():
+    breaker = aircraft_mfd.CircuitBreaker(base_backoff=0.01)
+    api = aircraft_mfd.XPlaneAPI("http://127.0.0.1:9/api/v2", index_path=None, breaker=breaker)
+
+    def drop_mid_body(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("Connection broken: IncompleteRead")
+
+    api.session.get = drop_mid_body
+    try:
+        # The half-open probe fails with an error other than a connection error or timeout
+        try:
+            api.get("/datarefs/count")
+            print("❌ Request did not fail")
+            return False
+        except requests.exceptions.ChunkedEncodingError:
+            pass
+        if breaker.probe_in_flight or breaker.state != breaker.OPEN:
+            print(f"❌ Breaker {breaker.state} with the probe in flight: {breaker.probe_in_flight}")
+            return False
+
+        time.sleep(0.05)
+        if not breaker.allow_request():
+            print("❌ No new probe allowed after the backoff")
+            return False
+
+        print("✅ A probe failing mid-body releases the breaker for the next probe")
+        return True
+    finally:
+        api.close()
+
+
+def test_negative_cache():
+    server = xplane_stub_server.start_in_background()
+    api = aircraft_mfd.XPlaneAPI(base_url_for(server), index_path=None)
+    missing_spec = ("sim/aircraft/engine/acf_does_not_exist", 0)
+
+    try:
+        api.load_dataref_index([name for name, _ in aircraft_mfd.MFD_DATAREFS] + [missing_spec[0]])
+        api.set_aircraft("b738.acf")
+
+        requests_before = api.connection_stats()["requests"]
+        for _ in range(5):
+            if api.get_many([missing_spec])[missing_spec] is not None:
+                print("❌ Missing dataref returned a value")
+                return False
+        requests_after = api.connection_stats()["requests"]
+        if requests_after != requests_before:
+            print(f"❌ Known-missing dataref cost {requests_after - requests_before} requests")
+            return False
+
+        # Loading another aircraft makes the name worth looking up again
+        if not api.set_aircraft("c172.acf") or api.is_known_missing(missing_spec[0]):
+            print("❌ Aircraft change did not clear the negative cache")
+            return False
+        api.get_many([missing_spec])
+        if api.connection_stats()["requests"] == requests_after:
+            print("❌ Missing dataref was not looked up again after the aircraft changed")
+            return False
+
+        print("✅ Known-missing datarefs are skipped until the aircraft changes")
+        return True
+    finally:
+        api.close()
+        server.shutdown()
+
+
+def test_fault_injection():
+    faults = xplane_stub_server.Faults(latency=0.05, seed=1)
+    server = xplane_stub_server.start_in_background(faults=faults)
+    api = aircraft_mfd.XPlaneAPI(base_url_for(server), index_path=None, timeout=0.5)
+
+    try:
+        started = time.monotonic()
+        if api.get_dataref_count() is None or time.monotonic() - started < 0.05:
+            print(f"❌ Latency not applied ({time.monotonic() - started:.3f}s)")
+            return False
+
+        # Every request fails: the breaker must open after its threshold
+        faults.error_rate = 1.0
+        for _ in range(api.breaker.failure_threshold):
+            if api.get_dataref_count() is not None:
+                print("❌ Injected error returned a value")
+                return False
+        if api.is_connected() or faults.errors != api.breaker.failure_threshold:
+            print(f"❌ {faults.errors} injected errors left the breaker {api.breaker.state}")
+            return False
+
+        # Dropped connections surface as connection errors
+        faults.error_rate = 0.0
+        faults.drop_rate = 1.0
+        api.breaker = aircraft_mfd.CircuitBreaker()
+        try:
+            api.get_dataref_count()
+            print("❌ Dropped request returned a response")
+            return False
+        except aircraft_mfd.requests.ConnectionError:
+            pass
+
+        # Responses slower than the client timeout
+        faults.drop_rate = 0.0
+        faults.latency = 1.0
+        api.breaker = aircraft_mfd.CircuitBreaker()
+        started = time.monotonic()
+        try:
+            api.get_dataref_count()
+            print("❌ Slow response did not time out")
+            return False
+        except (aircraft_mfd.requests.Timeout, aircraft_mfd.requests.ConnectionError):
+            pass  # urllib3 reports a read timeout with no read retries left as a connection error
+        if time.monotonic() - started > 0.9:
+            print(f"❌ Timeout took {time.monotonic() - started:.3f}s")
+            return False
+
+        print("✅ Injected latency, errors, drops and timeouts reach the client")
+        return True
+    finally:
+        api.close()
+        server.shutdown()
+
+
+def test_recorded_source():
+    directory = Path(tempfile.mkdtemp())
+    recorder = flight_recorder.FlightRecorder(directory, aircraft_mfd.RECORDER_COLUMNS)
+    recorder.record(1700000000.0, {"ias": 180.0, "n1": 75.0, "heading": None})
+    recorder.close()
+
+    source = xplane_stub_server.RecordedFlight(recorder.files)
+    server = xplane_stub_server.start_in_background(source=source)
+    api = aircraft_mfd.XPlaneAPI(base_url_for(server), index_path=None)
+
+    try:
+        api.load_dataref_index(name for name, _ in aircraft_mfd.MFD_DATAREFS)
+        values = api.get_many(aircraft_mfd.MFD_DATAREFS)
+        fields = aircraft_mfd.FIELD_DATAREFS
+        missing = [name for (name, _), value in values.items() if value is None]
+        if missing:
+            print(f"❌ No value for: {missing}")
+            return False
+        if values[fields["ias"]] != 180.0 or values[fields["n1"]] != 75.0 or values[fields["heading"]] != 0.0:
+            print(f"❌ Served ias {values[fields['ias']]}, n1 {values[fields['n1']]}")
+            return False
+
+        print("✅ A recording is served in place of the synthetic flight")
+        return True
+    finally:
+        api.close()
+        server.shutdown()
+
+
+def test_index_after_restart():
+    server = xplane_stub_server.start_in_background()
+    index_path = Path(tempfile.mkdtemp()) / "dataref_index.json"
+    api = aircraft_mfd.XPlaneAPI(base_url_for(server), index_path=index_path)
+
+    try:
+        api.load_dataref_index(name for name, _ in aircraft_mfd.MFD_DATAREFS)
+
+        # X-Plane restarted: every cached ID now returns 404 on all reader threads at once
+        state = server.RequestHandlerClass.state
+        state.ids_by_name = {name: dataref_id + 5000 for name, dataref_id in state.ids_by_name.items()}
+        state.names_by_id = {dataref_id: name for name, dataref_id in state.ids_by_name.items()}
+        writes = []
+        write_index_file = api._write_index_file
+        api._write_index_file = lambda: (writes.append(1), write_index_file())
+
+        values = api.get_many(aircraft_mfd.MFD_DATAREFS)
+        missing = [name for (name, _), value in values.items() if value is None]
+        if missing:
+            print(f"❌ No value after the restart for: {missing}")
+            return False
+        if len(writes) != 1:
+            print(f"❌ Index saved {len(writes)} times for one batch of reads")
+            return False
+        saved = json.loads(index_path.read_text())["datarefs"]
+        if saved != state.ids_by_name or list(index_path.parent.glob("*.tmp")):
+            print("❌ Saved index does not hold the new IDs, or temporary files were left behind")
+            return False
+
+        # A single read outside get_many saves the ID it resolved again too
+        name = aircraft_mfd.MFD_DATAREFS[0][0]
+        state.ids_by_name[name] += 5000
+        state.names_by_id = {dataref_id: name for name, dataref_id in state.ids_by_name.items()}
+        if api.get_dataref_value(*aircraft_mfd.MFD_DATAREFS[0]) is None:
+            print(f"❌ No value for {name} after its ID changed")
+            return False
+        if json.loads(index_path.read_text())["datarefs"][name] != state.ids_by_name[name]:
+            print(f"❌ New ID of {name} not saved by a single read")
+            return False
+
+        print("✅ IDs resolved again after a restart are saved once, after the reads")
+        return True
+    finally:
+        api.close()
+        server.shutdown()
+
+
+def base_url_for(server):
+    return f"http://127.0.0.1:{server.server_port}/api/v2"
+
+
+def run_test(test_fn):
+    """Run a test function and return True if it passed, False otherwise."""
+    print(f"Running {test_fn.__name__}")
+    result = test_fn()
+    if not result:
+        print(f"❌ {test_fn.__name__} FAILED\n")
+    return result
+
+
+def main():
+    tests = [
+        test_rest_transport,
+        test_websocket_transport,
+        test_circuit_breaker,
+        test_breaker_probe_released,
+        test_negative_cache,
+        test_fault_injection,
+        test_recorded_source,
+        test_index_after_restart
+    ]
+
+    any_failures = False
+    for test_fn in tests:
+        if not run_test(test_fn):
+            any_failures = True
+
+    exit(1 if any_failures else 0)
+
+
+if __name__ == "__main__":
+    main()
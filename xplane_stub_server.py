@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the X-Plane Web API
+
+Serves the subset of the X-Plane 12.1.1 Web API used by the MFD so the
+transports in aircraft_mfd.py can be exercised without a simulator:
+
+    GET /api/capabilities
+    GET /api/v2/datarefs?filter[name]=...     (filter may be repeated)
+    GET /api/v2/datarefs/count
+    GET /api/v2/datarefs/{id}/value[?index=N]
+    WebSocket /api/v2                         (dataref_subscribe_values)
+
+Dataref values come from a synthetic flight (a gentle climbing turn) or,
+with --replay, from a flight recording (see flight_recorder.py) played on a
+loop. Latency, jitter, server errors and dropped connections can be injected
+to test the transports and their timeouts without a simulator.
+
+To run:
+    python3 xplane_stub_server.py [--port 8086]
+    python3 xplane_stub_server.py --replay recordings --latency-ms 40 --jitter-ms 20 --error-rate 0.02 --drop-rate 0.01
+"""
+
+import argparse
+import base64
+import bisect
+import hashlib
+import json
+import math
+import random
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import flight_recorder
+
+XPLANE_VERSION = "12.1.1"
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Push interval for WebSocket subscriptions (X-Plane sends updates at 10 Hz)
+PUSH_INTERVAL = 0.1
+
+# WebSocket opcodes
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class SyntheticFlight:
+    """Generates plausible dataref values for a jet in a gentle climbing turn"""
+
+    def __init__(self, aircraft_path: str = "Aircraft/Laminar Research/Boeing 737-800/b738.acf"):
+        self.start_time = time.monotonic()
+        self.aircraft_path = aircraft_path  # Change to simulate loading another aircraft
+
+    def values(self) -> Dict[str, Any]:
+        """Current value of every published dataref"""
+        t = time.monotonic() - self.start_time
+        heading = (90.0 + 1.5 * t) % 360.0
+        tas_ms = 128.6 + 2.0 * math.sin(t / 7.0)
+        n1 = 85.0 + 1.5 * math.sin(t / 11.0)
+        return {
+            "sim/flightmodel/position/latitude": 51.4700 + 0.0001 * t,
+            "sim/flightmodel/position/longitude": -0.4543 + 0.0001 * t,
+            "sim/flightmodel/position/elevation": 3048.0 + 2.5 * t,
+            "sim/flightmodel/position/y_agl": 3000.0 + 2.5 * t,
+            "sim/flightmodel/position/psi": heading,
+            "sim/flightmodel/position/theta": 3.0 + 0.5 * math.sin(t / 3.0),
+            "sim/flightmodel/position/phi": 15.0 + 2.0 * math.sin(t / 5.0),
+            "sim/flightmodel/position/hpath": (heading + 4.0) % 360.0,
+            "sim/cockpit2/gauges/indicators/airspeed_kts_pilot": 220.0 + 3.0 * math.sin(t / 7.0),
+            "sim/flightmodel/position/indicated_airspeed": 220.0 + 3.0 * math.sin(t / 7.0),
+            "sim/flightmodel/position/groundspeed": tas_ms - 5.0,
+            "sim/cockpit2/gauges/indicators/vvi_fpm_pilot": 500.0 + 50.0 * math.sin(t / 4.0),
+            "sim/flightmodel/misc/machno": 0.42,
+            "sim/flightmodel/position/true_airspeed": tas_ms / 0.514444,
+            "sim/cockpit2/engine/indicators/N1_percent": [n1, n1],
+            "sim/cockpit2/engine/indicators/N2_percent": [n1 + 8.0, n1 + 8.0],
+            "sim/cockpit2/engine/indicators/engine_speed_rpm": [0.0, 0.0],
+            "sim/cockpit2/engine/indicators/prop_speed_rpm": [0.0, 0.0],
+            "sim/cockpit2/engine/actuators/throttle_ratio": [0.8, 0.8],
+            "sim/flightmodel/weight/m_fuel_total": 8000.0 - 0.5 * t,
+            "sim/flightmodel/weight/m_total": 60000.0 - 0.5 * t,
+            "sim/aircraft/view/acf_Vso": 110.0,
+            "sim/aircraft/view/acf_Vne": 350.0,
+            "sim/aircraft/view/acf_Mmo": 0.82,
+            "sim/cockpit2/temperature/outside_air_temp_degc": -5.0,
+            # Byte-array datarefs are served base64 encoded
+            "sim/aircraft/view/acf_relative_path": base64.b64encode(self.aircraft_path.encode("utf-8")).decode("ascii"),
+        }
+
+
+class RecordedFlight:
+    """Serves the dataref values of a flight recording, played on a loop"""
+
+    def __init__(self, paths: Iterable[Path], speed: float = 1.0,
+                 aircraft_path: str = "Aircraft/Recorded/recorded.acf"):
+        """Load a recording
+
+        Args:
+            paths: Files of one recording, in order (see flight_recorder.recording_files)
+            speed: Playback speed relative to the recording
+            aircraft_path: Value of acf_relative_path (the aircraft is not recorded)
+        """
+        # Only needed for recordings: aircraft_mfd pulls in Tk and requests
+        from aircraft_mfd import FALLBACK_DATAREFS, FIELD_DATAREFS
+
+        self.columns = flight_recorder.read_recording(paths)
+        self.timestamps = self.columns["timestamp"]
+        if not self.timestamps:
+            raise ValueError("Recording holds no rows")
+        self.duration = self.timestamps[-1] - self.timestamps[0]
+        self.speed = speed
+        self.start_time = time.monotonic()
+        self.aircraft_path = aircraft_path
+        # Recorded field of every dataref: (dataref, field, array index or None)
+        self.fields = [(name, field, index) for field, (name, index) in FIELD_DATAREFS.items()
+                       if field in self.columns]
+        self.fields += [(name, field, index) for field, (name, index) in FALLBACK_DATAREFS.items()
+                        if field in self.columns]
+
+    def row(self) -> int:
+        """Row due at the current playback time"""
+        played = (time.monotonic() - self.start_time) * self.speed
+        if self.duration > 0.0:
+            played %= self.duration
+        return bisect.bisect_right(self.timestamps, self.timestamps[0] + played) - 1
+
+    def values(self) -> Dict[str, Any]:
+        """Current value of every published dataref"""
+        row = self.row()
+        values = {"sim/aircraft/view/acf_relative_path":
+                  base64.b64encode(self.aircraft_path.encode("utf-8")).decode("ascii")}
+        for name, field, index in self.fields:
+            value = self.columns[field][row]
+            if math.isnan(value):
+                value = 0.0  # Not recorded - X-Plane always has some value
+            # Array datarefs are served with two engines, like the synthetic flight
+            values[name] = value if index is None else [value, value]
+        return values
+
+
+class Faults:
+    """Network faults injected into the stand-in's responses
+
+    Every REST request is delayed by latency +/- jitter, then answered with a
+    500 error (error_rate) or dropped without a response (drop_rate). WebSocket
+    pushes get the same delay, and a drop closes the WebSocket.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 drop_rate: float = 0.0, seed: Optional[int] = None):
+        """Configure the faults
+
+        Args:
+            latency: Seconds added to every response
+            jitter: Maximum random seconds added to or taken off the latency
+            error_rate: Fraction of REST requests answered with a 500 error
+            drop_rate: Fraction of requests and pushes dropped by closing the connection
+            seed: Seed for reproducible faults (None = random)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()  # Handler threads share the generator
+        self.errors = 0
+        self.drops = 0
+
+    def delay(self):
+        """Sleep for one response's latency"""
+        with self.lock:
+            delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0.0:
+            time.sleep(delay)
+
+    def should_drop(self) -> bool:
+        """Decide whether to drop this request or push"""
+        with self.lock:
+            drop = self.random.random() < self.drop_rate
+            self.drops += drop
+        return drop
+
+    def should_fail(self) -> bool:
+        """Decide whether to answer this request with an error"""
+        with self.lock:
+            fail = self.random.random() < self.error_rate
+            self.errors += fail
+        return fail
+
+
+class StubState:
+    """Dataref catalog shared by all connections"""
+
+    def __init__(self, source):
+        self.source = source
+        names = sorted(source.values().keys())
+        # IDs are arbitrary in X-Plane; start high so they never look like indices
+        self.ids_by_name = {name: 1000 + i for i, name in enumerate(names)}
+        self.names_by_id = {dataref_id: name for name, dataref_id in self.ids_by_name.items()}
+
+    def value_by_id(self, dataref_id: int, index: Optional[int] = None) -> Any:
+        """Current value of a dataref, optionally a single array element"""
+        value = self.source.values()[self.names_by_id[dataref_id]]
+        if index is not None:
+            return [value[index]]
+        return value
+
+    def describe(self, name: str) -> Dict[str, Any]:
+        """Catalog entry for a dataref (as returned by /datarefs)"""
+        value = self.source.values()[name]
+        if isinstance(value, str):
+            value_type = "data"
+        elif isinstance(value, list):
+            value_type = "float_array"
+        else:
+            value_type = "float"
+        return {"id": self.ids_by_name[name], "name": name, "value_type": value_type, "is_writable": False}
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the Web API endpoints used by the MFD"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like X-Plane
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    state: StubState = None  # set by make_server()
+    faults: Faults = None  # set by make_server()
+
+    def log_message(self, format, *args):
+        pass  # Silence per-request logging
+
+    def send_json(self, status: int, body: Dict[str, Any]):
+        """Send a JSON response"""
+        payload = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client gave up, e.g. timed out on injected latency
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        path = url.path.rstrip("/")
+
+        if path == "/api/v2" and self.headers.get("Upgrade", "").lower() == "websocket":
+            self.handle_websocket()
+            return
+
+        self.faults.delay()
+        if self.faults.should_drop():
+            self.close_connection = True  # Closed without a response
+        elif self.faults.should_fail():
+            self.send_json(500, {"error_code": "internal_error", "error_message": "injected fault"})
+        elif path == "/api/capabilities":
+            self.send_json(200, {"api": {"versions": ["v1", "v2"]}, "x-plane": {"version": XPLANE_VERSION}})
+        elif path == "/api/v2/datarefs":
+            names = params.get("filter[name]", sorted(self.state.ids_by_name))
+            data = [self.state.describe(name) for name in names if name in self.state.ids_by_name]
+            self.send_json(200, {"data": data})
+        elif path == "/api/v2/datarefs/count":
+            self.send_json(200, {"data": len(self.state.ids_by_name)})
+        elif path.startswith("/api/v2/datarefs/") and path.endswith("/value"):
+            self.handle_value(path.split("/")[4], params)
+        else:
+            self.send_json(404, {"error_code": "route_not_found", "error_message": path})
+
+    def handle_value(self, raw_id: str, params: Dict[str, List[str]]):
+        """GET /api/v2/datarefs/{id}/value"""
+        try:
+            dataref_id = int(raw_id)
+            index = int(params["index"][0]) if "index" in params else None
+        except ValueError:
+            self.send_json(400, {"error_code": "invalid_request", "error_message": raw_id})
+            return
+        if dataref_id not in self.state.names_by_id:
+            self.send_json(404, {"error_code": "dataref_not_found", "error_message": raw_id})
+            return
+        try:
+            self.send_json(200, {"data": self.state.value_by_id(dataref_id, index)})
+        except (IndexError, TypeError):
+            self.send_json(400, {"error_code": "invalid_index", "error_message": str(index)})
+
+    # ---- WebSocket ----
+
+    def handle_websocket(self):
+        """Upgrade to a WebSocket and serve dataref subscriptions"""
+        key = self.headers.get("Sec-WebSocket-Key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+
+        self.ws_lock = threading.Lock()
+        self.ws_open = True
+        self.subscriptions: Dict[int, Optional[int]] = {}  # id -> index (None = whole value)
+        pusher = threading.Thread(target=self.push_updates, daemon=True)
+        pusher.start()
+
+        try:
+            while self.ws_open:
+                opcode, payload = self.read_frame()
+                if opcode == OP_TEXT:
+                    self.handle_ws_request(json.loads(payload.decode("utf-8")))
+                elif opcode == OP_PING:
+                    self.send_frame(OP_PONG, payload)
+                elif opcode == OP_CLOSE:
+                    self.send_frame(OP_CLOSE, payload[:2])
+                    break
+        except (OSError, ValueError, struct.error):
+            pass
+        finally:
+            self.ws_open = False
+            pusher.join(timeout=1.0)
+
+    def handle_ws_request(self, message: Dict[str, Any]):
+        """Handle a JSON request received over the WebSocket"""
+        req_id = message.get("req_id")
+        request_type = message.get("type")
+        datarefs = message.get("params", {}).get("datarefs", [])
+        success = True
+        with self.ws_lock:
+            if request_type == "dataref_subscribe_values":
+                for entry in datarefs:
+                    if entry.get("id") in self.state.names_by_id:
+                        self.subscriptions[entry["id"]] = entry.get("index")
+                    else:
+                        success = False
+            elif request_type == "dataref_unsubscribe_values":
+                if datarefs == "all":
+                    self.subscriptions.clear()
+                else:
+                    for entry in datarefs:
+                        self.subscriptions.pop(entry.get("id"), None)
+            else:
+                success = False
+        self.send_text({"req_id": req_id, "type": "result", "success": success})
+
+    def push_updates(self):
+        """Send changed values of subscribed datarefs every PUSH_INTERVAL"""
+        last_sent: Dict[int, Any] = {}
+        while self.ws_open:
+            with self.ws_lock:
+                subscriptions = dict(self.subscriptions)
+            changed = {}
+            for dataref_id, index in subscriptions.items():
+                value = self.state.value_by_id(dataref_id, index)
+                if last_sent.get(dataref_id) != value:
+                    changed[str(dataref_id)] = value
+                    last_sent[dataref_id] = value
+            if changed:
+                self.faults.delay()
+                if self.faults.should_drop():
+                    self.ws_open = False
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    break
+                try:
+                    self.send_text({"type": "dataref_update_values", "data": changed})
+                except OSError:
+                    break
+            time.sleep(PUSH_INTERVAL)
+
+    def read_exact(self, size: int) -> bytes:
+        """Read exactly size bytes from the client"""
+        data = self.rfile.read(size)
+        if len(data) != size:
+            raise OSError("WebSocket closed")
+        return data
+
+    def read_frame(self) -> tuple:
+        """Read one (unfragmented) client frame - returns (opcode, payload)"""
+        first, second = self.read_exact(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self.read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.read_exact(8))[0]
+        mask = self.read_exact(4) if second & 0x80 else b"\x00\x00\x00\x00"
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.read_exact(length)))
+        return opcode, payload
+
+    def send_frame(self, opcode: int, payload: bytes):
+        """Send one unmasked server frame"""
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        with self.ws_lock:
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+
+    def send_text(self, message: Dict[str, Any]):
+        """Send a JSON message as a text frame"""
+        self.send_frame(OP_TEXT, json.dumps(message).encode("utf-8"))
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8086, source=None,
+                faults: Optional[Faults] = None) -> ThreadingHTTPServer:
+    """Create a stand-in server (port 0 picks a free port)
+
+    Args:
+        source: SyntheticFlight or RecordedFlight serving the values (a new SyntheticFlight if None)
+        faults: Faults to inject (none if None)
+    """
+    handler = type("BoundStubRequestHandler", (StubRequestHandler,), {
+        "state": StubState(source if source is not None else SyntheticFlight()),
+        "faults": faults if faults is not None else Faults(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_background(host: str = "127.0.0.1", port: int = 0, source=None,
+                        faults: Optional[Faults] = None) -> ThreadingHTTPServer:
+    """Start a stand-in server on a daemon thread and return it (see make_server())
+
+    The base URL of the REST API is http://{host}:{server.server_port}/api/v2
+    """
+    server = make_server(host, port, source, faults)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Local stand-in for the X-Plane Web API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8086, help="Port to listen on")
+    parser.add_argument("--replay", metavar="PATH", type=Path,
+                        help="Serve a recording (an .mfdrec file or a directory) instead of the synthetic flight")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Playback speed of --replay")
+    parser.add_argument("--replay-session", metavar="NAME",
+                        help="Session of the --replay directory to serve (default: the newest)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random variation of the delay (+/-)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of REST requests answered with a 500 error")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="Fraction of requests and WebSocket pushes dropped by closing the connection")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible faults")
+    args = parser.parse_args()
+
+    source = None
+    if args.replay is not None:
+        try:
+            paths = flight_recorder.session_files(args.replay, args.replay_session)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Serving {flight_recorder.session_name(paths[0])}")
+        source = RecordedFlight(paths, speed=args.replay_speed)
+    faults = Faults(args.latency_ms / 1000.0, args.jitter_ms / 1000.0, args.error_rate, args.drop_rate, args.seed)
+    server = make_server(args.host, args.port, source, faults)
+    print(f"X-Plane Web API stand-in listening on http://{args.host}:{server.server_port}/api/v2")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    server.server_close()
+    if faults.errors or faults.drops:
+        print(f"Injected {faults.errors} errors and {faults.drops} dropped connections")
+
+
+if __name__ == "__main__":
+    main()